@@ -7,6 +7,7 @@ from paddock_manager import PaddockManager
 from save_manager import SaveManager
 from resource_manager import ResourceManager
 from events import Events
+from flight_recorder import FlightRecorder
 from data import *
 from utils import utils
 
@@ -193,6 +194,7 @@ class Contracts:
 
     def rebuild(self) -> None:
         logging.debug("Rebuilding contracts menu...")
+        FlightRecorder().record_event("menu rebuild", "contracts")
 
         self.rendered_surface.fill(UI_BACKGROUND_COLOR)
         self.contract_buttons = []
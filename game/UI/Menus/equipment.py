@@ -14,6 +14,7 @@ from farm import Shed
 from machinary import Tractor, Header, Tool
 from sellpoint_manager import SellpointManager
 from destination import Destination
+from flight_recorder import FlightRecorder
 from data import *
 
 from typing import List
@@ -304,6 +305,7 @@ class Equipment:
 
     def rebuild(self) -> None:
         logging.debug("Rebuilding equipment menu...")
+        FlightRecorder().record_event("menu rebuild", "equipment")
 
         self.rendered_surface.fill(UI_BACKGROUND_COLOR)
         self.equipment_buttons = []
@@ -12,6 +12,7 @@ from time import time
 
 from UI.pygame_gui import Button, DropDown
 from utils import utils
+from flight_recorder import FlightRecorder
 from data import *
 from typing import List, Dict
 
@@ -405,6 +406,7 @@ class Shop:
 
     def rebuild(self) -> None:
         logging.info("Rebuilding buy menu items...")
+        FlightRecorder().record_event("menu rebuild", "shop")
 
         self.rendered_surface.fill(UI_BACKGROUND_COLOR)
         self.buttons = []
@@ -8,6 +8,7 @@ from farm import Shed
 from sellpoint_manager import SellpointManager
 
 from UI.pygame_gui import Button
+from flight_recorder import FlightRecorder
 from UI.navbar import NavBar
 
 from UI.Menus.shop import Shop
@@ -46,6 +47,7 @@ class Panel:
 
     def rebuild(self) -> None:
         logging.info("Rebuilding panel...")
+        FlightRecorder().record_event("menu rebuild", "panel")
 
         self.rendered_surface.fill(UI_BACKGROUND_COLOR)
 
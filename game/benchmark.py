@@ -0,0 +1,226 @@
+import os
+import data
+
+# Headless, and the web build reads pre-shrunk boundaries from a file so benchmark the real path generation instead
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+data.IS_WEB_BUILD = False
+
+import pygame as pg
+import json
+import argparse
+import tracemalloc
+
+from math import cos, sin, pi
+from random import Random
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Tuple
+
+pg.init()
+
+screen = pg.display.set_mode((800, 600))
+
+from resource_manager import ResourceManager
+from paddock_manager import PaddockManager
+from paddock import Paddock
+from pathfinding import Job, RoadGraph
+from spatial_index import PointGrid, KDTree, NUMPY_AVAILABLE, linear_nearest_index
+from farm_ceo import Map
+from utils import utils
+from data import *
+
+WORKING_WIDTH: int = 17
+SYNTHETIC_RADII: Tuple[int] = (100, 200, 400)
+SYNTHETIC_CONCAVITIES: Tuple[float] = (0.0, 0.3, 0.6)
+
+def load_green_spring() -> Tuple[List[Paddock], Dict[str, Any], float]:
+    """Returns the paddocks (with boundaries), the map cfg and the map scale"""
+
+    map_image, map_cfg = ResourceManager.load_map("Green_Spring_cfg.json")
+    game_map = Map(pg.Surface((1920, 1080)), (map_image, map_cfg))
+
+    paddocks = {int(num) + 1: dict(attrs, owned_by="npc") for num, attrs in map_cfg["paddocks"].items()}
+
+    paddock_manager = PaddockManager()
+    paddock_manager.init(pg.Surface((1920, 1080)), game_map.surface, game_map.paddocks_surface, paddocks, game_map.scale)
+
+    return paddock_manager.paddocks, map_cfg, game_map.scale
+
+def load_green_spring_paddocks() -> List[Paddock]:
+    return load_green_spring()[0]
+
+def make_synthetic_polygon(radius: int, concavity: float, spikes: int = 8, seed: int = 0) -> List[Tuple[int, int]]:
+    """
+    Star shaped paddock, concavity 0 is a convex polygon and 1 would pinch the inner points into the center.
+    The points are jittered a little so the edges aren't perfectly regular.
+    """
+
+    rng = Random(seed)
+    center = radius + 20
+
+    polygon = []
+    for i in range(spikes * 2):
+        angle = pi * i / spikes
+        point_radius = radius if i % 2 == 0 else radius * (1 - concavity)
+        point_radius *= rng.uniform(0.95, 1.05)
+
+        polygon.append((int(center + cos(angle) * point_radius), int(center + sin(angle) * point_radius)))
+
+    return polygon
+
+def measure(func: Callable, *args: Any) -> Tuple[Any, Dict[str, float]]:
+    """Runs the function once for its wall time and again under tracemalloc for its peak memory (tracing slows it down)"""
+
+    start = perf_counter()
+    result = func(*args)
+    wall_time = perf_counter() - start
+
+    tracemalloc.start()
+    func(*args)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, {"wall_time_ms": round(wall_time * 1e3, 3), "peak_memory_kb": round(peak_memory / 1024, 1)}
+
+def build_working_path(boundary: List[Tuple], gate: Tuple[int, int]) -> Tuple[List[Tuple], List[Tuple]]:
+    # Built directly so the `PathCache` doesn't turn it into a file read
+    job = Job(None, None, [], None, None, (0, 0), -1)
+    path = job.build_working_path(boundary, gate, WORKING_WIDTH, outside_laps=2, skiprow=True)
+
+    return path, job.lap_1
+
+def scan_polygon(polygon: List[Tuple], batched: bool) -> List:
+    """Every runline of the polygon against its mask, like `Job.build_working_path` does"""
+
+    rect = utils.get_polygon_rect(polygon)
+    local_polygon = [(px - rect.x, py - rect.y) for px, py in polygon]
+
+    surface = pg.Surface(rect.size, pg.SRCALPHA)
+    pg.draw.polygon(surface, (255, 0, 0), local_polygon)
+    mask = pg.mask.from_surface(surface)
+
+    line_positions = range(WORKING_WIDTH // 2, rect.w, WORKING_WIDTH)
+
+    if batched:
+        return utils.runlines_collide_mask(mask, line_positions, 0, rect.h, True)
+
+    return [utils.line_collides_mask(((x, 0), (x, rect.h)), mask, rect) for x in line_positions]
+
+def benchmark_polygon(name: str, boundary: List[Tuple], gate: Tuple[int, int]) -> Dict[str, Any]:
+    result = {"name": name, "boundary_points": len(boundary)}
+
+    try:
+        lap, result["shrink_polygon"] = measure(utils.shrink_polygon, boundary, WORKING_WIDTH / 2)
+        result["shrink_polygon"]["points"] = len(lap)
+
+        runlines, result["line_collides_mask"] = measure(scan_polygon, lap, False)
+        result["line_collides_mask"]["runlines"] = len(runlines)
+
+        _, result["runlines_collide_mask"] = measure(scan_polygon, lap, True)
+        result["runlines_collide_mask"]["runlines"] = len(runlines)
+
+        (path, lap_1), result["generate_working_path"] = measure(build_working_path, boundary, gate)
+        result["generate_working_path"]["points"] = len(path)
+        result["generate_working_path"]["lap_1_points"] = len(lap_1)
+    except Exception as e:
+        # Very concave synthetic paddocks can shrink into several polygons, record it instead of stopping the run
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    return result
+
+def benchmark_transport_paths(map_cfg: Dict[str, Any], scale: float, paddocks: List[Paddock]) -> Dict[str, Any]:
+    roads = [[(px * scale, py * scale) for px, py in road] for road in map_cfg["roads"].values()]
+    shed_position = utils.scale_rect(pg.Rect(map_cfg["shed"]["rect"]), scale).center
+
+    road_graph, result = measure(RoadGraph, roads, ROAD_JUNCTION_DISTANCE * scale)
+    result = {"road_graph": dict(result, nodes=len(road_graph.nodes)), "routes": []}
+
+    targets = [(f"paddock {paddock.num}", paddock.gate) for paddock in paddocks]
+    targets.extend((sellpoint["name"], (sellpoint["location"][0] * scale, sellpoint["location"][1] * scale)) for sellpoint in map_cfg["sell points"].values())
+
+    for name, target in targets:
+        # A new job (and graph) each time would measure the memoized routes being rebuilt, so they share one graph like the shed's jobs do
+        job = Job(None, None, roads, None, None, shed_position, -1, road_graph)
+
+        path, route_result = measure(job.generate_transport_path, shed_position, target)
+        result["routes"].append(dict(route_result, name=name, points=len(path)))
+
+    return result
+
+def benchmark_spatial_index(paddocks: List[Paddock], query_count: int = 2000) -> Dict[str, Any]:
+    paddock = max(paddocks, key=lambda paddock: len(paddock.boundary))
+
+    rng = Random(1)
+    queries = [(rng.uniform(paddock.rect.left, paddock.rect.right), rng.uniform(paddock.rect.top, paddock.rect.bottom)) for _ in range(query_count)]
+
+    point_sets = {
+        "boundary": paddock.boundary,
+        "lap": utils.shrink_polygon(paddock.boundary, WORKING_WIDTH / 2)
+    }
+
+    result = {"paddock": paddock.num, "queries": query_count}
+
+    for name, points in point_sets.items():
+        indexes = {"linear_scan": (None, lambda point: linear_nearest_index(points, point))}
+
+        grid, grid_build = measure(PointGrid, points)
+        indexes["grid"] = (grid_build, grid.nearest_index)
+
+        if NUMPY_AVAILABLE:
+            kd_tree, kd_tree_build = measure(KDTree, points)
+            indexes["kd_tree"] = (kd_tree_build, kd_tree.nearest_index)
+
+        expected = [linear_nearest_index(points, query) for query in queries]
+        result[name] = {"points": len(points)}
+
+        for index_name, (build, nearest_index) in indexes.items():
+            start = perf_counter()
+            found = [nearest_index(query) for query in queries]
+            query_time = (perf_counter() - start) / query_count * 1e6
+
+            assert found == expected, f"{index_name} does not match the linear scan!"
+
+            result[name][index_name] = {"build": build, "query_time_us": round(query_time, 2)}
+
+    return result
+
+def run_benchmarks() -> Dict[str, Any]:
+    paddocks, map_cfg, scale = load_green_spring()
+
+    results = {"game_version": GAME_VERSION, "numpy": NUMPY_AVAILABLE, "green_spring": [], "synthetic": []}
+
+    # Warm up so lazy imports (like pygame.surfarray loading NumPy) don't land on the first paddock
+    scan_polygon(make_synthetic_polygon(50, 0), True)
+
+    for paddock in paddocks:
+        print(f"Green Spring paddock {paddock.num}...")
+        results["green_spring"].append(benchmark_polygon(f"paddock {paddock.num}", paddock.boundary, paddock.gate))
+
+    for radius in SYNTHETIC_RADII:
+        for concavity in SYNTHETIC_CONCAVITIES:
+            print(f"Synthetic paddock (radius: {radius}, concavity: {concavity})...")
+
+            polygon = make_synthetic_polygon(radius, concavity)
+            results["synthetic"].append(dict(benchmark_polygon(f"r{radius} c{concavity}", polygon, polygon[0]), radius=radius, concavity=concavity))
+
+    print("Transport paths...")
+    results["transport"] = benchmark_transport_paths(map_cfg, scale, paddocks)
+
+    print("Spatial index...")
+    results["spatial_index"] = benchmark_spatial_index(paddocks)
+
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=f"Headless {GAME_NAME} path generation benchmarks")
+    parser.add_argument("-o", "--output", help="JSON file to write the results to (printed if not given)")
+    args = parser.parse_args()
+
+    results = run_benchmarks()
+
+    if args.output is None:
+        print(json.dumps(results, indent=4))
+    else:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+
+        print(f"Benchmark results written to: {args.output}")
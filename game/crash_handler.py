@@ -4,6 +4,7 @@ import sys
 import asyncio
 
 from traceback import format_exc, extract_tb
+from flight_recorder import FlightRecorder
 from data import *
 
 class CrashHandler:
@@ -16,6 +17,8 @@ class CrashHandler:
             logging.critical(f"CRITICAL ERROR HAS OCCURED! SHOWING CRASH SCREEN...")
             print(format_exc())
 
+            self.flight_recorder_path = FlightRecorder().dump("crash", format_exc())
+
             self.prebuild_crash_info(str(e))
             asyncio.run(self.process_crash())
 
@@ -42,7 +45,11 @@ class CrashHandler:
         func_name = tb_last.name
 
         error_font = pg.font.SysFont(None, 30)
-        self.rendered_surface.blit(error_font.render(f"Error at line {line_no} in {filename}: {exception_summary}\n\n{format_exc()}", True, (255, 255, 0)), (30, disclaimer_surf.get_height() + 150))
+        error_surf = error_font.render(f"Error at line {line_no} in {filename}: {exception_summary}\n\n{format_exc()}", True, (255, 255, 0))
+        self.rendered_surface.blit(error_surf, (30, disclaimer_surf.get_height() + 150))
+
+        if self.flight_recorder_path is not None:
+            self.rendered_surface.blit(error_font.render(f"The last few frames were saved to: {self.flight_recorder_path}", True, (255, 255, 255)), (30, disclaimer_surf.get_height() + error_surf.get_height() + 170))
 
     async def process_crash(self) -> None:
         clock = pg.time.Clock()
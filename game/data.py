@@ -133,8 +133,20 @@ JOB_TYPES = {
 END_JOB_STAGES = [JOB_TYPES["transporting_from"], JOB_TYPES["travelling_from"]]
 
 MAX_TURN_SPEED: int = 8
+SUBSTEP_MAX_DT: float = 1/30 # Longest physics substep (seconds), machines going straight only need this many
+SUBSTEP_MIN_DT: float = 1/1200 # Shortest physics substep (seconds), the old fixed step so a substep is never more work than before
+SUBSTEP_MAX_ERROR: float = 0.05 # Pixels a substep can drift from the arc a turning machine should follow
+SUBSTEP_MAX_TURN: float = 2 # Degrees a machine or its tool can turn in one substep
+SUBSTEP_MAX_GAIN: float = 0.5 # Fraction of its heading error a machine or its tool can correct in one substep (over 1 overshoots)
 PAINT_RECT_HEIGHT: int = 4
 PAINT_RECT_DIST: int = 2
+PAINT_MASK_ANGLE_STEP: float = 1 # Degrees between the cached rotated paint masks of tools and headers (0 rotates them exactly every stroke)
+SPRITE_ANGLE_STEP: float = 1 # Degrees between the cached rotated sprites machines are drawn with (0 rotates them exactly every frame)
+SPRITE_CACHE_MAX_ENTRIES: int = 1024
+FLEET_BATCH_MIN_MACHINES: int = 32 # Active machines needed before their physics is batched in a `FleetState` (when NumPy is available), fewer are quicker one at a time
+TIME_WARP_STEP: float = 10 # Seconds per frame when skipping time, field work is time warped through whole frames at once but everything else is still substepped
+TIME_WARP_UPDATE_DT: float = 1/30 # Seconds per update for what can't be time warped in a time warped frame, so it paints and moves onto its next stage as often as it does at normal frame rates
+TIME_WARP_STRAIGHT_ANGLE: float = 0.01 # Degrees off facing the next point where a time warped machine counts as driving straight at it
 
 EQUIPMENT_RATES = {
     # Less is more
@@ -175,6 +187,35 @@ BUILD_TYPE: str = "Release"
 CONSOLE_BUILD: bool = not BUILD
 IS_WEB_BUILD: bool = True
 
+PATH_CACHE_VERSION: int = 3 # Bump when path generation changes so old cached paths are ignored
+PATH_CACHE_MAX_ENTRIES: int = 32
+
+WORKING_PATH_OUTSIDE_LAPS: int = 2 # Laps around the paddock edge before working the rows
+WORKING_PATH_SKIPROW: bool = True # Work every second row on the way out and the skipped ones on the way back
+
+PATH_SIMPLIFICATION: bool = True
+PATH_SIMPLIFICATION_TOLERANCE: float = 0.1 # Fraction of the machines PATH_POP_RADIUS a working path can be moved by when simplifying it
+PATH_SIMPLIFICATION_MAX_SEGMENT: float = 1 # Longest gap between simplified working path points, in multiples of PATH_POP_RADIUS
+
+WORKER_POOL_MAX_WORKERS: int | None = None # None uses a worker per core, 0 disables the pool (work is run inline), anything else caps the workers
+
+ROAD_JUNCTION_DISTANCE: float = 25 # Unscaled map distance where two roads count as joined
+SPATIAL_INDEX_KDTREE_MIN_POINTS: int = 4096 # Point sets at least this big use a KD-tree (when NumPy is available)
+
+PADDOCK_DARKNESS: int = 110 # Map pixels with r, g and b all below this are part of a paddock
+PAINT_SAVE_VERSION: int = 1 # Bump when the paint file format changes so old paint is ignored
+MAP_CACHE_VERSION: int = 2 # Bump when paddock boundaries or masks are built differently so old map caches are rebuilt
+
+PROFILE_FRAMES: bool = not BUILD # Times each stage of every frame for the performance monitor (F3 exports the timings) and the flight recorders dumps
+PROFILER_HISTORY: int = 300 # Frames of stage timings kept for the percentiles and the stacked bar graph
+
+FLIGHT_RECORDER: bool = not BUILD # Keeps the last few frames timings and events to dump when a frame hitches or the game crashes
+FLIGHT_RECORDER_FRAMES: int = 120
+HITCH_BUDGET_MS: float = 250 # Frames slower than this are dumped as a hitch
+HITCH_DUMP_COOLDOWN: float = 10 # Seconds between hitch dumps so a slow stretch doesn't write a file every frame
+HITCH_MAX_DUMPS: int = 20 # Dumps kept in the dump folder, the oldest are deleted
+HITCH_SAMPLE_STACK: bool = True # Samples the main threads stack from a watchdog thread while a frame is over budget
+
 # ---------- CHEATS ----------
 UNLOCK_ALL_PADDOCKS: bool = not BUILD
 ENABLE_KEYBOARD_CHEATS: bool = not BUILD
@@ -3,6 +3,7 @@ import logging
 import sys
 
 from save_manager import SaveManager
+from performance_monitor import FrameProfiler
 from data import *
 from typing import Tuple, List
 
@@ -24,6 +25,7 @@ class Events:
         self.override_requires_authority: bool = False # Allows specific, private access for top-level elements such as popups to the override state, while freezing it for non-authorities
 
         self.game_paused: bool = False
+        self.skip_time_requested: bool = False
 
     def set_override(self, override: bool) -> None:
         self.mouse_press_override = override
@@ -102,6 +104,12 @@ class Events:
                 if event.key == pg.K_F2:
                     self.game_paused = not self.game_paused
 
+                elif event.key == pg.K_F3:
+                    FrameProfiler().export_all()
+
+                elif event.key == pg.K_F4:
+                    self.skip_time_requested = True
+
         if self.mouse_press_override:
             if not self.override_requires_authority:
                 self.mouse_just_pressed = False
@@ -7,11 +7,13 @@ from save_manager import SaveManager
 from paddock_manager import PaddockManager
 from sellpoint_manager import SellpointManager
 from machinary import Tractor, Header, Tool
-from pathfinding import TaskManager
+from fleet_state import FleetState, NUMPY_AVAILABLE
+from pathfinding import TaskManager, RoadGraph
 from events import Events
 from destination import Destination
 from sellpoints import SellPoint
 from utils import utils, LayableRenderObj
+from performance_monitor import FrameProfiler
 from data import *
 
 from copy import deepcopy
@@ -48,7 +50,10 @@ class Shed(LayableRenderObj):
         self.scale_roads()
 
         self.equipment_draw = lambda **args: logging.warning("equipment_draw called before it was initialized in the shed!")
-        self.task_manager = TaskManager(self.vehicles, self.tools, self.roads, self.rect.center, self.fully_load_destination)
+        self.equipment_draw_requested = False
+        self.equipment_rebuild_requested = False
+        self.task_manager = TaskManager(self.vehicles, self.tools, self.roads, self.rect.center, self.fully_load_destination, self.road_graph)
+        self.fleet_state: FleetState | None = None # Kept between the frames its fleet is batched for
 
         # shading for roof
         large_shadow_map = ResourceManager.load_image("Lighting/shed_shadow_map.png", (1000, 1000)) # Already converted
@@ -75,12 +80,25 @@ class Shed(LayableRenderObj):
         # Should be called from equipment.py at __init__
         self.equipment_draw = equipment_draw
 
-        logging.debug("Received equipment_draw, setting it in every vehicle...")
+        logging.info("equipment_draw has been set.")
 
-        for vehicle in self.vehicles:
-            vehicle.set_equipment_draw(self.equipment_draw)
+    def request_equipment_draw(self, rebuild: bool = False) -> None:
+        """
+        The vehicles `equipment_draw`. Vehicles can change their task or fill a few times in a frame (and a fleet of them a lot more),
+        so instead of redrawing the equipment menu every time it is drawn once at the end of `simulate`
+        """
 
-        logging.info("equipment_draw has been set.")
+        self.equipment_draw_requested = True
+        self.equipment_rebuild_requested = self.equipment_rebuild_requested or rebuild
+
+    def flush_equipment_draw(self) -> None:
+        if not self.equipment_draw_requested: return
+
+        rebuild = self.equipment_rebuild_requested
+        self.equipment_draw_requested = False
+        self.equipment_rebuild_requested = False
+
+        self.equipment_draw(rebuild=rebuild)
 
     def set_silo(self, silo: SellPoint) -> None:
         self._silo = silo
@@ -99,6 +117,7 @@ class Shed(LayableRenderObj):
                 new_roads[-1].append((px, py)) 
 
         self.roads = new_roads
+        self.road_graph = RoadGraph(self.roads, ROAD_JUNCTION_DISTANCE * self.scale)
 
     def fully_load_destination(self, destination: Destination) -> None:
         if destination.is_paddock:
@@ -175,8 +194,8 @@ class Shed(LayableRenderObj):
         attrs = deepcopy(SaveManager().STATIC_VEHICLES_DICT[vehicle_type][save_attrs["brand"]][save_attrs["model"]])
         attrs.update(save_attrs)
 
-        if attrs["header"]: vehicle = Header(self.game_surface, self.rect, attrs, self.scale, self.task_header, self.equipment_draw, self.add_xp)
-        else: vehicle = Tractor(self.game_surface, self.rect, attrs, self.scale, self.task_tractor, self.equipment_draw, self.get_silo, self.add_xp, self.pack_away_vehicle)
+        if attrs["header"]: vehicle = Header(self.game_surface, self.rect, attrs, self.scale, self.task_header, self.request_equipment_draw, self.add_xp)
+        else: vehicle = Tractor(self.game_surface, self.rect, attrs, self.scale, self.task_tractor, self.request_equipment_draw, self.get_silo, self.add_xp, self.pack_away_vehicle)
 
         self.vehicles.append(vehicle)
 
@@ -200,7 +219,8 @@ class Shed(LayableRenderObj):
 
     def task_tractor(self, tractor: Tractor, tool: Tool, destination: Destination, stage: int = -1) -> None:
         job = self.task_manager.create_job(tractor, tool, tractor.destination, destination)
-        path = job.generate_path()
+        with FrameProfiler().stage("path planning"):
+            path_future = job.plan_path()
 
         tractor.destination = destination
         tractor.tool = tool
@@ -212,25 +232,84 @@ class Shed(LayableRenderObj):
         if destination.is_paddock: paddock = int(destination.destination.num) - 1 # its an index
         else: paddock = -1
 
-        tractor.set_path(job, path, stage, paddock)
+        if path_future.done():
+            tractor.set_path(job, job.collect_path(path_future), stage, paddock)
+        else:
+            tractor.set_planning(job, path_future, stage, paddock)
     
     def task_header(self, header: Header, destination: Destination, stage: int = -1) -> None:
         job = self.task_manager.create_job(header, None, header.destination, destination)
-        path = job.generate_path()
+        with FrameProfiler().stage("path planning"):
+            path_future = job.plan_path()
 
         header.destination = destination
 
         if destination.is_paddock: paddock = int(destination.destination.num) - 1 # its an index
         else: paddock = -1
 
-        header.set_path(job, path, stage, paddock)
+        if path_future.done():
+            header.set_path(job, job.collect_path(path_future), stage, paddock)
+        else:
+            header.set_planning(job, path_future, stage, paddock)
 
-    def simulate(self, dt: float) -> None:
-        self.update()
+    def simulate(self, dt: float, time_warp: bool = False) -> None:
+        """time_warp: field work is skipped through analytically (`time_warp` on the machines), the rest is simulated as usual"""
 
-        for vehicle in self.vehicles:
-            if vehicle.active:
-                vehicle.update(dt)
+        profiler = FrameProfiler()
+
+        with profiler.stage("shed"):
+            self.update()
+
+        active_vehicles = [vehicle for vehicle in self.vehicles if vehicle.active]
+
+        if NUMPY_AVAILABLE and not time_warp and len(active_vehicles) >= FLEET_BATCH_MIN_MACHINES:
+            with profiler.stage("fleet"):
+                self.simulate_fleet(active_vehicles, dt)
+        else:
+            self.fleet_state = None
+
+            for vehicle in self.vehicles:
+                if vehicle.active:
+                    with profiler.stage(f"vehicle {vehicle.vehicle_id}"):
+                        if time_warp:
+                            self.time_warp_vehicle(vehicle, dt)
+                        else:
+                            vehicle.update(dt)
+
+        with profiler.stage("equipment draw"):
+            self.flush_equipment_draw()
+
+    def time_warp_vehicle(self, vehicle: Tractor | Header, dt: float) -> None:
+        """
+        Time warps as much of the vehicles field work as it can and updates it through the rest `TIME_WARP_UPDATE_DT` at a time,
+        so work that starts (or can carry on) part way through the frame is time warped too instead of driven with a single stroke of paint
+        """
+
+        remaining_dt = dt
+
+        while remaining_dt > 0 and vehicle.active:
+            remaining_dt -= vehicle.time_warp(remaining_dt)
+            if remaining_dt <= 0: break
+
+            step = min(remaining_dt, TIME_WARP_UPDATE_DT)
+            vehicle.update(step)
+
+            remaining_dt -= step
+
+    def simulate_fleet(self, vehicles: List[Tractor | Header], dt: float) -> None:
+        """Same as updating the vehicles one by one, but their substeps are run together in a `FleetState`"""
+
+        vehicles = [vehicle for vehicle in vehicles if vehicle.begin_update()]
+        if len(vehicles) == 0: return
+
+        # Only a machine starting or finishing (or being packed away mid frame) builds a new one
+        if self.fleet_state is None or self.fleet_state.machines != vehicles:
+            self.fleet_state = FleetState(vehicles)
+        else:
+            self.fleet_state.sync()
+
+        for vehicle in self.fleet_state.update(dt):
+            vehicle.end_update()
 
     def rebuild(self) -> None:
         self.surface.fill((0, 0, 0, 255))
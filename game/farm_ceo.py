@@ -1,13 +1,13 @@
 import pygame as pg
 import logging
 
-from time import time
 from math import floor
 
 from resource_manager import ResourceManager, FontManager
 from save_manager import SaveManager
 
 from paddock_manager import PaddockManager
+from map_cache import MapCache
 from sellpoint_manager import SellpointManager
 from events import Events
 
@@ -16,6 +16,8 @@ from UI.popups import PopupType, OKPopup, OKCancelPopup
 
 from utils import utils, VarsSingleton
 from farm import Shed
+from performance_monitor import FrameProfiler
+from flight_recorder import FlightRecorder
 from data import *
 from typing import Dict, List, Iterable
 
@@ -117,6 +119,7 @@ class HUD:
 
 class FarmCEO:
     RESOURCE_MANAGER: ResourceManager = ResourceManager()
+    MAP_NAME: str = "Green_Spring_cfg.json"
 
     def __init__(self, screen: pg.Surface, clock: pg.time.Clock, events: Events) -> None:
         self.screen: pg.Surface = screen
@@ -128,7 +131,8 @@ class FarmCEO:
         self.clock = clock
         self.events = events
 
-        self.map = Map(self.screen, self.RESOURCE_MANAGER.load_map("Green_Spring_cfg.json")) # map estimated to be almost screen size
+        self.map = Map(self.screen, self.RESOURCE_MANAGER.load_map(self.MAP_NAME)) # map estimated to be almost screen size
+        self.map_cache = MapCache(self.MAP_NAME, self.map.map_cfg, self.map.scale)
         self.game_surface = pg.Surface((self.map.rect.w, self.map.rect.h), pg.SRCALPHA)
 
         FontManager().init()
@@ -144,8 +148,9 @@ class FarmCEO:
         self.save_manager: SaveManager = SaveManager()
         self.save_manager.init(self.map.map_cfg, self.shed.vehicles, self.shed.tools, self.shed.add_vehicle, self.shed.add_tool, [], self.shed.rect.center) # WARNING: Patch paddocks immediately
                                                                                                                                                #
-        self.paddock_manager.init(self.screen, self.map.surface, self.map.paddocks_surface, self.save_manager.get_paddocks(), self.map.scale)  #
+        self.paddock_manager.init(self.screen, self.map.surface, self.map.paddocks_surface, self.save_manager.get_paddocks(), self.map.scale, self.map_cache)  #
         self.save_manager.paddocks = self.paddock_manager.paddocks                                                                             # HERE
+        self.save_manager.load_paint()
 
         self.sellpoint_manager.init(self.save_manager.get_sellpoints())
         self.shed.set_silo(self.sellpoint_manager.silo)
@@ -158,7 +163,7 @@ class FarmCEO:
         self.hud = HUD(self.game_surface)
 
         self.time: float = self.save_manager.get_attr("time") # time / 24 = *n* days
-        self.last_update_time = 0.0
+        self.unaccounted_time = 0.0
 
         self.vars_singleton = VarsSingleton()
         self.vars_singleton.init(shed=self.shed)
@@ -269,19 +274,47 @@ class FarmCEO:
         self.set_popup(OKCancelPopup(self.events, self.remove_popup, self.sleep, "Sleep Request", "Are you sure you want to sleep?\nAll crops will advance to the next growth stage."))
 
     def background_render(self) -> None:
+        # Paint from the last frame's strokes
+        self.paddock_manager.flush_paint()
+
         self.map.render()
         self.paddock_manager.draw_paddock_numbers(draw_price=self.panel.shop.active and self.panel.shop.in_paddock_menu)
 
         self.game_surface.fill((0, 0, 0, 0))
 
-    def simulate(self, dt: float) -> None:
-        if time() - self.last_update_time >= 1:
-            self.last_update_time = time()
+    def simulate(self, dt: float, time_warp: bool = False) -> None:
+        # Game time follows the simulated time (not the wall clock) so it pauses with the game and keeps up when fast-forwarded
+        self.unaccounted_time += dt
+
+        while self.unaccounted_time >= 1:
+            self.unaccounted_time -= 1
             self.time += TIMESCALE
+            self.save_manager.time = self.time
+
+            if self.time % MINS_IN_DAY < TIMESCALE:
+                FlightRecorder().record_event("day advanced", f"day {int(self.time // MINS_IN_DAY)}")
+
+        profiler = FrameProfiler()
+
+        with profiler.stage("paddocks"):
+            self.paddock_manager.update(self.events.mouse_just_released)
+
+        with profiler.stage("sellpoints"):
+            self.sellpoint_manager.update(self.events.mouse_just_released)
+
+        self.shed.simulate(dt, time_warp)
+
+    def skip_time(self, seconds: float) -> None:
+        """Fast forwards `seconds` (simulated) as `TIME_WARP_STEP` long time warped frames, so field work is skipped through instead of driven"""
+
+        logging.info(f"Skipping {seconds}s...")
+        FlightRecorder().record_event("skip time", f"{seconds}s")
+
+        while seconds > 0:
+            dt = min(seconds, TIME_WARP_STEP)
+            self.simulate(dt, time_warp=True)
 
-        self.paddock_manager.update(self.events.mouse_just_released)
-        self.sellpoint_manager.update(self.events.mouse_just_released)
-        self.shed.simulate(dt)
+            seconds -= dt
 
     def foreground_render(self) -> None:
         self.sellpoint_manager.render_grids()
@@ -297,7 +330,8 @@ class FarmCEO:
         self.screen.blit(self.game_surface, (PANEL_WIDTH, 0))
 
     def ui_render(self) -> None:
-        self.panel.draw()
+        with FrameProfiler().stage("panel"):
+            self.panel.draw()
 
         # WARNING: THIS HAS TO BE LAST
         if self.popup is not None:
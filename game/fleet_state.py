@@ -0,0 +1,452 @@
+try:
+    import numpy as np
+    NUMPY_AVAILABLE: bool = True
+except ImportError:
+    NUMPY_AVAILABLE: bool = False
+
+import pygame as pg
+
+from machinary import Tractor, Header
+from vehicle_trailer_simulation import get_rotated_size
+from data import *
+
+from enum import IntEnum
+from typing import List, Tuple
+
+def get_rotated_sizes(widths: "np.ndarray", heights: "np.ndarray", angles: "np.ndarray") -> "np.ndarray":
+    """`get_rotated_size` for arrays of sizes and angles (the same C float maths, so it matches pygame exactly). Returns (widths, heights)"""
+
+    angles = angles.astype(np.float32).astype(np.float64)
+
+    radangles = angles * .01745329251994329
+    sangles, cangles = np.sin(radangles), np.cos(radangles)
+
+    cx, cy = cangles * widths, cangles * heights
+    sx, sy = sangles * widths, sangles * heights
+
+    rotated_widths = np.trunc(np.maximum.reduce((np.abs(cx + sy), np.abs(cx - sy), np.abs(-cx + sy), np.abs(-cx - sy))))
+    rotated_heights = np.trunc(np.maximum.reduce((np.abs(sx + cy), np.abs(sx - cy), np.abs(-sx + cy), np.abs(-sx - cy))))
+
+    right_angle = np.fmod(angles, 90) == 0
+    straight = np.fmod(angles, 180) == 0
+
+    rotated_widths = np.where(right_angle, np.where(straight, widths, heights), rotated_widths)
+    rotated_heights = np.where(right_angle, np.where(straight, heights, widths), rotated_heights)
+
+    return rotated_widths, rotated_heights
+
+def get_substeps(remaining_dt: "np.ndarray", speed: "np.ndarray", turn_rates: "np.ndarray", gains: "np.ndarray", max_distance: "np.ndarray") -> "np.ndarray":
+    """`machine_kinematics.get_substep` for a row per machine, turn_rates and gains are (machines, turns) with 0 for turns a machine doesn't have"""
+
+    moving = speed > 0
+    safe_speed = np.where(moving, speed, 1)
+
+    step = np.minimum(remaining_dt, SUBSTEP_MAX_DT)
+    step = np.where(moving, np.minimum(step, max_distance / safe_speed), step)
+
+    for turn_rate, gain in zip(turn_rates.T, gains.T):
+        turning = turn_rate > 0
+        safe_turn_rate = np.where(turning, turn_rate, 1)
+
+        step = np.where(turning, np.minimum(step, SUBSTEP_MAX_TURN / safe_turn_rate), step)
+        step = np.where(turning & moving, np.minimum(step, np.sqrt(2 * SUBSTEP_MAX_ERROR / (safe_speed * np.radians(safe_turn_rate)))), step)
+
+        step = np.where(gain > 0, np.minimum(step, SUBSTEP_MAX_GAIN / np.where(gain > 0, gain, 1)), step)
+
+    return np.minimum(remaining_dt, np.maximum(step, SUBSTEP_MIN_DT))
+
+class MachineColumn(IntEnum):
+    """`FleetState.machine_state` columns, the machines physics (moved by the batch and written back)"""
+
+    X = 0
+    Y = 1
+    ROTATION = 2
+    VELOCITY_X = 3
+    VELOCITY_Y = 4
+    WIDTH = 5 # original image
+    HEIGHT = 6
+    CENTER_X = 7 # rect.center
+    CENTER_Y = 8
+    HITCH_OFFSET_X = 9 # local
+    HITCH_OFFSET_Y = 10
+    HITCH_X = 11 # global
+    HITCH_Y = 12
+
+class ToolColumn(IntEnum):
+    """`FleetState.tool_state` columns, the tractors tools physics (moved by the batch and written back, zeros for headers)"""
+
+    X = 0
+    Y = 1
+    ROTATION = 2
+    WIDTH = 3 # original image
+    HEIGHT = 4
+    RECT_WIDTH = 5
+    RECT_HEIGHT = 6
+    HITCH_OFFSET_X = 7 # local
+    HITCH_OFFSET_Y = 8
+    HITCH_X = 9 # global
+    HITCH_Y = 10
+    PARENT_CENTER_X = 11
+    PARENT_CENTER_Y = 12
+
+class ControlColumn(IntEnum):
+    """`FleetState.control_state` columns, what the machines logic (following the path, job stages) drives with. Only ever read from the machines"""
+
+    DESIRED_ROTATION = 0
+    CURR_SPEED = 1
+    HP_MULTIPLIER = 2
+    MAX_DISTANCE = 3
+    TARGET_X = 4 # next waypoint
+    TARGET_Y = 5
+    POP_RADIUS = 6
+
+class FleetState:
+    """
+    Struct of arrays for the physics of a whole fleet, one row per machine (and its tool).
+
+    Positions, rotations, velocities, speeds, desired headings and hitches are kept in NumPy arrays so steering,
+    movement and the tool hitch constraint run for every machine at once, each with its own substeps (the same maths,
+    in the same order, as `Tractor.update` / `Header.update`). The `Tractor`s and `Header`s stay the owners of their
+    state (saving, the UI and path following all use them), so `update` writes the rows back at the end of the frame
+    and around the per machine logic that can't be batched: following the path when a waypoint is reached and headers
+    painting every substep.
+
+    The state is kept between frames while the fleet stays the same (see `Shed.simulate_fleet`). `sync` only reloads the
+    control columns every frame, the physics of a machine is only reloaded if something else moved it since it was written back.
+    """
+
+    def __init__(self, machines: List[Tractor | Header]) -> None:
+        self.machines = machines
+
+        self.is_tractor = np.array([isinstance(machine, Tractor) for machine in machines], dtype=bool)
+
+        # Filled a row at a time (one NumPy call each) and used through the named columns below
+        self.machine_state = np.array([self.get_machine_row(i) for i in range(len(machines))], dtype=float).reshape(len(machines), len(MachineColumn))
+        self.tool_state = np.array([self.get_tool_row(i) for i in range(len(machines))], dtype=float).reshape(len(machines), len(ToolColumn))
+        self.control_state = np.zeros((len(machines), len(ControlColumn)))
+
+        # Machines
+        self.x = self.machine_state[:, MachineColumn.X]
+        self.y = self.machine_state[:, MachineColumn.Y]
+        self.rotation = self.machine_state[:, MachineColumn.ROTATION]
+        self.velocity = self.machine_state[:, MachineColumn.VELOCITY_X:MachineColumn.VELOCITY_Y + 1]
+        self.size = self.machine_state[:, MachineColumn.WIDTH:MachineColumn.HEIGHT + 1]
+        self.center = self.machine_state[:, MachineColumn.CENTER_X:MachineColumn.CENTER_Y + 1]
+        self.hitch_offset = self.machine_state[:, MachineColumn.HITCH_OFFSET_X:MachineColumn.HITCH_OFFSET_Y + 1]
+        self.hitch = self.machine_state[:, MachineColumn.HITCH_X:MachineColumn.HITCH_Y + 1]
+
+        # Tools
+        self.tool_x = self.tool_state[:, ToolColumn.X]
+        self.tool_y = self.tool_state[:, ToolColumn.Y]
+        self.tool_rotation = self.tool_state[:, ToolColumn.ROTATION]
+        self.tool_size = self.tool_state[:, ToolColumn.WIDTH:ToolColumn.HEIGHT + 1]
+        self.tool_rect_size = self.tool_state[:, ToolColumn.RECT_WIDTH:ToolColumn.RECT_HEIGHT + 1]
+        self.tool_hitch_offset = self.tool_state[:, ToolColumn.HITCH_OFFSET_X:ToolColumn.HITCH_OFFSET_Y + 1]
+        self.tool_hitch = self.tool_state[:, ToolColumn.HITCH_X:ToolColumn.HITCH_Y + 1]
+        self.tool_parent_center = self.tool_state[:, ToolColumn.PARENT_CENTER_X:ToolColumn.PARENT_CENTER_Y + 1]
+
+        # Control
+        self.desired_rotation = self.control_state[:, ControlColumn.DESIRED_ROTATION]
+        self.curr_speed = self.control_state[:, ControlColumn.CURR_SPEED]
+        self.hp_multiplier = self.control_state[:, ControlColumn.HP_MULTIPLIER]
+        self.max_distance = self.control_state[:, ControlColumn.MAX_DISTANCE]
+        self.target = self.control_state[:, ControlColumn.TARGET_X:ControlColumn.TARGET_Y + 1]
+        self.pop_radius = self.control_state[:, ControlColumn.POP_RADIUS]
+
+        self.moving = np.zeros(len(machines), dtype=bool)
+        self.paints = np.zeros(len(machines), dtype=bool)
+        self.has_target = np.zeros(len(machines), dtype=bool)
+        self.tool_waiting = np.zeros(len(machines), dtype=bool)
+
+        self.load_controls()
+
+        # What each machine was left at when its rows were last written back, `sync` reloads the physics of any that have moved since
+        self.poses: List[Tuple | None] = [None] * len(machines)
+
+    def is_moving(self, i: int) -> bool: return not (self.machines[i].waiting or self.machines[i].planning)
+
+    def is_painting(self, i: int) -> bool: return not self.is_tractor[i] and self.machines[i].working and not self.machines[i].finished
+
+    def get_machine_row(self, i: int) -> Tuple[float, ...]:
+        """In `MachineColumn` order"""
+
+        machine = self.machines[i]
+
+        return (
+            machine.x, machine.y, machine.rotation, *machine.velocity, *machine.original_image.get_size(),
+            *machine.rect.center, *machine.hitch.vector, *machine.hitch.position
+        )
+
+    def get_tool_row(self, i: int) -> Tuple[float, ...]:
+        """In `ToolColumn` order"""
+
+        if not self.is_tractor[i]: return (0.0,) * len(ToolColumn)
+
+        tool = self.machines[i].tool
+
+        return (
+            tool.x, tool.y, tool.rotation, *tool.original_image.get_size(), *tool.rect.size,
+            *tool.hitch.vector, *tool.hitch.position, *tool.hitch.parent_center
+        )
+
+    def get_control_row(self, i: int) -> Tuple[float, ...]:
+        """In `ControlColumn` order"""
+
+        machine = self.machines[i]
+
+        hp_multiplier = machine.get_hp_multiplier() if self.is_tractor[i] else 1.0
+        max_distance = PAINT_RECT_DIST if self.is_painting(i) else float('inf')
+
+        if len(machine.path) > 0:
+            return (machine.desired_rotation, machine.curr_speed, hp_multiplier, max_distance, *machine.path[0], machine.waypoint_radius)
+
+        return (machine.desired_rotation, machine.curr_speed, hp_multiplier, max_distance, 0.0, 0.0, 0.0)
+
+    def get_pose(self, i: int) -> Tuple:
+        machine = self.machines[i]
+        if not self.is_tractor[i]: return (machine.x, machine.y, machine.rotation)
+
+        tool = machine.tool
+        return (machine.x, machine.y, machine.rotation, tool, tool.x, tool.y, tool.rotation)
+
+    def load_machine(self, i: int) -> None:
+        self.machine_state[i] = self.get_machine_row(i)
+        self.control_state[i] = self.get_control_row(i)
+
+        self.moving[i] = self.is_moving(i)
+
+    def load_control(self, i: int) -> None:
+        self.control_state[i] = self.get_control_row(i)
+
+        self.moving[i] = self.is_moving(i)
+        self.paints[i] = self.is_painting(i)
+        self.has_target[i] = len(self.machines[i].path) > 0
+        self.tool_waiting[i] = self.is_tractor[i] and self.machines[i].tool.waiting_for_loading
+
+    def load_controls(self) -> None:
+        """`load_control` for every row at once"""
+
+        rows = range(len(self.machines))
+
+        self.control_state[:] = np.array([self.get_control_row(i) for i in rows], dtype=float).reshape(len(self.machines), len(ControlColumn))
+
+        self.moving[:] = [self.is_moving(i) for i in rows]
+        self.paints[:] = [self.is_painting(i) for i in rows]
+        self.has_target[:] = [len(machine.path) > 0 for machine in self.machines]
+        self.tool_waiting[:] = [self.is_tractor[i] and machine.tool.waiting_for_loading for i, machine in enumerate(self.machines)]
+
+    def load(self, i: int) -> None:
+        """Copies the machine (and its tool) into its rows"""
+
+        self.machine_state[i] = self.get_machine_row(i)
+        self.tool_state[i] = self.get_tool_row(i)
+
+        self.load_control(i)
+
+    def sync(self) -> None:
+        """Picks up what happened to the machines since `update` wrote them back (called at the start of every frame the state is kept for)"""
+
+        for i in range(len(self.machines)):
+            # Moved by something other than the batch (a new job, another tool hitched on...)
+            if self.get_pose(i) != self.poses[i]:
+                self.machine_state[i] = self.get_machine_row(i)
+                self.tool_state[i] = self.get_tool_row(i)
+
+        self.load_controls()
+
+    def store_machine(self, i: int, row: List[float]) -> None:
+        machine = self.machines[i]
+
+        rotation = row[MachineColumn.ROTATION]
+        center = (int(row[MachineColumn.CENTER_X]), int(row[MachineColumn.CENTER_Y]))
+
+        machine.x = row[MachineColumn.X]
+        machine.y = row[MachineColumn.Y]
+        machine.rotation = rotation
+        machine.velocity = [row[MachineColumn.VELOCITY_X], row[MachineColumn.VELOCITY_Y]]
+
+        machine.rect = pg.Rect((0, 0), get_rotated_size(machine.original_image.get_size(), rotation))
+        machine.rect.center = center
+
+        machine.hitch.parent_center = center
+        machine.hitch.update_position(row[MachineColumn.HITCH_X], row[MachineColumn.HITCH_Y])
+
+    def store_tool(self, i: int, row: List[float]) -> None:
+        tool = self.machines[i].tool
+
+        w, h = int(row[ToolColumn.RECT_WIDTH]), int(row[ToolColumn.RECT_HEIGHT])
+        parent_center = (int(row[ToolColumn.PARENT_CENTER_X]), int(row[ToolColumn.PARENT_CENTER_Y]))
+
+        tool.x = row[ToolColumn.X]
+        tool.y = row[ToolColumn.Y]
+        tool.rotation = row[ToolColumn.ROTATION]
+
+        tool.rect = pg.Rect(parent_center[0] - w // 2, parent_center[1] - h // 2, w, h)
+
+        tool.hitch.parent_center = parent_center
+        tool.hitch.update_position(row[ToolColumn.HITCH_X], row[ToolColumn.HITCH_Y])
+
+    def store(self, i: int, machine_row: List[float] | None = None, tool_row: List[float] | None = None) -> None:
+        """Writes the rows back to the machine (and its tool)"""
+
+        self.store_machine(i, self.machine_state[i].tolist() if machine_row is None else machine_row)
+        if self.is_tractor[i]: self.store_tool(i, self.tool_state[i].tolist() if tool_row is None else tool_row)
+
+        self.poses[i] = self.get_pose(i)
+
+    def get_hitch_errors(self, rows: "np.ndarray") -> "np.ndarray":
+        """`Trailer.get_hitch_error` for the rows tools"""
+
+        difference = self.hitch[rows] - self.tool_hitch[rows]
+        change = np.degrees(np.arctan2(difference[:, 1], difference[:, 0])) + 90 + self.tool_rotation[rows]
+        change = np.where(change > 270, change - 360, change)
+
+        return np.where(change < -90, 1000, np.where(change > 90, -1000, change))
+
+    def get_substeps(self, rows: "np.ndarray", remaining_dt: "np.ndarray") -> "np.ndarray":
+        """`Tractor.get_substep` / `Header.get_substep` for the rows"""
+
+        moving = self.moving[rows]
+        hp_multiplier = self.hp_multiplier[rows]
+
+        speed = np.where(moving, self.curr_speed[rows] * SPEEDSCALE * hp_multiplier, 0)
+
+        turn_amount = np.abs((self.desired_rotation[rows] - self.rotation[rows] + 180) % 360 - 180)
+        turn_gain = 10 * SPEEDSCALE * hp_multiplier
+
+        tool_gain = np.where(self.is_tractor[rows], speed * 0.12, 0)
+        tool_turn_rate = np.abs(self.get_hitch_errors(rows)) * tool_gain
+
+        turn_rates = np.stack((np.minimum(MAX_TURN_SPEED, turn_amount) * turn_gain, tool_turn_rate), axis=1)
+        gains = np.stack((np.where(turn_amount < MAX_TURN_SPEED, turn_gain, 0), tool_gain), axis=1)
+
+        # Parked machines only have the frame length to go on
+        turn_rates[~moving] = 0
+        gains[~moving] = 0
+
+        return get_substeps(remaining_dt, speed, turn_rates, gains, self.max_distance[rows])
+
+    def rotate_hitches(self, centers: "np.ndarray", offsets: "np.ndarray", angles: "np.ndarray") -> "np.ndarray":
+        """`rotate_point_centered(center, center + offset, angle)` for rows of centers (radians)"""
+
+        cos_angles, sin_angles = np.cos(angles), np.sin(angles)
+        offsets = (centers + offsets) - centers
+
+        return np.stack((
+            centers[:, 0] + cos_angles * offsets[:, 0] - sin_angles * offsets[:, 1],
+            centers[:, 1] + sin_angles * offsets[:, 0] + cos_angles * offsets[:, 1]
+        ), axis=1)
+
+    def simulate(self, rows: "np.ndarray", steps: "np.ndarray") -> None:
+        """One substep for the rows: `calculate_movement`, `Vehicle.simulate` and then `Trailer.simulate(step * 2)` for tractors"""
+
+        moving = self.moving[rows]
+        hp_multiplier = self.hp_multiplier[rows]
+
+        # Steering
+        rotation = self.rotation[rows]
+        turn_amount = (self.desired_rotation[rows] - rotation + 180) % 360 - 180
+
+        rotation = np.where(moving, (rotation + np.clip(turn_amount, -MAX_TURN_SPEED, MAX_TURN_SPEED) * steps * 10 * SPEEDSCALE * hp_multiplier) % 360, rotation)
+        self.rotation[rows] = rotation
+
+        direction = np.radians(-rotation - 90)
+        velocity = np.stack((np.cos(direction), np.sin(direction)), axis=1) * self.curr_speed[rows, None] * SPEEDSCALE * hp_multiplier[:, None]
+        velocity[~moving] = 0
+
+        # Movement
+        self.x[rows] += velocity[:, 0] * steps
+        self.y[rows] += velocity[:, 1] * steps
+
+        velocity *= (0.9 / steps)[:, None]
+        self.velocity[rows] = velocity
+
+        centers = np.stack((np.trunc(self.x[rows]), np.trunc(self.y[rows])), axis=1) + self.size[rows] // 2
+        self.center[rows] = centers
+
+        self.hitch[rows] = self.rotate_hitches(centers, self.hitch_offset[rows], np.radians(-rotation))
+
+        # Tool hitch constraint
+        tool_rows = rows[self.is_tractor[rows]]
+        if len(tool_rows) == 0: return
+
+        tool_steps = steps[self.is_tractor[rows]] * 2
+        vehicle_speed = np.sqrt(self.velocity[tool_rows, 0] ** 2 + self.velocity[tool_rows, 1] ** 2)
+
+        self.tool_rotation[tool_rows] %= 360
+        change = self.get_hitch_errors(tool_rows) / (30 / tool_steps ** 2)
+
+        tool_rotation = self.tool_rotation[tool_rows] - change * vehicle_speed
+        self.tool_rotation[tool_rows] = tool_rotation
+
+        tool_centers = np.stack((np.trunc(self.tool_x[tool_rows]), np.trunc(self.tool_y[tool_rows])), axis=1) + self.tool_rect_size[tool_rows] // 2
+        tool_hitch = self.rotate_hitches(tool_centers, self.tool_hitch_offset[tool_rows], -np.radians(tool_rotation))
+
+        # Snap to the vehicles hitch
+        direction = np.radians(-self.rotation[tool_rows] - 90)
+        self.tool_x[tool_rows] += np.round(self.hitch[tool_rows, 0] - tool_hitch[:, 0] - np.cos(direction) * 5, 0)
+        self.tool_y[tool_rows] += np.round(self.hitch[tool_rows, 1] - tool_hitch[:, 1] - np.sin(direction) * 5, 0)
+
+        rotated_widths, rotated_heights = get_rotated_sizes(self.tool_size[tool_rows, 0], self.tool_size[tool_rows, 1], tool_rotation)
+        self.tool_rect_size[tool_rows] = np.stack((rotated_widths, rotated_heights), axis=1)
+
+        self.tool_hitch[tool_rows] = tool_hitch + (tool_centers - self.tool_parent_center[tool_rows])
+        self.tool_parent_center[tool_rows] = tool_centers
+
+    def update(self, dt: float) -> List[Tractor | Header]:
+        """
+        Runs every machines substeps for the frame and writes them back
+        returns -> the machines still active (tractors that finished their job mid frame are packed away)
+        """
+
+        remaining_dt = np.full(len(self.machines), dt)
+        packed_away = np.zeros(len(self.machines), dtype=bool)
+
+        while 1:
+            rows = np.flatnonzero(remaining_dt > 0)
+            if len(rows) == 0: break
+
+            steps = self.get_substeps(rows, remaining_dt[rows])
+
+            # Headers paint (and can fill up) before every substep
+            for i in rows[self.paints[rows]]:
+                self.store_machine(i, self.machine_state[i].tolist())
+                self.machines[i].check_paint()
+                self.load_machine(i)
+
+            self.simulate(rows, steps)
+            remaining_dt[rows] -= steps
+
+            # Tools only ask for fill at the end of a frame (`Tool.update`), which the tractor picks up after its first substep
+            for i in rows[self.tool_waiting[rows]]:
+                self.machines[i].check_tool_waiting()
+                self.moving[i] = not (self.machines[i].waiting or self.machines[i].planning)
+                self.tool_waiting[i] = False
+
+            # Move onto the next point part way through the frame (like a shorter frame would) instead of driving past it
+            waypoint_rows = rows[self.has_target[rows] & (remaining_dt[rows] > 0)]
+            if len(waypoint_rows) == 0: continue
+
+            distances = np.sqrt((self.target[waypoint_rows, 0] - self.center[waypoint_rows, 0]) ** 2 + (self.target[waypoint_rows, 1] - self.center[waypoint_rows, 1]) ** 2)
+
+            for i in waypoint_rows[distances < self.pop_radius[waypoint_rows]]:
+                machine = self.machines[i]
+                self.store(i)
+
+                if machine.follow_path():
+                    machine.pack_away_vehicle(machine)
+                    packed_away[i] = True
+                    remaining_dt[i] = 0
+                    continue
+
+                self.load(i)
+
+        active_machines = []
+
+        for i, (machine_row, tool_row) in enumerate(zip(self.machine_state.tolist(), self.tool_state.tolist())):
+            if packed_away[i]: continue
+
+            self.store(i, machine_row, tool_row)
+            active_machines.append(self.machines[i])
+
+        return active_machines
@@ -0,0 +1,154 @@
+import os
+import sys
+import json
+import logging
+import threading
+
+from data import *
+
+from time import perf_counter, sleep, strftime
+from traceback import format_stack
+from collections import deque
+from typing import Dict, List
+
+class FlightRecorder:
+    """
+    Rolling window of the last `FLIGHT_RECORDER_FRAMES` frames, so a hitch (or crash) can be explained after the fact.
+
+    Every frame keeps its time, the stage timings from the `FrameProfiler` and the events recorded during it
+    (job creations, saves, menu rebuilds, day advances...). When a frame goes over `HITCH_BUDGET_MS` the window is
+    dumped to a JSON file in `dump_path`, only the newest `max_dumps` are kept. With `HITCH_SAMPLE_STACK` a watchdog
+    thread also grabs the main threads stack while the frame is still stuck over budget, so the dump shows what it was actually doing.
+    """
+
+    def __new__(cls) -> None:
+        if not hasattr(cls, 'instance'):
+            cls.instance = super(FlightRecorder, cls).__new__(cls)
+            cls.instance.init()
+
+        return cls.instance
+
+    def init(self, dump_path: str = "hitches", frame_count: int = FLIGHT_RECORDER_FRAMES, budget_ms: float = HITCH_BUDGET_MS, sample_stack: bool = HITCH_SAMPLE_STACK, enabled: bool = FLIGHT_RECORDER, max_dumps: int = HITCH_MAX_DUMPS) -> None:
+        self.enabled = enabled
+        self.dump_path = dump_path
+        self.max_dumps = max_dumps
+        self.budget_ms = budget_ms
+        self.sample_stack = sample_stack
+
+        self.frames: deque = deque(maxlen=frame_count)
+        self.frame_count = 0
+
+        self.frame_start: float | None = None
+        self.current_events: List[Dict[str, any]] = []
+
+        self.sampled_stack: str | None = None
+        self.main_thread_id = threading.main_thread().ident
+        self.watchdog: threading.Thread | None = None
+
+        self.last_dump_time = float('-inf')
+
+    def record_event(self, event_type: str, detail: str = "") -> None:
+        if not self.enabled: return
+
+        event = {"type": event_type, "detail": detail}
+        if self.frame_start is not None: event["at_ms"] = round((perf_counter() - self.frame_start) * 1000, 3)
+
+        self.current_events.append(event)
+
+    def begin_frame(self) -> None:
+        if not self.enabled: return
+
+        if self.sample_stack and self.watchdog is None: self.start_watchdog()
+
+        self.sampled_stack = None
+        self.frame_start = perf_counter()
+
+    def end_frame(self, frame_ms: float, stages: Dict[str, float]) -> None:
+        """frame_ms: float (the whole frame, including anything outside the profiled stages)"""
+
+        if not self.enabled: return
+
+        self.frames.append({
+            "frame": self.frame_count,
+            "frame_ms": round(frame_ms, 3),
+            "stages": {name: round(stage_ms, 3) for name, stage_ms in stages.items()},
+            "events": self.current_events
+        })
+
+        self.frame_count += 1
+        self.current_events = []
+
+        if frame_ms > self.budget_ms and perf_counter() - self.last_dump_time >= HITCH_DUMP_COOLDOWN:
+            self.dump("hitch")
+
+    def start_watchdog(self) -> None:
+        self.watchdog = threading.Thread(target=self.watch, name="hitch watchdog", daemon=True)
+
+        try:
+            self.watchdog.start()
+        except RuntimeError as e:
+            # No threads on the web build
+            logging.warning(f"Could not start the hitch watchdog! Hitches will be recorded without a stack. Error: {e}")
+            self.sample_stack = False
+
+    def watch(self) -> None:
+        while 1:
+            sleep(self.budget_ms / 2000)
+
+            frame_start = self.frame_start
+            if frame_start is None or self.sampled_stack is not None: continue
+
+            if (perf_counter() - frame_start) * 1000 > self.budget_ms:
+                frame = sys._current_frames().get(self.main_thread_id)
+                if frame is not None: self.sampled_stack = "".join(format_stack(frame))
+
+    def dump(self, reason: str, exception: str | None = None) -> str | None:
+        """
+        Writes the recorded frames (and the events of the unfinished frame) to a new file in `dump_path`
+        returns -> the file path or None if it could not be written
+        """
+
+        if not self.enabled: return None
+
+        self.last_dump_time = perf_counter()
+        file_path = os.path.join(self.dump_path, f"{reason}_{strftime('%Y%m%d_%H%M%S')}_{self.frame_count}.json")
+
+        logging.warning(f"Dumping the last {len(self.frames)} frames ({reason}) to: \"{file_path}\"...")
+
+        report = {
+            "reason": reason,
+            "game_version": GAME_VERSION,
+            "platform": PLATFORM,
+            "budget_ms": self.budget_ms,
+            "stack": self.sampled_stack,
+            "exception": exception,
+            "current_events": self.current_events,
+            "frames": list(self.frames)
+        }
+
+        try:
+            os.makedirs(self.dump_path, exist_ok=True)
+
+            with open(file_path, "w") as f:
+                json.dump(report, f, indent=4)
+
+        except (OSError, TypeError, ValueError) as e:
+            logging.error(f"Could not write flight recorder dump: \"{file_path}\"! Error: {e}")
+            return None
+
+        self.remove_old_dumps()
+
+        return file_path
+
+    def remove_old_dumps(self) -> None:
+        """Deletes all but the newest `max_dumps` dumps"""
+
+        try:
+            dumps = [os.path.join(self.dump_path, file_name) for file_name in os.listdir(self.dump_path) if file_name.endswith(".json")]
+            dumps.sort(key=os.path.getmtime)
+
+            for file_path in dumps[:max(0, len(dumps) - self.max_dumps)]:
+                os.remove(file_path)
+
+        except OSError as e:
+            logging.error(f"Could not remove old flight recorder dumps in: \"{self.dump_path}\"! Error: {e}")
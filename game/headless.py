@@ -0,0 +1,145 @@
+import os
+import data
+
+# No window (the dummy driver still gives pygame a display surface to draw into), and the web build reads pre-shrunk boundaries from a file so use the real path generation instead
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+data.IS_WEB_BUILD = False
+
+import pygame as pg
+import json
+import shutil
+import logging
+import argparse
+
+from time import perf_counter
+from typing import Any, Dict
+
+pg.init()
+
+screen = pg.display.set_mode((1920, 1080))
+
+from save_manager import SaveManager
+from flight_recorder import FlightRecorder
+from performance_monitor import FrameProfiler
+from events import Events
+from farm_ceo import FarmCEO
+from data import *
+
+def prepare_save(save_path: str | None, output_path: str) -> None:
+    """Copies the save (and its paint) to `output_path` and points the `SaveManager` at it, so the original save is never touched"""
+
+    paint_path = f"{os.path.splitext(output_path)[0]}_paint.json"
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    if save_path is not None:
+        shutil.copyfile(save_path, output_path)
+
+        source_paint_path = os.path.join(os.path.dirname(save_path), os.path.basename(SaveManager.PAINT_SAVE_PATH))
+        if os.path.exists(source_paint_path): shutil.copyfile(source_paint_path, paint_path)
+
+    elif os.path.exists(output_path):
+        # Start from a new save, not whatever the last run left behind
+        os.remove(output_path)
+
+    SaveManager.SAVE_PATH = output_path
+    SaveManager.PAINT_SAVE_PATH = paint_path
+
+def run(days: float, timestep: float, sleep_each_day: bool, time_warp: bool = False) -> Dict[str, Any]:
+    """
+    Runs `FarmCEO.simulate` (and with it `Shed.simulate`) with a fixed timestep and no rendering until `days` in game days
+    have passed, as fast as it can. With `time_warp` field work is skipped through analytically (best with a long timestep).
+    """
+
+    start = perf_counter()
+    farm_ceo = FarmCEO(screen, pg.time.Clock(), Events())
+    boot_time = perf_counter() - start
+
+    profiler = FrameProfiler()
+    profiler.init(history=PROFILER_HISTORY, enabled=True)
+
+    # Ticks are frames as far as the flight recorder is concerned, so a tick over budget is dumped as a hitch
+    flight_recorder = FlightRecorder()
+
+    start_time = farm_ceo.time
+    end_time = start_time + days * MINS_IN_DAY
+    start_money = farm_ceo.save_manager.money
+
+    day = int(start_time // MINS_IN_DAY)
+    ticks = 0
+    max_active_vehicles = 0
+    slowest_tick = 0.0
+
+    logging.info(f"Fast-forwarding {days} days ({timestep}s timestep{', time warped' if time_warp else ''})...")
+
+    start = perf_counter()
+
+    while farm_ceo.time < end_time:
+        tick_start = perf_counter()
+        flight_recorder.begin_frame()
+
+        with profiler.stage("simulate"):
+            farm_ceo.simulate(timestep, time_warp)
+
+        profiler.end_frame()
+
+        tick_time = perf_counter() - tick_start
+        flight_recorder.end_frame(tick_time * 1e3, profiler.last_frame)
+
+        slowest_tick = max(slowest_tick, tick_time)
+        max_active_vehicles = max(max_active_vehicles, sum(vehicle.active for vehicle in farm_ceo.shed.vehicles))
+        ticks += 1
+
+        if int(farm_ceo.time // MINS_IN_DAY) != day:
+            day = int(farm_ceo.time // MINS_IN_DAY)
+            if sleep_each_day: farm_ceo.sleep()
+
+    run_time = perf_counter() - start
+
+    farm_ceo.save_manager.save_game()
+
+    return {
+        "game_version": GAME_VERSION,
+        "save": SaveManager.SAVE_PATH,
+        "days": days,
+        "timestep": timestep,
+        "time_warp": time_warp,
+        "boot_time_s": round(boot_time, 3),
+        "run_time_s": round(run_time, 3),
+        "ticks": ticks,
+        "ticks_per_second": round(ticks / run_time, 1) if run_time > 0 else None,
+        "simulated_seconds_per_second": round(ticks * timestep / run_time, 1) if run_time > 0 else None,
+        "slowest_tick_ms": round(slowest_tick * 1e3, 3),
+        "max_active_vehicles": max_active_vehicles,
+        "start_time": start_time,
+        "end_time": farm_ceo.time,
+        "money_change": farm_ceo.save_manager.money - start_money,
+        "stages": {name: profiler.get_stats(name) for name in profiler.frames}
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=f"Headless {GAME_NAME} simulation, for soak testing saves and measuring simulation throughput")
+    parser.add_argument("-s", "--save", help="Savegame to start from (a new save if not given). It is copied, not modified")
+    parser.add_argument("-o", "--output", default="headless_savegame.json", help="Where to write the resulting save (its paint is written next to it)")
+    parser.add_argument("-m", "--metrics", help="JSON file to write the metrics to (printed if not given)")
+    parser.add_argument("-d", "--days", type=float, default=1, help="In game days to simulate")
+    parser.add_argument("-t", "--timestep", type=float, default=1/60, help="Simulated seconds per tick")
+    parser.add_argument("--sleep-each-day", action="store_true", help="Sleep at the end of every day so crops keep growing")
+    parser.add_argument("--time-warp", action="store_true", help=f"Skip through field work analytically instead of driving it (use a long timestep, like {TIME_WARP_STEP})")
+    args = parser.parse_args()
+
+    if args.timestep <= 0: parser.error("timestep must be greater than 0")
+
+    logging.basicConfig(level=logging.INFO)
+
+    prepare_save(args.save, args.output)
+    FlightRecorder().init(os.path.join(os.path.dirname(os.path.abspath(args.output)), "hitches"))
+
+    metrics = run(args.days, args.timestep, args.sleep_each_day, args.time_warp)
+
+    if args.metrics is None:
+        print(json.dumps(metrics, indent=4))
+    else:
+        with open(args.metrics, "w") as f:
+            json.dump(metrics, f, indent=4)
+
+        print(f"Metrics written to: {args.metrics}")
@@ -3,15 +3,18 @@ import logging
 
 from resource_manager import ResourceManager
 from vehicle_trailer_simulation import Vehicle, Trailer, Hitch
+from machine_kinematics import get_substep, warp_field_work
+from vehicle_path import Path
+from sprite_cache import StrokeMaskCache
 from destination import Destination
 from sellpoints import SellPoint
 from utils import utils
 from data import *
 
 from time import time
+from concurrent.futures import Future
 from math import atan2, sqrt, cos, sin, radians, degrees
-from copy import deepcopy
-from typing import Dict, List, Sequence
+from typing import Dict, List, Sequence, Tuple
 from typing_extensions import Self
 
 class Tractor(Vehicle):
@@ -51,7 +54,7 @@ class Tractor(Vehicle):
         self.string_task = attrs.get("stringTask", "No task assigned")
         self.paddock: int = attrs.get("paddockNum", -1)
 
-        self.path: List[Sequence[float]] = attrs.get("path", [])
+        self.path = Path.from_dict(attrs.get("path"))
         self.get_silo = get_silo
         self.add_xp = add_xp
         self.pack_away_vehicle = pack_away_vehicle
@@ -78,6 +81,11 @@ class Tractor(Vehicle):
         self.loading = False
         self.deliver_on_load_complete = False
 
+        self.planning = False
+        self.path_future: Future | None = None
+        self.planned_stage = -1
+        self.planned_paddock = -1
+
         self.last_unload = time()
         self.last_load = time()
 
@@ -114,6 +122,9 @@ class Tractor(Vehicle):
         self.loading = False
         self.deliver_on_load_complete = False
 
+        self.planning = False
+        self.path_future = None
+
         self.job = None
 
     @property
@@ -218,11 +229,15 @@ class Tractor(Vehicle):
             self.loading_vehicle.set_waiting(False)
             self.loading_vehicle.tool.set_animation('full')
             self.loading_vehicle.tool.reload_vt_sim()
-            self.loading_vehicle.path = self.job.trace_collision_boundary(tuple(self.position), self.destination.destination.gate, self.job.lap_1)
+            self.loading_vehicle.path = Path(self.job.trace_collision_boundary(tuple(self.position), self.destination.destination.gate, self.job.lap_1))
 
     def follow_path(self) -> bool:
         """Returns True if the vehicle has finished it's task"""
 
+        if self.planning:
+            if not self.path_future.done(): return False
+            self.finish_planning()
+
         if self.waiting_for_loading_vehicle_assign: return False
 
         if self.waiting_for_loading_vehicle:
@@ -233,7 +248,11 @@ class Tractor(Vehicle):
         if self.loading:
             self.load_tool()
 
-        if len(self.path) == 0:
+        # Every point already reached is skipped in one go (fast vehicles can reach a few in a frame), and when the path runs out the job moves through its stages until there's a new one
+        while True:
+            self.path.skip_reached(self.rect.centerx, self.rect.centery, self.waypoint_radius)
+            if len(self.path) > 0: break
+
             if self.tool.tool_type == "Trailers" and self.destination.is_paddock:
                 if self.has_waited:
                     if self.going_to_gate:
@@ -275,80 +294,110 @@ class Tractor(Vehicle):
                 self.unload_tool()
                 return False
 
-            self.stage += 1
+            if self.next_stage(): return True
+
+            # The next stages path is still being planned (or it didn't get one)
+            if self.planning or len(self.path) == 0: return False
+
+        px, py = self.path[0]
+        self.desired_rotation = (degrees(atan2(-(py - self.rect.centery), px - self.rect.centerx)) + 360) % 360 - 90
+
+        return False
+
+    def next_stage(self) -> bool:
+        """Moves the job onto its next stage once the path has run out (started by `STAGE_STARTS`). Returns True if the job is finished"""
+
+        self.stage += 1
+
+        if self.stage - 1 in END_JOB_STAGES:
+            self.active = False
+            self.tool.active = False
+            self.paddock = -1
+            self.set_string_task("No task assigned")
+
+            logging.debug(f"Vehicle: {self.vehicle_id} has completed their task.")
+            return True
+
+        logging.debug(f"Vehicle: {self.vehicle_id} moving on to next path stage ({self.stage})...")
+        self.STAGE_STARTS[self.stage](self)
+
+        return False
+
+    def start_transporting(self) -> None:
+        self.curr_speed = 40
+        self.task_tractor(self, self.tool, self.destination, self.stage)
+
+    def start_travelling_to(self) -> None:
+        self.curr_speed = 40
+        self.set_string_task(f"Traveling to {self.destination.get_name()}...")
+
+        self.task_tractor(self, self.tool, self.destination, self.stage)
+
+    def start_working(self) -> None:
+        self.set_string_task(f"{TOOL_ACTIVE_NAMES[self.tool.tool_type]}...".capitalize())
+        self.tool.set_working_animation()
+
+        self.curr_speed = 20
+        self.task_tractor(self, self.tool, self.destination, self.stage)
+
+    def start_travelling_from(self) -> None:
+        self.curr_speed = 40
+        self.finish_paddock()
 
-            if self.stage - 1 in END_JOB_STAGES:
-                self.active = False
-                self.tool.active = False
-                self.paddock = -1
-                self.set_string_task("No task assigned")
+        # Go to shed
+        self.set_string_task("Traveling to shed...")
+        self.task_tractor(self, self.tool, Destination(None), self.stage)
 
-                logging.debug(f"Vehicle: {self.vehicle_id} has completed their task.")
-                return True
+    def finish_paddock(self) -> None:
+        """Was just working, sort out paddock now"""
+
+        self.tool.set_animation("") # will go to default
+        self.tool.reload_vt_sim()
+
+        self.destination.destination.reset_paint()
+        if FILL_TYPES[self.tool.fill_type] in FERTILISERS or FILL_TYPES[self.tool.fill_type] in CHEMICALS:
+            if FILL_TYPES[self.tool.fill_type] == "lime":
+                self.destination.destination.reset_lime_years()
+            elif "super" in FILL_TYPES[self.tool.fill_type]:
+                self.destination.destination.super_spreaded = True
+            elif "urea" in FILL_TYPES[self.tool.fill_type]:
+                self.destination.destination.urea_spreaded = True
+            elif FILL_TYPES[self.tool.fill_type] == "herbicide":
+                self.destination.destination.weeds = 0
             else:
-                logging.debug(f"Vehicle: {self.vehicle_id} moving on to next path stage ({self.stage})...")
+                logging.error("Unexpected race condition occurred when setting paddock fertiliser states: fill_type not found in FERTILISERS!")
 
-                if self.working:
-                    self.set_string_task(f"{TOOL_ACTIVE_NAMES[self.tool.tool_type]}...".capitalize())
-                    self.tool.set_working_animation()
+        if self.tool.tool_type == "Seeders":
+            self.destination.destination.set_crop_type(self.tool.fill_type)
+            self.destination.destination.lime_years -= 1
+            self.destination.destination.weeds = 2
 
-                    self.curr_speed = 20
-                else:
-                    self.curr_speed = 40
-
-                    if self.stage - 1 == JOB_TYPES["working"]:
-                        # was just working, sort out paddock now
-                        self.tool.set_animation("") # will go to default
-                        self.tool.reload_vt_sim()
-
-                        self.destination.destination.reset_paint()
-                        if FILL_TYPES[self.tool.fill_type] in FERTILISERS or FILL_TYPES[self.tool.fill_type] in CHEMICALS:
-                            if FILL_TYPES[self.tool.fill_type] == "lime":
-                                self.destination.destination.reset_lime_years()
-                            elif "super" in FILL_TYPES[self.tool.fill_type]:
-                                self.destination.destination.super_spreaded = True
-                            elif "urea" in FILL_TYPES[self.tool.fill_type]:
-                                self.destination.destination.urea_spreaded = True
-                            elif FILL_TYPES[self.tool.fill_type] == "herbicide":
-                                self.destination.destination.weeds = 0
-                            else:
-                                logging.error("Unexpected race condition occurred when setting paddock fertiliser states: fill_type not found in FERTILISERS!")
-
-                        if self.tool.tool_type == "Seeders":
-                            self.destination.destination.set_crop_type(self.tool.fill_type)
-                            self.destination.destination.lime_years -= 1
-                            self.destination.destination.weeds = 2
-
-                        self.destination.destination.set_state(self.tool.get_output_state(), False)
-                        self.add_xp(1)
-
-                if self.stage == JOB_TYPES["travelling_from"]:
-                    # Go to shed
-                    self.set_string_task("Traveling to shed...")
-
-                    self.task_tractor(self, self.tool, Destination(None), self.stage)
-                else:
-                    # TODO: Call update_machine_info with the correct information
-                    if self.stage == JOB_TYPES["travelling_to"]:
-                        self.set_string_task(f"Traveling to {self.destination.get_name()}...")
+        self.destination.destination.set_state(self.tool.get_output_state(), False)
+        self.add_xp(1)
 
-                    self.task_tractor(self, self.tool, self.destination, self.stage)
+    # What a vehicle does when it starts each stage of a job
+    STAGE_STARTS = {
+        JOB_TYPES["transporting_to"]: start_transporting,
+        JOB_TYPES["transporting_from"]: start_transporting,
+        JOB_TYPES["travelling_to"]: start_travelling_to,
+        JOB_TYPES["working"]: start_working,
+        JOB_TYPES["travelling_from"]: start_travelling_from
+    }
 
-        px, py = self.path[0]
+    @property
+    def waypoint_radius(self) -> float:
+        # Travelling vehicles move onto the next point from further away
+        return self.PATH_POP_RADIUS * (2 if self.curr_speed == 40 else 1)
 
-        multiplier = 1
+    def reached_waypoint(self) -> bool:
+        """Is the vehicle close enough to the next point on its path to move onto the one after it"""
 
-        # If the vehicle is travelling
-        if self.curr_speed == 40:
-            multiplier = 2
+        if len(self.path) == 0: return False
 
-        dist = sqrt((px - self.rect.centerx) ** 2 + (py - self.rect.centery) ** 2)
-        if dist < self.PATH_POP_RADIUS * multiplier:
-            self.path.pop(0)
-            return self.follow_path()
+        px, py = self.path[0]
+
+        return sqrt((px - self.rect.centerx) ** 2 + (py - self.rect.centery) ** 2) < self.waypoint_radius
 
-        self.desired_rotation = (degrees(atan2(-(py - self.rect.centery), px - self.rect.centerx)) + 360) % 360 - 90
-        
     def set_path(self, job, new_path: List[Sequence[float]], stage: int, paddock: int = -1) -> None:
         if stage == -1:
             # Default to traveling -> working -> etc...
@@ -358,23 +407,42 @@ class Tractor(Vehicle):
 
         logging.info(f"Setting new path for vehicle: {self.vehicle_id}...")
         self.set_job(job)
-        self.path = new_path
+        self.path = Path(new_path)
 
-        # Required for trailers because the tool.path is just a copy of the original path
+        # Required for trailers because the tool.path is the original path
         # The way back for trailers is just the opposite of the original path
-        self.tool.path = deepcopy(new_path)
+        self.tool.path = self.path.view()
 
         self.active = True
         self.tool.active = True
         self.stage = stage
         self.paddock = paddock
         self.waiting = False
-    
-    def calculate_movement(self, dt: float) -> float:
-        if self.waiting:
-            self.velocity = [0, 0]
-            return 0
 
+    def set_planning(self, job, path_future: Future, stage: int, paddock: int = -1) -> None:
+        """Parks the vehicle until the `WorkerPool` has planned the jobs path, `follow_path` polls it and sets the path once it's done"""
+
+        logging.info(f"Waiting for path to be planned for vehicle: {self.vehicle_id}...")
+        self.set_job(job)
+        self.path = Path()
+        self.tool.path = self.path.view()
+
+        self.path_future = path_future
+        self.planned_stage = stage
+        self.planned_paddock = paddock
+        self.planning = True
+
+        self.active = True
+        self.tool.active = True
+
+    def finish_planning(self) -> None:
+        """Sets the planned path, blocks if it is still being planned"""
+
+        self.planning = False
+        self.set_path(self.job, self.job.collect_path(self.path_future), self.planned_stage, self.planned_paddock)
+        self.path_future = None
+    
+    def get_hp_multiplier(self) -> float:
         hp_multiplier = 1.0
 
         if self.tool is not None:
@@ -385,6 +453,34 @@ class Tractor(Vehicle):
                 else:
                     hp_multiplier = self.hp_struggle
 
+        return hp_multiplier
+
+    def get_substep(self, remaining_dt: float) -> float:
+        if self.waiting or self.planning: return get_substep(remaining_dt, 0, ())
+
+        hp_multiplier = self.get_hp_multiplier()
+        speed = self.curr_speed * SPEEDSCALE * hp_multiplier
+
+        # `calculate_movement` turns by the heading error (up to MAX_TURN_SPEED) * turn_gain degrees per second
+        turn_amount = abs(utils.angle_difference(self.rotation, self.desired_rotation))
+        turn_gain = 10 * SPEEDSCALE * hp_multiplier
+
+        # `Tool.simulate(dt * 2)` swings the tool by its hitch error * (2 * dt) ** 2 / 30 * the vehicles speed after `Vehicle.move` (speed * 0.9 / dt),
+        # so by hitch error * speed * 0.12 degrees per second
+        tool_gain = speed * 0.12
+
+        return get_substep(remaining_dt, speed, (
+            (min(MAX_TURN_SPEED, turn_amount) * turn_gain, turn_gain if turn_amount < MAX_TURN_SPEED else 0),
+            (abs(self.tool.get_hitch_error()) * tool_gain, tool_gain)
+        ))
+
+    def calculate_movement(self, dt: float) -> float:
+        if self.waiting or self.planning:
+            self.velocity = [0, 0]
+            return 0
+
+        hp_multiplier = self.get_hp_multiplier()
+
         turn_amount = utils.angle_difference(self.rotation, self.desired_rotation)
 
         self.rotation += max(-MAX_TURN_SPEED, min(MAX_TURN_SPEED, turn_amount)) * dt * 10 * SPEEDSCALE * hp_multiplier
@@ -397,13 +493,53 @@ class Tractor(Vehicle):
 
         return sqrt(self.velocity[0]**2 + self.velocity[1]**2)
 
-    def update(self, dt: float) -> None:
-        if not self.active: return
+    @property
+    def can_time_warp(self) -> bool:
+        """Only plain field work (not waiting, loading or planning) can be time warped"""
+
+        if not self.working or len(self.path) == 0 or self.tool.tool_type not in PAINT_TOOLS: return False
+        return not (self.waiting or self.planning or self.loading or self.waiting_for_loading_vehicle or self.waiting_for_loading_vehicle_assign or self.tool.waiting_for_loading)
+
+    def time_warp(self, dt: float) -> float:
+        """
+        Skips up to `dt` seconds of field work in one go with `warp_field_work`, the tools fill is taken for the whole swath at once (`EQUIPMENT_RATES`)
+        returns -> the seconds skipped (less than `dt` if the path ended or the tool ran out, 0 if it can't be time warped)
+        """
+
+        if not self.can_time_warp: return 0.0
+
+        hp_multiplier = self.get_hp_multiplier()
+        speed = self.curr_speed * SPEEDSCALE * hp_multiplier
+        if speed <= 0: return 0.0
+
+        capacity = max(0.0, self.tool.fill) * EQUIPMENT_RATES[self.tool.tool_type] if self.tool.has_fill else None
+        moved, area, _, ran_out = warp_field_work(self, speed * dt, speed, 10 * SPEEDSCALE * hp_multiplier, self.destination.destination, self.tool.get_paint_color(), capacity,
+                                                  self.tool.stroke_masks, self.tool.master_image, self.tool)
+
+        if ran_out and not self.tool.waiting_for_loading:
+            # Stopping where it's worked out to run out can leave a tiny bit in the tool, it still needs filling
+            self.tool.request_fill()
+
+        if moved == 0: return 0.0
+
+        self.tool.place_behind_vehicle()
+        if self.tool.has_fill: self.tool.decrement_fill(area)
+
+        return moved / speed
+
+    def check_tool_waiting(self) -> None:
+        if self.tool.waiting_for_loading:
+            self.waiting_for_loading_vehicle_assign = True
+            self.waiting = True
+            self.tool.waiting_for_loading = False
+
+    def begin_update(self) -> bool:
+        """Follows the path before the frames substeps. Returns False if the job finished (the vehicle has been packed away)"""
 
         finished_job = self.follow_path()
         if finished_job:
             self.pack_away_vehicle(self)
-            return
+            return False
 
         if len(self.path) > 0 and DEBUG_PATHS:
             for point in self.path:
@@ -411,25 +547,41 @@ class Tractor(Vehicle):
 
             pg.draw.line(self.surface, (0, 0, 255), self.path[0], self.rect.center)
 
-        required_dt = 1/TARGET_FPS
-        remaining_dt = dt
-        while remaining_dt > 0:
-            if remaining_dt < required_dt: remaining_dt = required_dt
-
-            self.calculate_movement(required_dt)
-            self.simulate(required_dt)
-            self.tool.simulate(required_dt * 2)
+        return True
 
-            if self.tool.waiting_for_loading:
-                self.waiting_for_loading_vehicle_assign = True
-                self.waiting = True
-                self.tool.waiting_for_loading = False
+    def substep(self, step: float) -> None:
+        self.calculate_movement(step)
+        self.simulate(step)
+        self.tool.simulate(step * 2)
 
-            remaining_dt -= required_dt
+        self.check_tool_waiting()
 
+    def end_update(self) -> None:
         self.tool.update()
         self.draw()
 
+    def update(self, dt: float) -> None:
+        """Scalar update, `FleetState` does the same for whole fleets at once"""
+
+        if not self.active: return
+        if not self.begin_update(): return
+
+        # Substeps are as long as `get_substep` allows, so the work per frame depends on how much the machine is turning, not on the FPS
+        remaining_dt = dt
+        while remaining_dt > 0:
+            step = self.get_substep(remaining_dt)
+            self.substep(step)
+
+            remaining_dt -= step
+
+            # Move onto the next point part way through the frame (like a shorter frame would) instead of driving past it
+            if remaining_dt > 0 and self.reached_waypoint():
+                if self.follow_path():
+                    self.pack_away_vehicle(self)
+                    return
+
+        self.end_update()
+
 class Header(Vehicle):
     IS_VEHICLE: bool = True
     PATH_POP_RADIUS: bool = 15
@@ -465,7 +617,7 @@ class Header(Vehicle):
 
         self.string_task = attrs.get("stringTask", "No task assigned")
         self.paddock: int = attrs.get("paddockNum", -1)
-        self.path: List[Sequence[float, float]] = attrs.get("path", [])
+        self.path = Path.from_dict(attrs.get("path"))
 
         self.active = attrs.get("active", False)
         self.stage = attrs.get("stage", 2)
@@ -488,16 +640,23 @@ class Header(Vehicle):
         self.waiting = False
         self.finished = False
 
+        self.planning = False
+        self.path_future: Future | None = None
+        self.planned_stage = -1
+        self.planned_paddock = -1
+
         self.completed_path = []
         self.job = attrs.get("job", None)
 
+        self.stroke_masks = StrokeMaskCache()
+
         pos = attrs.get("pos", (shed_rect.x - shed_rect.w / 2, shed_rect.y + 10))
 
         image = pg.transform.scale_by(ResourceManager.load_image(self.anims['pipeIn']), self.scale)
         super().__init__(self.surface, image, pos, 0, 0)
         self.rotation = attrs.get("rotation", 0)
 
-        self.working_width = self.image.get_width()
+        self.working_width = self.original_image.get_width()
 
     def re_init(self) -> None:
         logging.info(f"Re-initializing header: {self.full_name}...")
@@ -528,6 +687,9 @@ class Header(Vehicle):
         self.waiting = False
         self.finished = False
 
+        self.planning = False
+        self.path_future = None
+
         self.completed_path = []
         self.job = None
 
@@ -584,7 +746,7 @@ class Header(Vehicle):
             self.unloading_vehicle.set_waiting(False)
             self.unloading_vehicle.tool.set_animation('full')
             self.unloading_vehicle.tool.reload_vt_sim()
-            self.unloading_vehicle.path = self.job.trace_collision_boundary(tuple(self.position), self.destination.destination.gate, self.job.lap_1)
+            self.unloading_vehicle.path = Path(self.job.trace_collision_boundary(tuple(self.position), self.destination.destination.gate, self.job.lap_1))
 
             logging.debug(f"{self.full_name} is now empty. Resuming task...")
 
@@ -606,6 +768,10 @@ class Header(Vehicle):
         return list(reversed(self.job.trace_collision_boundary(tuple(self.position), self.destination.destination.gate, self.job.lap_1)))
 
     def follow_path(self) -> None:
+        if self.planning:
+            if not self.path_future.done(): return
+            self.finish_planning()
+
         if self.waiting_for_unloading_vehicle_assign: return
 
         if self.waiting_for_unloading_vehicle:
@@ -618,72 +784,99 @@ class Header(Vehicle):
             self.unload()
             return
 
-        if len(self.path) == 0:
-            self.stage += 1
+        # Every point already reached is skipped in one go (fast vehicles can reach a few in a frame), and when the path runs out the job moves through its stages until there's a new one
+        while True:
+            self.path.skip_reached(self.rect.centerx, self.rect.centery, self.waypoint_radius, self.completed_path)
+            if len(self.path) > 0: break
 
-            if self.stage - 1 in END_JOB_STAGES:
-                self.active = False
-                self.paddock = -1
-                self.completed_path = []
+            if self.next_stage(): return
 
-                self.set_string_task("No task assigned")
+            # The next stages path is still being planned (or it has to wait to be unloaded first)
+            if self.planning or len(self.path) == 0: return
 
-                self.re_init()
-                logging.debug(f"Vehicle: {self.vehicle_id} has completed their task.")
-                return
+        px, py = self.path[0]
+        self.desired_rotation = (degrees(atan2(-(py - self.rect.centery), px - self.rect.centerx)) + 360) % 360 - 90
 
-            logging.debug(f"Vehicle: {self.vehicle_id} moving on to next path stage ({self.stage})...")
+    def next_stage(self) -> bool:
+        """Moves the job onto its next stage once the path has run out (started by `STAGE_STARTS`). Returns True if the job is finished"""
 
-            if self.working:
-                self.set_string_task(f"{TOOL_ACTIVE_NAMES['Headers']}...".capitalize())
-                self.curr_speed = 20
-            else:
-                self.curr_speed = 40
+        self.stage += 1
 
-                if self.stage - 1 == JOB_TYPES["working"]:
-                    # was just working, sort out paddock now
-                    self.destination.destination.reset_paint()
-                    self.destination.destination.set_state(self.get_output_state(), False)
-                    self.add_xp(1)
+        if self.stage - 1 in END_JOB_STAGES:
+            self.active = False
+            self.paddock = -1
+            self.completed_path = []
 
-                    if self.fill > 0:
-                        self.finished = True
-                        
-                        if self.fill > 0:
-                            self.request_unload()
+            self.set_string_task("No task assigned")
 
-                        self.stage -= 1
-                        return
+            self.re_init()
+            logging.debug(f"Vehicle: {self.vehicle_id} has completed their task.")
+            return True
 
-            if self.stage == JOB_TYPES["travelling_from"]:
-                # Go to shed
-                self.set_string_task("Traveling to shed...")
+        logging.debug(f"Vehicle: {self.vehicle_id} moving on to next path stage ({self.stage})...")
+        self.STAGE_STARTS[self.stage](self)
 
-                self.task_header(self, Destination(None), self.stage)
-            else:
-                # TODO: Call update_machine_info with the correct information
-                if self.stage == JOB_TYPES["travelling_to"]:
-                    self.set_string_task(f"Traveling to {self.destination.get_name()}...")
+        return False
 
-                self.task_header(self, self.destination, self.stage)
+    def start_transporting(self) -> None:
+        self.curr_speed = 40
+        self.task_header(self, self.destination, self.stage)
 
-        px, py = self.path[0]
+    def start_travelling_to(self) -> None:
+        self.curr_speed = 40
+        self.set_string_task(f"Traveling to {self.destination.get_name()}...")
+
+        self.task_header(self, self.destination, self.stage)
+
+    def start_working(self) -> None:
+        self.set_string_task(f"{TOOL_ACTIVE_NAMES['Headers']}...".capitalize())
+
+        self.curr_speed = 20
+        self.task_header(self, self.destination, self.stage)
 
-        multiplier = 1
+    def start_travelling_from(self) -> None:
+        self.curr_speed = 40
 
-        # If the vehicle is travelling
-        if self.curr_speed == 40:
-            multiplier = 2
+        # was just working, sort out paddock now
+        self.destination.destination.reset_paint()
+        self.destination.destination.set_state(self.get_output_state(), False)
+        self.add_xp(1)
 
-        dist = sqrt((px - self.rect.centerx) ** 2 + (py - self.rect.centery) ** 2)
-        if dist < self.PATH_POP_RADIUS * multiplier:
-            self.completed_path.append(self.path[0])
-            self.path.pop(0)
-            self.follow_path()
+        if self.fill > 0:
+            # Stays working until it has been unloaded
+            self.finished = True
+            self.request_unload()
+
+            self.stage -= 1
             return
 
-        self.desired_rotation = (degrees(atan2(-(py - self.rect.centery), px - self.rect.centerx)) + 360) % 360 - 90
-        
+        # Go to shed
+        self.set_string_task("Traveling to shed...")
+        self.task_header(self, Destination(None), self.stage)
+
+    # What a header does when it starts each stage of a job
+    STAGE_STARTS = {
+        JOB_TYPES["transporting_to"]: start_transporting,
+        JOB_TYPES["transporting_from"]: start_transporting,
+        JOB_TYPES["travelling_to"]: start_travelling_to,
+        JOB_TYPES["working"]: start_working,
+        JOB_TYPES["travelling_from"]: start_travelling_from
+    }
+
+    @property
+    def waypoint_radius(self) -> float:
+        # Travelling vehicles move onto the next point from further away
+        return self.PATH_POP_RADIUS * (2 if self.curr_speed == 40 else 1)
+
+    def reached_waypoint(self) -> bool:
+        """Is the vehicle close enough to the next point on its path to move onto the one after it"""
+
+        if len(self.path) == 0: return False
+
+        px, py = self.path[0]
+
+        return sqrt((px - self.rect.centerx) ** 2 + (py - self.rect.centery) ** 2) < self.waypoint_radius
+
     def set_path(self, job, new_path: List[Sequence[float]], stage: int, paddock: int = -1) -> None:
         if stage == -1:
             # Default to travelling -> working -> etc...
@@ -692,13 +885,48 @@ class Header(Vehicle):
 
         logging.info(f"Setting new path for vehicle: {self.vehicle_id}...")
         self.set_job(job)
-        self.path = new_path
+        self.path = Path(new_path)
         self.active = True
         self.stage = stage
         self.paddock = paddock
 
+    def set_planning(self, job, path_future: Future, stage: int, paddock: int = -1) -> None:
+        """Parks the header until the `WorkerPool` has planned the jobs path, `follow_path` polls it and sets the path once it's done"""
+
+        logging.info(f"Waiting for path to be planned for vehicle: {self.vehicle_id}...")
+        self.set_job(job)
+        self.path = Path()
+
+        self.path_future = path_future
+        self.planned_stage = stage
+        self.planned_paddock = paddock
+        self.planning = True
+
+        self.active = True
+
+    def finish_planning(self) -> None:
+        """Sets the planned path, blocks if it is still being planned"""
+
+        self.planning = False
+        self.set_path(self.job, self.job.collect_path(self.path_future), self.planned_stage, self.planned_paddock)
+        self.path_future = None
+
+    def get_substep(self, remaining_dt: float) -> float:
+        if self.waiting or self.planning: return get_substep(remaining_dt, 0, ())
+
+        speed = self.curr_speed * SPEEDSCALE
+
+        # `calculate_movement` turns by the heading error (up to MAX_TURN_SPEED) * turn_gain degrees per second
+        turn_amount = abs(utils.angle_difference(self.rotation, self.desired_rotation))
+        turn_gain = 10 * SPEEDSCALE
+
+        # `check_paint` runs once a substep so the header can't move further than PAINT_RECT_DIST between strokes
+        max_distance = PAINT_RECT_DIST if self.working and not self.finished else float('inf')
+
+        return get_substep(remaining_dt, speed, ((min(MAX_TURN_SPEED, turn_amount) * turn_gain, turn_gain if turn_amount < MAX_TURN_SPEED else 0),), max_distance)
+
     def calculate_movement(self, dt: float) -> float:
-        if self.waiting:
+        if self.waiting or self.planning:
             self.velocity = [0, 0]
             return 0
 
@@ -717,16 +945,19 @@ class Header(Vehicle):
     def paint(self) -> Tuple[int, int]:
         """Returns paint_amount & crop_index"""
 
-        paint_surf = self.image
-        return (self.destination.destination.paint(paint_surf, self.rect.topleft, STATE_COLORS[self.get_output_state()]), self.destination.destination.crop_index)
+        # The cached mask is rotated to the nearest bucket, so its size can differ from the exact angle rect, centre it on the header instead of using the rects top left
+        stroke_mask = self.stroke_masks.get(self.original_image, self.rotation)
+        stroke_pos = stroke_mask.get_rect(center=self.rect.center).topleft
+
+        return (self.destination.destination.paint_stroke(stroke_mask, stroke_pos, STATE_COLORS[self.get_output_state()]), self.destination.destination.crop_index)
 
     def check_paint(self) -> None: 
         if self.waiting: return
 
-        half_width = self.image.get_width() / 2
-        half_height = self.image.get_height() / 2
+        half_width = self.rect.w / 2
+        half_height = self.rect.h / 2
 
-        local_center = self.image.get_rect().center
+        local_center = (self.rect.w // 2, self.rect.h // 2)
         center = (local_center[0] + self.x, local_center[1] + self.y)
 
         left_paint = utils.rotate_point_centered(center, (center[0] - half_width, center[1] - half_height), -radians(self.rotation))
@@ -740,21 +971,61 @@ class Header(Vehicle):
         last_paint_right_dist = sqrt((right_paint[0] - self.last_paint_right[0])**2 + (right_paint[1] - self.last_paint_right[1])**2)
 
         if last_paint_left_dist >= PAINT_RECT_DIST or last_paint_right_dist >= PAINT_RECT_DIST:
-            fill_amount, crop_index = self.paint()
-            fill_amount *=  self.destination.destination.calculate_yield()
-
-            if self.destination.destination.contract_requirements == {}: # Fill disabled on contracts
-                if crop_index != self.fill_type:
-                    if self.fill > 0:
-                        logging.warning(f"Mixed crops in header! Old: {CROP_TYPES[self.fill_type]}  New: {CROP_TYPES[crop_index]}. Replacing old with new (but keeping fill).")
-                    
-                    self.fill_type = crop_index
-
-                self.increment_fill(fill_amount)
+            self.harvest(*self.paint())
 
             self.last_paint_left = left_paint
             self.last_paint_right = right_paint
 
+    def harvest(self, paint_amount: float, crop_index: int) -> None:
+        fill_amount = paint_amount * self.destination.destination.calculate_yield()
+
+        if self.destination.destination.contract_requirements == {}: # Fill disabled on contracts
+            if crop_index != self.fill_type:
+                if self.fill > 0:
+                    logging.warning(f"Mixed crops in header! Old: {CROP_TYPES[self.fill_type]}  New: {CROP_TYPES[crop_index]}. Replacing old with new (but keeping fill).")
+                
+                self.fill_type = crop_index
+
+            self.increment_fill(fill_amount)
+
+    @property
+    def can_time_warp(self) -> bool:
+        """Only plain field work (not waiting, unloading or planning) can be time warped"""
+
+        if not self.working or len(self.path) == 0: return False
+        return not (self.finished or self.waiting or self.planning or self.unloading or self.waiting_for_unloading_vehicle or self.waiting_for_unloading_vehicle_assign)
+
+    def time_warp(self, dt: float) -> float:
+        """
+        Skips up to `dt` seconds of harvesting in one go with `warp_field_work`, the crop for the whole swath is added at once (`EQUIPMENT_RATES`)
+        returns -> the seconds skipped (less than `dt` if the path ended or the header filled up, 0 if it can't be time warped)
+        """
+
+        if not self.can_time_warp: return 0.0
+
+        speed = self.curr_speed * SPEEDSCALE
+        paddock = self.destination.destination
+
+        crop_yield = paddock.calculate_yield()
+        capacity = max(0.0, self.storage - self.fill) * EQUIPMENT_RATES["Headers"] / crop_yield if paddock.contract_requirements == {} and crop_yield > 0 else None
+
+        moved, area, reached_points, ran_out = warp_field_work(self, speed * dt, speed, 10 * SPEEDSCALE, paddock, STATE_COLORS[self.get_output_state()], capacity,
+                                                             self.stroke_masks, self.original_image)
+        if moved == 0:
+            if ran_out: self.request_unload()
+            return 0.0
+
+        self.completed_path.extend(reached_points)
+        self.harvest(area, paddock.crop_index)
+
+        # The end of the swath is painted like any other stroke
+        self.check_paint()
+
+        # Stopping where it's worked out to fill up can leave it just short of full, it still needs unloading
+        if ran_out and not self.waiting: self.request_unload()
+
+        return moved / speed
+
     def request_unload(self) -> None:
         logging.info(f"Header {self.full_name} is requesting unload...")
         self.waiting_for_unloading_vehicle_assign = True
@@ -772,8 +1043,8 @@ class Header(Vehicle):
         if self.fill >= self.storage:
             self.request_unload()
 
-    def update(self, dt: float) -> None:
-        if not self.active: return
+    def begin_update(self) -> bool:
+        """Follows the path before the frames substeps. Always True, headers are never packed away mid job"""
 
         self.follow_path()
 
@@ -783,22 +1054,39 @@ class Header(Vehicle):
 
             pg.draw.line(self.surface, (0, 0, 255), self.path[0], self.rect.center)
 
-        required_dt = 1/TARGET_FPS
-        remaining_dt = dt
-        while remaining_dt > 0:
-            if remaining_dt < required_dt: remaining_dt = required_dt
-
-            if self.working and not self.finished:
-                self.check_paint()
+        return True
 
-            self.calculate_movement(required_dt)
+    def substep(self, step: float) -> None:
+        if self.working and not self.finished:
+            self.check_paint()
 
-            self.simulate(required_dt)
+        self.calculate_movement(step)
 
-            remaining_dt -= required_dt
+        self.simulate(step)
 
+    def end_update(self) -> None:
         self.draw()
 
+    def update(self, dt: float) -> None:
+        """Scalar update, `FleetState` does the same for whole fleets at once"""
+
+        if not self.active: return
+        self.begin_update()
+
+        # Substeps are as long as `get_substep` allows, so the work per frame depends on how much the machine is turning, not on the FPS
+        remaining_dt = dt
+        while remaining_dt > 0:
+            step = self.get_substep(remaining_dt)
+            self.substep(step)
+
+            remaining_dt -= step
+
+            # Move onto the next point part way through the frame (like a shorter frame would) instead of driving past it
+            if remaining_dt > 0 and self.reached_waypoint():
+                self.follow_path()
+
+        self.end_update()
+
 class Tool(Trailer):
     IS_VEHICLE: bool = False
 
@@ -826,6 +1114,8 @@ class Tool(Trailer):
         if self.tool_type == "Seeders":
             self.cart = attrs["cart"]
 
+        self.stroke_masks = StrokeMaskCache()
+
         if self.tool_type == "Trailers":
             self.set_animation("full")
         else:
@@ -833,7 +1123,7 @@ class Tool(Trailer):
 
         self.working_width = self.master_image.get_width()
 
-        self.path: List[Sequence[float]]
+        self.path = Path()
 
         self.fill = attrs.get("fill", 0)
         self.fill_type = attrs.get("fillType", -1)
@@ -853,7 +1143,7 @@ class Tool(Trailer):
     def re_init(self) -> None:
         logging.info(f"Re-initializing tool: {self.full_name}...")
 
-        self.path: List[Sequence[float]]
+        self.path = Path()
 
         self.active = False
         self.vehicle = None
@@ -947,6 +1237,8 @@ class Tool(Trailer):
         anim = self.anims.get(anim_name, self.anims[self.anims['default']])
         self.master_image = pg.transform.scale_by(ResourceManager.load_image(anim), self.scale*TOOL_SCALE)
 
+        self.stroke_masks.clear()
+
     def set_working_animation(self, reload_vt: bool = True) -> None:
         logging.info(f"Setting working animation for tool: {self.full_name}...")
 
@@ -971,7 +1263,7 @@ class Tool(Trailer):
 
         self.waiting_for_loading = True
 
-    def paint(self) -> int:
+    def get_paint_color(self) -> Tuple[int, int, int]:
         color = STATE_COLORS[self.get_output_state()]
 
         if self.get_fill_type_str in FERTILISERS or self.get_fill_type_str in CHEMICALS:
@@ -980,8 +1272,11 @@ class Tool(Trailer):
             if self.get_fill_type_str == "lime":
                 color = (255, 255, 255)
 
-        paint_surf = pg.transform.rotate(self.master_image, self.rotation)
-        return self.destination.destination.paint(paint_surf, tuple(self.position), color)
+        return color
+
+    def paint(self) -> int:
+        stroke_mask = self.stroke_masks.get(self.master_image, self.rotation)
+        return self.destination.destination.paint_stroke(stroke_mask, tuple(self.position), self.get_paint_color())
 
     def check_paint(self) -> None: 
         half_width = self.master_image.get_width() / 2
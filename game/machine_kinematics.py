@@ -0,0 +1,203 @@
+import pygame as pg
+
+from vehicle_trailer_simulation import Vehicle, Trailer, get_hitch_error
+from sprite_cache import StrokeMaskCache
+from utils import utils
+from data import *
+
+from math import atan2, sqrt, cos, sin, radians, degrees
+from typing import List, Sequence, Tuple
+
+def get_substep(remaining_dt: float, speed: float, turns: Sequence[Tuple[float, float]], max_distance: float = float('inf')) -> float:
+    """
+    Longest physics substep (seconds) that stays within the `SUBSTEP_*` accuracy bounds, so a machine going straight
+    takes a few long substeps and only turns are broken up finely.
+
+    speed: float (pixels per second)
+    turns: [(turn rate (degrees per second), gain (fraction of the heading error corrected per second))] for the machine and its tool
+    max_distance: float (pixels the machine can move in one substep)
+    """
+
+    step = min(remaining_dt, SUBSTEP_MAX_DT)
+    if speed > 0: step = min(step, max_distance / speed)
+
+    for turn_rate, gain in turns:
+        if turn_rate > 0:
+            step = min(step, SUBSTEP_MAX_TURN / turn_rate)
+
+            # Moving straight instead of along the arc ends up about distance * angle / 2 off it
+            if speed > 0: step = min(step, sqrt(2 * SUBSTEP_MAX_ERROR / (speed * radians(turn_rate))))
+
+        if gain > 0: step = min(step, SUBSTEP_MAX_GAIN / gain)
+
+    return min(remaining_dt, max(step, SUBSTEP_MIN_DT))
+
+def trace_path_following(vehicle: Vehicle, distance: float, speed: float, turn_gain: float) -> Tuple[List[Tuple[float, float]], List[int], List[float], float]:
+    """
+    Works out where `vehicle` drives following its path for `distance`, without simulating it.
+
+    It steers like `follow_path` and `calculate_movement` do (turning towards the next point at up to MAX_TURN_SPEED * turn_gain degrees
+    per second and moving onto the one after it inside `waypoint_radius`), but once it faces the next point it jumps straight to it
+    and only the turns are stepped through (as finely as `get_substep` steps them).
+
+    turn_gain: degrees per second the machine turns for each degree its heading is off
+    returns -> the points it drives through (starting at its center), how many path points it has reached by each one, its rotation driving into each one and the distance driven
+    """
+
+    x, y = vehicle.rect.center
+    rotation = vehicle.rotation
+    radius = vehicle.waypoint_radius
+    path = vehicle.path
+
+    route, reached_counts, rotations = [(x, y)], [0], [rotation]
+    reached = 0
+    driven = 0.0
+    turned = 0.0 # Degrees turned heading for the current point
+
+    while driven < distance:
+        # A point inside the turning circle gets circled, the simulated machine gets knocked out of that by its tool and the
+        # rounding of its rect so it's moved past after a whole lap instead of circling for the rest of the warp
+        while reached < len(path):
+            px, py = path[reached]
+            if sqrt((px - x) ** 2 + (py - y) ** 2) >= radius and turned < 360: break
+
+            reached += 1
+            turned = 0.0
+
+        if reached == len(path): break
+
+        px, py = path[reached]
+        desired_rotation = (degrees(atan2(-(py - y), px - x)) + 360) % 360 - 90
+        turn_amount = utils.angle_difference(rotation, desired_rotation)
+
+        if abs(turn_amount) < TIME_WARP_STRAIGHT_ANGLE:
+            # Facing the point, it stays facing it all the way until it's close enough to move onto the next one (just inside the radius)
+            rotation = desired_rotation % 360
+            step_distance = min(distance - driven, sqrt((px - x) ** 2 + (py - y) ** 2) - radius + 0.01)
+        else:
+            step = get_substep((distance - driven) / speed, speed, ((min(MAX_TURN_SPEED, abs(turn_amount)) * turn_gain, turn_gain if abs(turn_amount) < MAX_TURN_SPEED else 0),))
+            turn = max(-MAX_TURN_SPEED, min(MAX_TURN_SPEED, turn_amount)) * step * turn_gain
+
+            rotation = (rotation + turn) % 360
+            turned += abs(turn)
+            step_distance = speed * step
+
+        x += cos(radians(-rotation - 90)) * step_distance
+        y += sin(radians(-rotation - 90)) * step_distance
+        driven += step_distance
+
+        route.append((x, y))
+        reached_counts.append(reached)
+        rotations.append(rotation)
+
+    return route, reached_counts, rotations, driven
+
+def get_route_poses(route: Sequence[Sequence[float]], rotations: Sequence[float], spacing: float) -> List[Tuple[Tuple[float, float], float]]:
+    """
+    Points every `spacing` along `route` (and its end) with the rotation driving into them, like where a machine driving it paints its strokes.
+    rotations: the rotation driving into each point of the route (see `trace_path_following`)
+    """
+
+    poses = [(tuple(route[0]), rotations[0])]
+    since_pose = 0.0
+
+    for i in range(1, len(route)):
+        (ax, ay), (bx, by) = route[i-1], route[i]
+        length = sqrt((bx - ax) ** 2 + (by - ay) ** 2)
+
+        along = spacing - since_pose
+        while along <= length:
+            t = along / length
+            poses.append(((ax + (bx - ax) * t, ay + (by - ay) * t), rotations[i]))
+            along += spacing
+
+        since_pose = length - (along - spacing)
+
+    if since_pose > 0: poses.append((tuple(route[-1]), rotations[-1]))
+
+    return poses
+
+def trace_tool_following(tool: Trailer, poses: Sequence[Tuple[Sequence[float], float]], speed: float) -> List[Tuple[Tuple[float, float], float]]:
+    """
+    Works out where `tool` is pulled to as its vehicle drives through `poses`, without simulating it.
+    It swings towards the vehicles hitch and is snapped onto it like `Trailer.simulate` does it, so it cuts the corners the same way.
+    returns -> the tools center and rotation at each pose
+    """
+
+    vehicle = tool.vehicle
+
+    # See `Tractor.get_substep`
+    tool_gain = speed * 0.12
+
+    cx, cy = tool.rect.center
+    rotation = tool.rotation
+    hitch = tool.hitch.position
+    last_x, last_y = poses[0][0]
+
+    tool_poses = []
+
+    for (x, y), vehicle_rotation in poses:
+        dt = sqrt((x - last_x) ** 2 + (y - last_y) ** 2) / speed
+        last_x, last_y = x, y
+
+        vehicle_hitch = utils.rotate_point_centered((x, y), (x + vehicle.hitch.vector.x, y + vehicle.hitch.vector.y), radians(-vehicle_rotation))
+        rotation = (rotation - get_hitch_error(rotation, hitch, vehicle_hitch) * tool_gain * dt) % 360
+
+        hx, hy = utils.rotate_point_centered((cx, cy), (cx + tool.hitch.vector.x, cy + tool.hitch.vector.y), -radians(rotation))
+        hitch = (vehicle_hitch[0] - cos(radians(-vehicle_rotation - 90)) * 5, vehicle_hitch[1] - sin(radians(-vehicle_rotation - 90)) * 5)
+
+        cx += hitch[0] - hx
+        cy += hitch[1] - hy
+
+        tool_poses.append(((cx, cy), rotation))
+
+    return tool_poses
+
+def warp_field_work(vehicle: Vehicle, distance: float, speed: float, turn_gain: float, paddock, color: Tuple[int, int, int], capacity: float | None,
+                    stroke_masks: StrokeMaskCache, image: pg.Surface, tool: Trailer | None = None) -> Tuple[float, float, List[Tuple[float, float]], bool]:
+    """
+    Time warps a machine through field work: drives `vehicle` `distance` along its path (less if the path ends or `capacity`
+    runs out) with `trace_path_following` and paints all the strokes it would have painted on the way in one go.
+
+    speed, turn_gain: see `trace_path_following`
+    paddock: `Paddock`
+    capacity: area (scaled) that can be painted before the tool is empty / the header is full (None if it never is)
+    stroke_masks, image: what's painted every PAINT_RECT_DIST, by `tool` (`trace_tool_following`) if there is one or the vehicle itself
+    returns -> the distance moved, the area painted (scaled), the waypoints reached (popped from the path) and if it stopped because `capacity` ran out
+    """
+
+    def get_swath_mask(route: List[Tuple[float, float]]) -> Tuple[pg.Mask, Tuple[int, int]]:
+        poses = get_route_poses(route, rotations, PAINT_RECT_DIST)
+        if tool is not None: poses = trace_tool_following(tool, poses, speed)
+
+        return utils.get_stamped_mask([(stroke_masks.get(image, rotation), center) for center, rotation in poses])
+
+    route, reached_counts, rotations, moved = trace_path_following(vehicle, distance, speed, turn_gain)
+    if moved <= 0: return 0.0, 0.0, [], False
+
+    swath_mask, swath_pos = get_swath_mask(route)
+
+    ran_out = False
+
+    if capacity is not None:
+        area = paddock.count_new_paint(swath_mask, swath_pos)
+
+        if area > capacity:
+            ran_out = True
+
+            # Stop about where it runs out, assuming the new paint is spread evenly along the way
+            route, _, moved = utils.walk_path(route, moved * capacity / area)
+            if moved <= 0: return 0.0, 0.0, [], True
+
+            swath_mask, swath_pos = get_swath_mask(route)
+
+    area = paddock.paint_stroke(swath_mask, swath_pos, color)
+
+    # The last point is on the way into this point of the traced route
+    end = len(route) - 1
+    reached_points = [vehicle.path.pop_front() for _ in range(reached_counts[end])]
+
+    vehicle.desired_rotation = rotations[end]
+    vehicle.place(route[-1], rotations[end])
+
+    return moved, area, reached_points, ran_out
@@ -2,19 +2,23 @@ import pygame as pg
 import sys
 import logging
 import asyncio
+import os
 
 from time import sleep
 from events import Events
 from farm_ceo import FarmCEO
 from log_config import setup_logging
 from crash_handler import CrashHandler
+from flight_recorder import FlightRecorder
+from save_manager import SaveManager
+from worker_pool import WorkerPool
 
 from data import *
 
 if BUILD and TARGETING_ANDROID: from jnius import autoclass
 if CONSOLE_BUILD: from console import PygameConsole
 
-from performance_monitor import PerformanceMonitor
+from performance_monitor import PerformanceMonitor, FrameProfiler
 
 pg.init()
 
@@ -72,6 +76,8 @@ class Window:
         self.clock: pg.time.Clock = pg.time.Clock()
         self.events: Events = Events()
 
+        FlightRecorder().init(os.path.join(os.path.dirname(SaveManager.SAVE_PATH), "hitches"))
+
         self.farm_ceo: FarmCEO = FarmCEO(self.screen, self.clock, self.events)
 
         if CONSOLE_BUILD:
@@ -110,10 +116,16 @@ class Window:
         pg.display.set_caption(self.TITLE)
         pg.display.set_icon(self.farm_ceo.RESOURCE_MANAGER.load_image("game_icon.png", (100, 100)))
 
+        profiler = FrameProfiler()
+        flight_recorder = FlightRecorder()
+
         while 1:
             #sleep(0.016*2)
-            events = pg.event.get()
-            self.events.process_events(events)
+            flight_recorder.begin_frame()
+
+            with profiler.stage("events"):
+                events = pg.event.get()
+                self.events.process_events(events)
 
             if ENABLE_KEYBOARD_CHEATS:
                 keys = pg.key.get_pressed()
@@ -121,19 +133,30 @@ class Window:
                 if keys[pg.K_SPACE]:
                     self.frame_time *= 10
 
-            self.farm_ceo.background_render()
+            with profiler.stage("background"):
+                self.farm_ceo.background_render()
+
+            with profiler.stage("simulate"):
+                if self.events.game_paused:
+                    self.farm_ceo.simulate(0.0)
+                else:
+                    self.farm_ceo.simulate(self.frame_time)
 
-            if self.events.game_paused:
-                self.farm_ceo.simulate(0.0)
-            else:
-                self.farm_ceo.simulate(self.frame_time)
+                if self.events.skip_time_requested:
+                    # Skip a day
+                    self.events.skip_time_requested = False
+                    self.farm_ceo.skip_time(MINS_IN_DAY / TIMESCALE)
 
-            self.farm_ceo.foreground_render()
-            self.farm_ceo.ui_render()
+            with profiler.stage("foreground"):
+                self.farm_ceo.foreground_render()
+
+            with profiler.stage("ui"):
+                self.farm_ceo.ui_render()
 
             if not BUILD: 
-                self.performance_monitor.update(self.delta_time)
-                self.performance_monitor.draw()
+                with profiler.stage("monitor"):
+                    self.performance_monitor.update(self.delta_time)
+                    self.performance_monitor.draw()
 
             if CONSOLE_BUILD:
                 self.console.update(events)
@@ -142,8 +165,16 @@ class Window:
                 fps_rendered = self.fps_font.render(f"{int(self.clock.get_fps())}", True, (255, 255, 255), (0, 0, 255))
                 self.screen.blit(fps_rendered, (20, 20))
 
-            pg.display.flip()
-            self.delta_time = self.clock.tick(self.FPS)
+            with profiler.stage("flip"):
+                pg.display.flip()
+
+            # Also includes the time `tick` waits to cap the FPS
+            with profiler.stage("tick"):
+                self.delta_time = self.clock.tick(self.FPS)
+
+            profiler.end_frame()
+            flight_recorder.end_frame(self.delta_time, profiler.last_frame)
+
             self.frame_time = self.delta_time / 1000.0
             
             if self.frame_time > 0.5:
@@ -154,7 +185,11 @@ class Window:
             await asyncio.sleep(0)
 
 def main() -> None:
-    CrashHandler(lambda: asyncio.run(Window().main()))
+    try:
+        CrashHandler(lambda: asyncio.run(Window().main()))
+    finally:
+        # Quitting (and the crash screen) exit with sys.exit, so this runs either way
+        WorkerPool.shutdown_if_started()
 
 if __name__ == "__main__":
     main()
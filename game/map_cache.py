@@ -0,0 +1,155 @@
+import os
+import sys
+import json
+import zlib
+import struct
+import logging
+import pygame as pg
+
+from resource_manager import ResourceManager
+from save_manager import SaveManager
+from paddock import Paddock
+from utils import utils
+from data import *
+
+from array import array
+from hashlib import sha1
+from typing import Dict, List
+
+class MapCache:
+    """
+    Compiled paddock data for a map, so boundaries and masks don't need to be rebuilt every launch.
+
+    One binary file per map in `cache_path` (next to the savegame), read in one go:
+        - `MAGIC`
+        - Header length (little-endian uint32) then a JSON header with the key and each paddocks rect, center, gate and blob offsets
+        - Blobs: boundaries as little-endian int16 pairs and masks from `utils.mask_to_bytes`
+
+    The key hashes the map image, the map cfg and the display scale so the file is only rebuilt when one of them changes.
+    """
+
+    MAGIC: bytes = b"FCEOMAP"
+
+    def __init__(self, map_name: str, map_cfg: Dict[str, any], scale: float) -> None:
+        """map_name: str (map cfg relative to `MAPS_PATH`)"""
+
+        self.map_name = map_name
+        self.map_cfg = map_cfg
+        self.scale = scale
+
+        self.key = self.make_key()
+
+    @property
+    def cache_path(self) -> str:
+        """Next to wherever the savegame is now (it can be moved after this is imported, like headless runs do)"""
+
+        return os.path.join(os.path.dirname(SaveManager.SAVE_PATH), "map_cache")
+
+    @property
+    def file_path(self) -> str:
+        return os.path.join(self.cache_path, f"{os.path.splitext(self.map_name)[0]}.bin")
+
+    def make_key(self) -> str:
+        key_hash = sha1(f"{MAP_CACHE_VERSION}|{PADDOCK_DARKNESS}|{self.scale}".encode())
+
+        for file_path in (f"{ResourceManager.MAPS_PATH}/{self.map_name}", f"{ResourceManager.MAPS_PATH}/{self.map_cfg.get('filename', '')}"):
+            try:
+                with open(file_path, "rb") as f:
+                    key_hash.update(f.read())
+            except OSError as e:
+                logging.warning(f"Could not hash map file: \"{file_path}\" for the map cache! Error: {e}")
+
+        return key_hash.hexdigest()
+
+    def load(self) -> Dict[str, Dict[str, any]]:
+        """
+        returns -> {paddock num: {"boundary", "rect", "center", "gate", "mask"}} or an empty dict if the cache is missing or stale
+        """
+
+        if not os.path.exists(self.file_path): return {}
+
+        logging.debug(f"Loading map cache: \"{self.file_path}\"...")
+
+        try:
+            with open(self.file_path, "rb") as f:
+                contents = f.read()
+
+            if not contents.startswith(self.MAGIC):
+                logging.warning(f"Map cache: \"{self.file_path}\" is not a map cache! Rebuilding it...")
+                return {}
+
+            header_start = len(self.MAGIC) + 4
+            header_length = struct.unpack_from("<I", contents, len(self.MAGIC))[0]
+            header = json.loads(contents[header_start:header_start + header_length])
+
+            if header["key"] != self.key:
+                logging.info("Map or display scale has changed since the map cache was built. Rebuilding it...")
+                return {}
+
+            blobs = memoryview(contents)[header_start + header_length:]
+            cached_paddocks = {}
+
+            for num, paddock_header in header["paddocks"].items():
+                boundary_start, boundary_length = paddock_header["boundary"]
+                mask_start, mask_length = paddock_header["mask"]
+
+                coords = array('h')
+                coords.frombytes(blobs[boundary_start:boundary_start + boundary_length])
+                if sys.byteorder == "big": coords.byteswap()
+
+                rect = pg.Rect(paddock_header["rect"])
+
+                cached_paddocks[num] = {
+                    "boundary": list(zip(coords[::2], coords[1::2])),
+                    "rect": rect,
+                    "center": tuple(paddock_header["center"]),
+                    "gate": tuple(paddock_header["gate"]),
+                    "mask": utils.mask_from_bytes(bytes(blobs[mask_start:mask_start + mask_length]), rect.size)
+                }
+
+        except (OSError, ValueError, KeyError, TypeError, struct.error, zlib.error, pg.error) as e:
+            logging.warning(f"Map cache: \"{self.file_path}\" is invalid! Rebuilding it... Error: {e}")
+            return {}
+
+        return cached_paddocks
+
+    def save(self, paddocks: List[Paddock]) -> None:
+        logging.debug(f"Saving map cache: \"{self.file_path}\"...")
+
+        header = {"key": self.key, "paddocks": {}}
+        blobs = bytearray()
+
+        for paddock in paddocks:
+            coords = array('h', (coord for point in paddock.boundary for coord in point))
+            if sys.byteorder == "big": coords.byteswap()
+
+            boundary_bytes = coords.tobytes()
+            mask_bytes = utils.mask_to_bytes(paddock.mask)
+
+            header["paddocks"][str(paddock.num)] = {
+                "rect": list(paddock.rect),
+                "center": paddock.center,
+                "gate": paddock.gate,
+                "boundary": (len(blobs), len(boundary_bytes)),
+                "mask": (len(blobs) + len(boundary_bytes), len(mask_bytes))
+            }
+
+            blobs.extend(boundary_bytes)
+            blobs.extend(mask_bytes)
+
+        header_bytes = json.dumps(header).encode()
+
+        try:
+            os.makedirs(self.cache_path, exist_ok=True)
+
+            # Written next to the cache and swapped in so a crash can't leave half a file behind
+            with open(f"{self.file_path}.tmp", "wb") as f:
+                f.write(self.MAGIC)
+                f.write(struct.pack("<I", len(header_bytes)))
+                f.write(header_bytes)
+                f.write(blobs)
+
+            os.replace(f"{self.file_path}.tmp", self.file_path)
+
+        except OSError as e:
+            logging.error(f"Could not write map cache: \"{self.file_path}\"! Error: {e}")
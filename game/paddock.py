@@ -1,8 +1,9 @@
 import pygame as pg
 import logging
 
-from resource_manager import ResourceManager
+from utils import utils
 
+from base64 import b64encode, b64decode
 from random import randint
 from typing import Dict, List, Tuple
 from data import *
@@ -52,16 +53,25 @@ class Paddock:
         
         return self.hectares * 1200 * 2
 
-    def init_collision(self) -> None:
-        self.surface, self.rect = self.create_surface()
-        self.localised_boundary = self.localise_boundary()
+    def init_collision(self, cached_rect: pg.Rect | None = None, cached_mask: pg.Mask | None = None) -> None:
+        """cached_rect, cached_mask: Already built (by the `MapCache` or `run_paddock_requests`), both have to be given for them to be used"""
 
-        # Fill the paddock red so the mask can see the red pixels
-        self.fill(pg.Color(255, 0, 0))
-        self.mask = pg.mask.from_surface(self.surface)
+        if cached_rect is not None and cached_mask is not None:
+            self.surface, self.rect = pg.Surface(cached_rect.size, pg.SRCALPHA), cached_rect
+            self.localised_boundary = self.localise_boundary()
+            self.mask = cached_mask
+        else:
+            self.surface, self.rect = self.create_surface()
+            self.localised_boundary = self.localise_boundary()
+
+            # Fill the paddock red so the mask can see the red pixels
+            self.fill(pg.Color(255, 0, 0))
+            self.mask = pg.mask.from_surface(self.surface)
 
         self.paint_surface = pg.Surface(self.rect.size, pg.SRCALPHA)
         self.paint_mask = pg.mask.from_surface(self.paint_surface)
+        self.paint_dirty_rects: List[pg.Rect] = []
+        self.paint_color: Tuple[int, int, int] = (0, 0, 0)
 
         self.price_lbl_surface = pg.font.SysFont(None, int(30*self.scale)).render(f"${self.price:,}", True, (255, 255, 255))
 
@@ -82,17 +92,32 @@ class Paddock:
             "contract_failed": self.contract_failed
         }
 
-    def save_paint_surface(self, save_path: str) -> None:
-        full_path = f"{save_path}/{self.num}_paint_surface.png"
+    def paint_to_dict(self) -> Dict[str, any] | None:
+        """The paint as its mask (base64 `utils.mask_to_bytes`) and colour, None if the paddock has no paint"""
+
+        if not self.is_painting: return None
+
+        return {
+            "size": self.paint_mask.get_size(),
+            "color": tuple(self.paint_color),
+            "mask": b64encode(utils.mask_to_bytes(self.paint_mask)).decode("ascii")
+        }
 
-        logging.info(f"Saving paddock paint surface to: {full_path}")
-        pg.image.save(self.paint_surface, full_path)
+    def load_paint_dict(self, paint_dict: Dict[str, any]) -> None:
+        """Loads a `paint_to_dict` dict, the paint is drawn on the next flush"""
 
-    def load_paint_surface(self, save_path: str) -> None:
-        full_path = f"{save_path}/{self.num}_paint_surface.png"
+        if tuple(paint_dict["size"]) != self.paint_mask.get_size():
+            logging.warning(f"Saved paint for paddock {self.num} doesn't fit the paddock (the map has changed). Ignoring it...")
+            return
 
-        logging.info(f"Loading paddock paint surface from: {full_path}")
-        self.paint_surface = ResourceManager.load_image(full_path, expected_size=(10, 10), explicit_path=True)
+        self.reset_paint()
+
+        self.paint_color = tuple(paint_dict["color"])
+        self.paint_mask = utils.mask_from_bytes(b64decode(paint_dict["mask"]), self.rect.size)
+        self.paint_surface = self.paint_mask.to_surface(setcolor=self.paint_color, unsetcolor=(0, 0, 0, 0))
+
+        self.is_painting = self.paint_mask.count() > 0
+        if self.is_painting: self.add_paint_dirty_rect(self.paint_surface.get_rect())
     
     def rebuild_num(self) -> None:
         color = (255, 255, 255)
@@ -104,11 +129,12 @@ class Paddock:
     def set_boundary(self, boundary: List[Tuple]) -> None:
         self.boundary = boundary
 
-    def create_surface(self) -> tuple[pg.Surface, pg.Rect]:
+    @staticmethod
+    def get_boundary_rect(boundary: List[Tuple]) -> pg.Rect:
         min_x, min_y = float('inf'), float('inf')
         max_x, max_y = 0, 0
 
-        for coord in self.boundary:
+        for coord in boundary:
             if coord[0] < min_x: min_x = coord[0]
             if coord[0] > max_x: max_x = coord[0]
 
@@ -117,9 +143,20 @@ class Paddock:
 
         buffer = 2 # Just a bit more room in case calculation isnt the most accurate
 
-        width, height = max_x - min_x + buffer, max_y - min_y + buffer
-        surface = pg.Surface((width, height), pg.SRCALPHA)
-        rect = pg.Rect(min_x, min_y, width, height)
+        return pg.Rect(min_x, min_y, max_x - min_x + buffer, max_y - min_y + buffer)
+
+    @staticmethod
+    def create_mask(boundary: List[Tuple], rect: pg.Rect) -> pg.Mask:
+        """The same mask `init_collision` makes, without needing a `Paddock` (or a display)"""
+
+        surface = pg.Surface(rect.size, pg.SRCALPHA)
+        pg.draw.polygon(surface, (255, 0, 0), [(coord[0] - rect.x, coord[1] - rect.y) for coord in boundary])
+
+        return pg.mask.from_surface(surface)
+
+    def create_surface(self) -> tuple[pg.Surface, pg.Rect]:
+        rect = self.get_boundary_rect(self.boundary)
+        surface = pg.Surface(rect.size, pg.SRCALPHA)
 
         return surface, rect
 
@@ -132,11 +169,36 @@ class Paddock:
 
         if draw_paint_surface:
             self.map_paddocks_surf.blit(self.paint_surface, self.rect)
+            self.paint_dirty_rects.clear()
+
+    def add_paint_dirty_rect(self, rect: pg.Rect) -> None:
+        """rect: Local to the paddock, merged into any dirty rect it touches so overlapping strokes are only blitted once"""
+
+        rect = rect.clip(self.paint_surface.get_rect())
+        if rect.w == 0 or rect.h == 0: return
+
+        dirty_index = rect.collidelist(self.paint_dirty_rects)
+
+        if dirty_index == -1:
+            self.paint_dirty_rects.append(rect)
+        else:
+            self.paint_dirty_rects[dirty_index].union_ip(rect)
+
+    def flush_paint(self) -> None:
+        """Blits the paint added since the last flush onto the map, called once a frame"""
+
+        for dirty_rect in self.paint_dirty_rects:
+            self.map_paddocks_surf.blit(self.paint_surface, (self.rect.x + dirty_rect.x, self.rect.y + dirty_rect.y), dirty_rect)
+
+        self.paint_dirty_rects.clear()
 
     def fill(self, color: pg.Color) -> None:
         pg.draw.polygon(self.surface, color, self.localised_boundary)
         self.draw_to_map()
 
+        # The fill covers the paint on the map, it gets put back on the next flush
+        if self.is_painting: self.add_paint_dirty_rect(self.paint_surface.get_rect())
+
     def calculate_yield(self) -> float:
         """Returns a yield bonus percent"""
 
@@ -227,22 +289,54 @@ class Paddock:
         # Note: this only changes the variable is_painting! to reset the paint on the surface you need to fill this paddock after calling this func
         self.paint_surface = pg.Surface(self.rect.size, pg.SRCALPHA)
         self.paint_mask = pg.mask.from_surface(self.paint_surface)
+        self.paint_dirty_rects.clear()
 
         self.last_collision_count = 0
         self.is_painting = False
 
     def paint(self, surface: pg.Surface, pos: Tuple[int, int], color: pg.Color) -> int:
+        """Paints the parts of `surface` that are over the paddock (see `paint_stroke`)"""
+
+        return self.paint_stroke(pg.mask.from_surface(surface), pos, color)
+
+    def clip_stroke(self, stroke_mask: pg.Mask, pos: Tuple[int, int]) -> Tuple[pg.Mask, Tuple[int, int], int]:
+        """returns -> the stroke cut to the paddock (stroke sized), its position in the paddock and how many of its pixels aren't painted yet"""
+
         local_pos = (pos[0] - self.rect.x, pos[1] - self.rect.y)
-        surface_mask = pg.mask.from_surface(surface)
+        paddock_offset = (-local_pos[0], -local_pos[1])
 
-        collision_mask = self.mask.overlap_mask(surface_mask, local_pos)
-        self.paint_surface.blit(collision_mask.to_surface(setcolor=color, unsetcolor=(0, 0, 0, 0)), (0, 0))
+        stroke_mask = stroke_mask.overlap_mask(self.mask, paddock_offset)
 
-        old_count = self.paint_mask.count()
-        self.paint_mask = pg.mask.from_surface(self.paint_surface)
-        new_count = self.paint_mask.count() - old_count
+        new_paint_mask = stroke_mask.copy()
+        new_paint_mask.erase(self.paint_mask, paddock_offset)
+
+        return stroke_mask, local_pos, new_paint_mask.count()
+
+    def count_new_paint(self, stroke_mask: pg.Mask, pos: Tuple[int, int]) -> float:
+        """The area (scaled) `paint_stroke` would paint, without painting it"""
+
+        return self.clip_stroke(stroke_mask, pos)[2] * self.scale
+
+    def paint_stroke(self, stroke_mask: pg.Mask, pos: Tuple[int, int], color: pg.Color) -> int:
+        """
+        Paints the parts of `stroke_mask` that are over the paddock.
+
+        Everything is done in the strokes bounds: the paint mask is updated in place and only the pixels
+        that weren't already painted are counted, so a stroke costs the same no matter how big the paddock is.
+
+        returns -> The newly painted area (scaled)
+        """
+
+        stroke_mask, local_pos, new_count = self.clip_stroke(stroke_mask, pos)
+
+        self.paint_mask.draw(stroke_mask, local_pos)
+        self.paint_surface.blit(stroke_mask.to_surface(setcolor=color, unsetcolor=(0, 0, 0, 0)), local_pos)
+
+        # Put on the map by `flush_paint`
+        self.add_paint_dirty_rect(pg.Rect(local_pos, stroke_mask.get_size()))
 
-        self.draw_to_map(draw_normal_surface=False, draw_paint_surface=True)
+        # Only the latest colour is saved (a paddock is only painted by one job at a time)
+        self.paint_color = color
         self.is_painting = True
 
         return new_count * self.scale
@@ -5,6 +5,9 @@ from save_manager import SaveManager
 from resource_manager import ResourceManager
 from paddock import Paddock
 from destination import Destination
+from map_cache import MapCache
+from worker_pool import WorkerPool
+from utils import utils
 from data import *
 
 from math import cos, sin, radians
@@ -17,14 +20,14 @@ class PaddockManager:
 
         return cls.instance
     
-    def init(self, screen: pg.Surface, map_image: pg.Surface, map_paddocks_surf: pg.Surface, paddocks: Dict[int, any], scale: float) -> None:
+    def init(self, screen: pg.Surface, map_image: pg.Surface, map_paddocks_surf: pg.Surface, paddocks: Dict[int, any], scale: float, map_cache: MapCache | None = None) -> None:
         self.screen = screen
         self.map_image = map_image
         self.map_paddocks_surf = map_paddocks_surf
         self.scale = scale
 
         self.paddocks = self.parse_paddocks(paddocks)
-        self.init_paddocks()
+        self.init_paddocks(map_cache)
 
         self.location_callback = None
 
@@ -60,14 +63,36 @@ class PaddockManager:
 
             self.indicators[processed_fill_type] = surface
 
-    def locate_paddock_boundary(self, paddock: Paddock) -> None:
+    def get_paddocks_mask(self) -> pg.Mask:
+        """Every paddock pixel on the map (r, g and b all darker than `PADDOCK_DARKNESS`)"""
+
+        return pg.mask.from_threshold(self.map_image, (0, 0, 0, 255), (PADDOCK_DARKNESS, PADDOCK_DARKNESS, PADDOCK_DARKNESS, 255))
+
+    def extract_paddock_boundary(self, paddock: Paddock, paddocks_mask: pg.Mask) -> None:
+        """Same boundary as `trace_paddock_boundary` but walked in the paddocks mask, so it doesn't call `Surface.get_at` for every pixel"""
+
+        logging.debug(f"Extracting paddock boundary... Paddock: {paddock.num} Center: {paddock.center}")
+
+        paddock.set_boundary(extract_boundary(paddocks_mask, paddock.center))
+
+    def locate_paddock_boundary(self, paddock: Paddock, paddocks_mask: pg.Mask | None = None) -> None:
+        if DEBUG_BOUNDARY_LOADING:
+            # The tracer draws its progress
+            self.trace_paddock_boundary(paddock)
+            return
+
+        if paddocks_mask is None: paddocks_mask = self.get_paddocks_mask()
+
+        self.extract_paddock_boundary(paddock, paddocks_mask)
+
+    def trace_paddock_boundary(self, paddock: Paddock) -> None:
         logging.debug(f"Locating paddock boundary... Paddock: {paddock.num} Center: {paddock.center}")
 
         def rgb_darker_than(rgb: Tuple[int, int, int], brightness: int) -> bool:
             if rgb[0] < brightness and rgb[1] < brightness and rgb[2] < brightness: return True
             return False
         
-        darkness = 110
+        darkness = PADDOCK_DARKNESS
         
         def get_adj_edge(pos: Tuple[int, int], exclusions: List[Tuple[int, int]]) -> Tuple[int, int]:
             for x in range(-1, 2):
@@ -176,15 +201,79 @@ class PaddockManager:
 
             paddock.draw_to_map(False, True)
 
-    def init_paddocks(self) -> None:
-        logging.debug("Initializing paddocks... (This may take some time)")
+    def flush_paint(self) -> None:
+        for paddock in self.paddocks:
+            paddock.flush_paint()
+
+    def init_paddocks(self, map_cache: MapCache | None = None) -> None:
+        logging.debug("Initializing paddocks...")
+
+        # The boundary tracer needs to draw its progress so it skips the cache
+        cached_paddocks = {} if map_cache is None or DEBUG_BOUNDARY_LOADING else map_cache.load()
+
+        uncached_paddocks = []
         
         for paddock in self.paddocks:
-            self.locate_paddock_boundary(paddock)
-            paddock.init_collision()
+            cached_paddock = cached_paddocks.get(str(paddock.num))
+
+            if cached_paddock is not None and cached_paddock["center"] == paddock.center:
+                paddock.set_boundary(cached_paddock["boundary"])
+                paddock.init_collision(cached_paddock["rect"], cached_paddock["mask"])
+            else:
+                uncached_paddocks.append(paddock)
 
+        if len(uncached_paddocks) > 0:
+            # Thresholded once for every paddock that isn't cached
+            paddocks_mask = self.get_paddocks_mask()
+            worker_pool = WorkerPool()
+
+            # With a single core the pool only adds overhead
+            if worker_pool.parallel_workers > 1 and len(uncached_paddocks) > 1 and not DEBUG_BOUNDARY_LOADING:
+                self.init_paddocks_parallel(uncached_paddocks, paddocks_mask, min(worker_pool.parallel_workers, len(uncached_paddocks)))
+            else:
+                for paddock in uncached_paddocks:
+                    self.locate_paddock_boundary(paddock, paddocks_mask)
+                    paddock.init_collision()
+
+        for paddock in self.paddocks:
             paddock.load_state()
 
+        if map_cache is not None and len(uncached_paddocks) > 0:
+            map_cache.save(self.paddocks)
+
+    def init_paddocks_parallel(self, paddocks: List[Paddock], paddocks_mask: pg.Mask, chunk_count: int) -> None:
+        """
+        Boundaries and masks are built in the `WorkerPool` (see `run_paddock_requests`), then the surfaces are made here
+        because they can't leave the process they were made in.
+
+        The paddocks are split into one chunk per worker so the map mask is only sent to and unpacked by each worker once.
+        """
+
+        logging.debug(f"Initializing {len(paddocks)} paddocks in the worker pool ({chunk_count} chunks)...")
+
+        paddocks_mask_bytes = utils.mask_to_bytes(paddocks_mask)
+        chunks = [paddocks[i::chunk_count] for i in range(chunk_count)]
+
+        futures = [WorkerPool().submit(run_paddock_requests, paddocks_mask_bytes, paddocks_mask.get_size(), [paddock.center for paddock in chunk]) for chunk in chunks]
+
+        for chunk, future in zip(chunks, futures):
+            try:
+                results = future.result()
+            except Exception as e:
+                logging.error(f"Initializing paddocks: {[paddock.num for paddock in chunk]} failed in the worker pool! Initializing them inline instead. Error: {e}")
+
+                for paddock in chunk:
+                    self.locate_paddock_boundary(paddock, paddocks_mask)
+                    paddock.init_collision()
+
+                continue
+
+            for paddock, (boundary, rect, mask_bytes) in zip(chunk, results):
+                rect = pg.Rect(rect)
+
+                paddock.set_boundary(boundary)
+                paddock.init_collision(rect, utils.mask_from_bytes(mask_bytes, rect.size))
+
     def get_indicator_position(self, paddock_center: Tuple[float, float], indicator_angle: int) -> Tuple[float, float]:
         dist = 45 * self.scale
         return (PANEL_WIDTH + paddock_center[0] + cos(radians(indicator_angle)) * dist - self.indicator_size / 2, paddock_center[1] + sin(radians(indicator_angle)) * dist - self.indicator_size / 2)
@@ -242,4 +331,88 @@ class PaddockManager:
             paddock_clicked = self.check_paddock_clicks()
 
             if paddock_clicked is not None:
-                self.location_callback(Destination(paddock_clicked))
\ No newline at end of file
+                self.location_callback(Destination(paddock_clicked))
+
+def extract_boundary(paddocks_mask: pg.Mask, center: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """
+    The boundary of the paddock containing `center` in the `PaddockManager.get_paddocks_mask` mask.
+
+    Walks the edge pixels exactly like `PaddockManager.trace_paddock_boundary` (same start, direction, neighbour order and backtracking)
+    so the points are the same, it just reads the mask instead of `Surface.get_at` and looks the visited points up in a set instead of a list.
+    """
+
+    get_at = paddocks_mask.get_at
+
+    # Every pixel next to a non paddock pixel, so a paddock pixel on it is an edge
+    outside = paddocks_mask.copy()
+    outside.invert()
+
+    near_outside = outside.copy()
+    for dx in range(-1, 2):
+        for dy in range(-1, 2):
+            if dx != 0 or dy != 0: near_outside.draw(outside, (dx, dy))
+
+    is_edge = near_outside.get_at
+
+    cx, cy = center
+
+    # Starts on the first non paddock pixel below the center
+    start_y = cy
+    while get_at((cx, start_y)): start_y += 1
+
+    start = (cx, start_y)
+    curr_x, curr_y = start
+
+    boundary = []
+    visited = set()
+    backtrack_index = -1
+
+    while 1:
+        found_new_px = False
+
+        for x in range(-1, 2):
+            for y in range(-1, 2):
+                if x == 0 and y == 0: continue
+
+                point = (curr_x + x, curr_y + y)
+
+                if point == start: # Back to start (Done)
+                    if len(boundary) < 2: continue
+                    return boundary
+
+                if point in visited: continue
+
+                if get_at(point) and is_edge(point):
+                    found_new_px = True
+                    break
+
+            if found_new_px: break
+
+        if found_new_px:
+            boundary.append(point)
+            visited.add(point)
+            curr_x, curr_y = point
+            backtrack_index = -1
+        else:
+            curr_x, curr_y = boundary[backtrack_index]
+            backtrack_index -= 1
+
+def run_paddock_requests(paddocks_mask_bytes: bytes, map_size: Tuple[int, int], centers: List[Tuple[int, int]]) -> List[Tuple[List[Tuple], Tuple[int, int, int, int], bytes]]:
+    """
+    The compute half of initializing paddocks (everything but their surfaces).
+
+    Runs inside the `WorkerPool` processes, so masks go in and out as `utils.mask_to_bytes` bytes.
+
+    returns -> [(boundary, rect, mask bytes)] for each center
+    """
+
+    paddocks_mask = utils.mask_from_bytes(paddocks_mask_bytes, map_size)
+    results = []
+
+    for center in centers:
+        boundary = extract_boundary(paddocks_mask, center)
+        rect = Paddock.get_boundary_rect(boundary)
+
+        results.append((boundary, tuple(rect), utils.mask_to_bytes(Paddock.create_mask(boundary, rect))))
+
+    return results
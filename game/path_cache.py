@@ -0,0 +1,111 @@
+import os
+import logging
+
+from resource_manager import ResourceManager
+from save_manager import SaveManager
+from data import *
+
+from hashlib import sha1
+from collections import OrderedDict
+from typing import List, Tuple, Sequence
+
+class PathCache:
+    """
+    Content-addressed cache for generated working paths.
+
+    A working path only depends on the paddock boundary, the gate, the working width, the amount of outside laps
+    and the skiprow / collision polygon flags, so those inputs are hashed into a key.
+
+    Caches:
+        - In memory (LRU, `PATH_CACHE_MAX_ENTRIES` entries)
+        - On disk in `cache_path` (next to the savegame) so it survives restarts
+    """
+
+    def __new__(cls) -> None:
+        if not hasattr(cls, 'instance'):
+            cls.instance = super(PathCache, cls).__new__(cls)
+            cls.instance.init()
+
+        return cls.instance
+
+    def init(self, max_entries: int = PATH_CACHE_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, Tuple[List[Tuple], List[Tuple]]] = OrderedDict()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def cache_path(self) -> str:
+        """Next to wherever the savegame is now (it can be moved after this is imported, like headless runs do)"""
+
+        return os.path.join(os.path.dirname(SaveManager.SAVE_PATH), "path_cache")
+
+    @staticmethod
+    def make_key(boundary: Sequence[Tuple], gate: Sequence[int], working_width: float, outside_laps: int, skiprow: bool, use_collision_polygon: bool) -> str:
+        boundary_hash = sha1(",".join(f"{px},{py}" for px, py in boundary).encode()).hexdigest()
+        key_str = f"{PATH_CACHE_VERSION}|{PATH_SIMPLIFICATION}|{PATH_SIMPLIFICATION_TOLERANCE}|{PATH_SIMPLIFICATION_MAX_SEGMENT}|{boundary_hash}|{gate[0]},{gate[1]}|{working_width}|{outside_laps}|{skiprow}|{use_collision_polygon}"
+
+        return sha1(key_str.encode()).hexdigest()
+
+    def get_file_path(self, key: str) -> str:
+        return os.path.join(self.cache_path, f"{key}.json")
+
+    def get(self, key: str) -> Tuple[List[Tuple], List[Tuple]] | None:
+        """Returns copies of (path, lap_1) or None if the key is not cached"""
+
+        entry = self.entries.get(key)
+
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+        else:
+            entry = self.load_entry(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.disk_hits += 1
+            self.store_entry(key, entry)
+
+        path, lap_1 = entry
+        return list(path), list(lap_1)
+
+    def put(self, key: str, path: List[Tuple], lap_1: List[Tuple]) -> None:
+        entry = (list(path), list(lap_1))
+
+        self.store_entry(key, entry)
+        self.save_entry(key, entry)
+
+    def store_entry(self, key: str, entry: Tuple[List[Tuple], List[Tuple]]) -> None:
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def load_entry(self, key: str) -> Tuple[List[Tuple], List[Tuple]] | None:
+        file_path = self.get_file_path(key)
+        if not os.path.exists(file_path): return None
+
+        entry_dict = ResourceManager.load_json(file_path, explicit_path=True)
+
+        if "path" not in entry_dict or "lap_1" not in entry_dict:
+            logging.warning(f"Path cache entry: {key} is invalid! Ignoring it...")
+            return None
+
+        return [tuple(point) for point in entry_dict["path"]], [tuple(point) for point in entry_dict["lap_1"]]
+
+    def save_entry(self, key: str, entry: Tuple[List[Tuple], List[Tuple]]) -> None:
+        try:
+            os.makedirs(self.cache_path, exist_ok=True)
+        except OSError as e:
+            logging.error(f"Could not create path cache directory: \"{self.cache_path}\"! Error: {e}")
+            return
+
+        ResourceManager.write_json({"path": entry[0], "lap_1": entry[1]}, self.get_file_path(key), explicit_path=True)
+
+    def get_stats_text(self) -> str:
+        return f"Path cache: {self.hits} hit / {self.disk_hits} disk / {self.misses} miss"
@@ -3,13 +3,300 @@ import logging
 
 from machinary import Tractor, Header, Tool
 from destination import Destination
+from path_cache import PathCache
+from worker_pool import WorkerPool
+from flight_recorder import FlightRecorder
+from spatial_index import PointGrid, KDTree, build_spatial_index
 from utils import utils
 from data import *
 
 from math import sqrt
+from heapq import heappush, heappop
+from concurrent.futures import Future
 from typing import List, Tuple, Sequence, Dict
 from typing_extensions import Self
 
+class BoundaryRing:
+    """
+    Indexed closed boundary (lap) for tracing around.
+
+    Built once per lap:
+        - Coordinate -> first index dict
+        - Prefix summed step lengths for both directions around the ring
+        - Spatial index (`PointGrid` / `KDTree`) for closest point lookups
+
+    The step lengths are the same ones the original list scanning tracer summed (a step always starts at the first
+    occurrence of its coordinate), so both directions compare the same and the traced paths are identical.
+    """
+
+    def __init__(self, points: List[Tuple]) -> None:
+        self.points = points
+        self.grid = build_spatial_index(points)
+
+        self.first_indexes: Dict[Tuple, int] = {}
+        for i, point in enumerate(points):
+            self.first_indexes.setdefault(point, i)
+
+        n = len(points)
+
+        # Step length going forwards (to index + 1) and backwards (to index - 1) from each index
+        self.forward_steps: List[float] = []
+        self.backward_steps: List[float] = []
+
+        for point in points:
+            index = self.first_indexes[point]
+            px, py = points[index]
+
+            nx, ny = points[(index + 1) % n]
+            self.forward_steps.append(sqrt((nx - px) ** 2 + (ny - py) ** 2))
+
+            nx, ny = points[index - 1]
+            self.backward_steps.append(sqrt((nx - px) ** 2 + (ny - py) ** 2))
+
+        self.forward_prefix = [0.0]
+        for step in self.forward_steps: self.forward_prefix.append(self.forward_prefix[-1] + step)
+
+        self.backward_prefix = [0.0]
+        for step in self.backward_steps: self.backward_prefix.append(self.backward_prefix[-1] + step)
+
+    def get_closest_point(self, point: Sequence[float]) -> Tuple | None:
+        closest_index = self.grid.nearest_index(point)
+        if closest_index == -1: return None
+
+        return self.points[closest_index]
+
+    def get_closest_index(self, point: Sequence[float]) -> int:
+        """Returns the first index of the closest point (-1 if the ring is empty)"""
+
+        closest_point = self.get_closest_point(point)
+        if closest_point is None: return -1
+
+        return self.first_indexes[closest_point]
+
+    def get_distances(self, p1_index: int, p2_index: int) -> Tuple[float, float]:
+        """Returns the distance going forwards from p1 to p2 and the distance going backwards from p1 around the end to p2"""
+
+        dist_1 = self.forward_prefix[p2_index] - self.forward_prefix[p1_index]
+        dist_2 = self.forward_prefix[p1_index + 1] + self.backward_prefix[len(self.points)] - self.backward_prefix[p2_index + 1]
+
+        if abs(dist_1 - dist_2) > 1e-6:
+            return dist_1, dist_2
+
+        # Too close to trust the prefix sums rounding, sum them step by step in the same order as the original tracer
+        dist_1 = 0
+        for i in range(p1_index, p2_index): dist_1 += self.forward_steps[i]
+
+        dist_2 = 0
+        for i in range(p1_index, -1, -1): dist_2 += self.forward_steps[i]
+        for i in range(len(self.points) - 1, p2_index, -1): dist_2 += self.backward_steps[i]
+
+        return dist_1, dist_2
+
+    def trace(self, point_end: Sequence[float], point_start: Sequence[float]) -> List[Tuple]:
+        """Returns the shortest way around the ring between the closest points to `point_end` and `point_start`"""
+
+        point_1_index = self.get_closest_index(point_end)
+        point_2_index = self.get_closest_index(point_start)
+
+        # Nothing to go around (the lap shrunk away)
+        if point_1_index == -1 or point_2_index == -1: return []
+
+        if point_1_index > point_2_index:
+            indexes_reversed = True
+            p1_index = point_2_index
+            p2_index = point_1_index
+        else:
+            indexes_reversed = False
+            p1_index = point_1_index
+            p2_index = point_2_index
+
+        dist_1, dist_2 = self.get_distances(p1_index, p2_index)
+
+        if dist_1 < dist_2:
+            path = self.points[p1_index:p2_index]
+        else:
+            path = self.points[p1_index::-1] # p1_index down to 0
+            path.extend(self.points[-1:p2_index-1:-1]) # Going to end of boundary from start so: end_index down to l2 index
+
+        if indexes_reversed:
+            return list(reversed(path))
+        else:
+            return path
+
+class RoadGraph:
+    """
+    Road network for routing transport paths.
+
+    Every road point is a node, consecutive points on a road are joined by an edge and road points that are within
+    `junction_distance` of a point on another road are joined as a junction. Positions are snapped to the closest
+    node with a spatial index (one per connected set of roads) and routed with A*, routes are memoized by node pair.
+    """
+
+    CELL_SIZE: int = 64
+
+    def __init__(self, roads: List[List[Tuple[float, float]]], junction_distance: float) -> None:
+        self.nodes: List[Tuple[float, float]] = []
+        self.edges: List[Dict[int, float]] = []
+
+        road_nodes: List[List[int]] = []
+
+        for road in roads:
+            road_nodes.append([])
+
+            for point in road:
+                road_nodes[-1].append(len(self.nodes))
+                self.nodes.append(tuple(point))
+                self.edges.append({})
+
+            for node_a, node_b in zip(road_nodes[-1], road_nodes[-1][1:]):
+                self.add_edge(node_a, node_b)
+
+        self.add_junctions(road_nodes, junction_distance)
+
+        # Connected components so positions can be snapped onto the same network
+        self.components: List[int] = [-1] * len(self.nodes)
+        self.component_grids: List[PointGrid | KDTree] = []
+        self.component_nodes: List[List[int]] = []
+
+        for node in range(len(self.nodes)):
+            if self.components[node] != -1: continue
+
+            component = len(self.component_nodes)
+            self.component_nodes.append(self.flood_component(node, component))
+            self.component_grids.append(build_spatial_index([self.nodes[i] for i in self.component_nodes[-1]], self.CELL_SIZE))
+
+        self.grid = build_spatial_index(self.nodes, self.CELL_SIZE)
+        self.routes: Dict[Tuple[int, int], List[int]] = {}
+
+        logging.info(f"Built road graph with {len(self.nodes)} nodes and {len(self.component_nodes)} separate road networks.")
+
+    def add_edge(self, node_a: int, node_b: int) -> None:
+        if node_a == node_b: return
+
+        dist = sqrt((self.nodes[node_a][0] - self.nodes[node_b][0]) ** 2 + (self.nodes[node_a][1] - self.nodes[node_b][1]) ** 2)
+
+        self.edges[node_a][node_b] = dist
+        self.edges[node_b][node_a] = dist
+
+    def add_junctions(self, road_nodes: List[List[int]], junction_distance: float) -> None:
+        """Joins road points that are within `junction_distance` of a point on a later road, found with a spatial index instead of checking every pair of points"""
+
+        node_roads = [0] * len(self.nodes)
+        for road, nodes in enumerate(road_nodes):
+            for node in nodes:
+                node_roads[node] = road
+
+        index = build_spatial_index(self.nodes, self.CELL_SIZE)
+        junctions = []
+
+        for node_a in range(len(self.nodes)):
+            for node_b in index.indexes_within(self.nodes[node_a], junction_distance):
+                if node_roads[node_b] > node_roads[node_a]:
+                    junctions.append((node_roads[node_a], node_roads[node_b], node_a, node_b))
+
+        # Added road pair by road pair (like checking every pair did) so the edges, and the routes A* picks between equally short ones, don't change
+        for _, _, node_a, node_b in sorted(junctions):
+            self.add_edge(node_a, node_b)
+
+    def flood_component(self, start_node: int, component: int) -> List[int]:
+        self.components[start_node] = component
+        component_nodes = [start_node]
+        stack = [start_node]
+
+        while len(stack) > 0:
+            node = stack.pop()
+
+            for neighbour in self.edges[node]:
+                if self.components[neighbour] != -1: continue
+
+                self.components[neighbour] = component
+                component_nodes.append(neighbour)
+                stack.append(neighbour)
+
+        return component_nodes
+
+    def snap(self, point: Sequence[float], component: int = -1) -> int:
+        """Returns the closest node to the point (limited to a component if given, -1 if there are no roads)"""
+
+        if component == -1:
+            return self.grid.nearest_index(point)
+
+        return self.component_nodes[component][self.component_grids[component].nearest_index(point)]
+
+    def get_node_dist(self, point: Sequence[float], node: int) -> float:
+        return sqrt((point[0] - self.nodes[node][0]) ** 2 + (point[1] - self.nodes[node][1]) ** 2)
+
+    def snap_pair(self, start: Sequence[float], end: Sequence[float]) -> Tuple[int, int]:
+        """
+        Snaps both ends of a trip onto the same road network.
+
+        The end that is furthest from the roads (usually the shed, which isn't on a road) is the one that gets moved onto the
+        other ends network, so gates and sellpoints always join the road they are actually on.
+        """
+
+        start_node = self.snap(start)
+        end_node = self.snap(end)
+
+        if self.components[start_node] == self.components[end_node]:
+            return start_node, end_node
+
+        if self.get_node_dist(start, start_node) > self.get_node_dist(end, end_node):
+            start_node = self.snap(start, self.components[end_node])
+        else:
+            end_node = self.snap(end, self.components[start_node])
+
+        return start_node, end_node
+
+    def heuristic(self, node: int, goal_node: int) -> float:
+        return sqrt((self.nodes[node][0] - self.nodes[goal_node][0]) ** 2 + (self.nodes[node][1] - self.nodes[goal_node][1]) ** 2)
+
+    def find_route(self, start_node: int, goal_node: int) -> List[int]:
+        """A* between two nodes, returns the nodes on the route (memoized)"""
+
+        route = self.routes.get((start_node, goal_node))
+        if route is not None: return route
+
+        open_heap = [(self.heuristic(start_node, goal_node), start_node)]
+        came_from: Dict[int, int] = {}
+        costs: Dict[int, float] = {start_node: 0.0}
+
+        while len(open_heap) > 0:
+            _, node = heappop(open_heap)
+
+            if node == goal_node: break
+
+            for neighbour, edge_dist in self.edges[node].items():
+                cost = costs[node] + edge_dist
+
+                if cost < costs.get(neighbour, float('inf')):
+                    costs[neighbour] = cost
+                    came_from[neighbour] = node
+                    heappush(open_heap, (cost + self.heuristic(neighbour, goal_node), neighbour))
+
+        if goal_node not in costs:
+            logging.error(f"No road route between nodes: {start_node} and {goal_node}! Driving straight there.")
+            return []
+
+        route = [goal_node]
+        while route[-1] != start_node:
+            route.append(came_from[route[-1]])
+
+        route.reverse()
+
+        self.routes[(start_node, goal_node)] = route
+        self.routes[(goal_node, start_node)] = list(reversed(route))
+
+        return route
+
+    def route(self, start: Sequence[float], end: Sequence[float]) -> List[Tuple[float, float]]:
+        """Returns the road points to drive along to get from start to end (not including either of them)"""
+
+        if len(self.nodes) == 0: return []
+
+        start_node, end_node = self.snap_pair(start, end)
+
+        return [self.nodes[node] for node in self.find_route(start_node, end_node)]
+
 class Job:
     def __init__(self,
                  start_location: Destination,
@@ -19,6 +306,7 @@ class Job:
                  tool: Tool | None,
                  shed_position: Sequence[int],
                  job_id: int,
+                 road_graph: RoadGraph | None = None
                  ) -> None:
         
         self.start_location = start_location
@@ -27,10 +315,13 @@ class Job:
         self.vehicle = vehicle
         self.tool = tool
         self.shed_position = shed_position
+        self.road_graph = road_graph
 
         self.job_id = job_id
 
         self.lap_1 = []
+        self.boundary_rings: Dict[int, BoundaryRing] = {}
+        self.path_cache_key: str | None = None
 
     def to_dict(self) -> Dict[str, any]:
         logging.info(f"Converting job: {self.job_id} to dict...")
@@ -51,62 +342,22 @@ class Job:
 
         return ret_dict
 
-    def get_closest_point_on_boundary(self, point: Tuple, boundary: List[Tuple]) -> Tuple | None:
-        closest_dist = float('inf')
-        closest_point = None
-
-        for px, py in boundary:
-            dist = sqrt((point[0] - px) ** 2 + (point[1] - py) ** 2)
-
-            if dist < closest_dist:
-                closest_dist = dist
-                closest_point = (px, py)
-
-        return closest_point
-
-    def trace_collision_boundary(self, point_end: Tuple, point_start: Tuple, boundary: List[Tuple]) -> List[Tuple]:
-        point_end = self.get_closest_point_on_boundary(point_end, boundary)
-        point_start = self.get_closest_point_on_boundary(point_start, boundary)
-
-        point_1_index = boundary.index(point_end)
-        point_2_index = boundary.index(point_start)
-
-        if point_1_index > point_2_index:
-            indexes_reversed = True
-            p1_index = point_2_index
-            p2_index = point_1_index
-        else:
-            indexes_reversed = False
-            p1_index = point_1_index
-            p2_index = point_2_index
+    def get_boundary_ring(self, boundary: List[Tuple]) -> "BoundaryRing":
+        """Returns the `BoundaryRing` for this boundary, building it the first time the boundary is traced"""
 
-        dist_1 = 0
-        for px, py in boundary[p1_index:p2_index]:
-            index = boundary.index((px, py))
-            nx, ny = boundary[index+1]
-            dist_1 += sqrt((nx - px) ** 2 + (ny - py) ** 2)
+        ring = self.boundary_rings.get(id(boundary))
 
-        dist_2 = 0
-        for px, py in boundary[p1_index::-1]:
-            index = boundary.index((px, py))
-            nx, ny = boundary[index+1]
-            dist_2 += sqrt((nx - px) ** 2 + (ny - py) ** 2)
+        if ring is None or ring.points is not boundary:
+            ring = BoundaryRing(boundary)
+            self.boundary_rings[id(boundary)] = ring
 
-        for px, py in boundary[-1:p2_index:-1]:
-            index = boundary.index((px, py))
-            nx, ny = boundary[index - 1]
-            dist_2 += sqrt((nx - px) ** 2 + (ny - py) ** 2)
+        return ring
 
-        if dist_1 < dist_2:
-            path = boundary[p1_index:p2_index]
-        else:
-            path = boundary[p1_index::-1] # p1_index down to 0
-            path.extend(boundary[-1:p2_index-1:-1]) # Going to end of boundary from start so: end_index down to l2 index
+    def get_closest_point_on_boundary(self, point: Tuple, boundary: List[Tuple]) -> Tuple | None:
+        return self.get_boundary_ring(boundary).get_closest_point(point)
 
-        if indexes_reversed:
-            return list(reversed(path))
-        else:
-            return path
+    def trace_collision_boundary(self, point_end: Tuple, point_start: Tuple, boundary: List[Tuple]) -> List[Tuple]:
+        return self.get_boundary_ring(boundary).trace(point_end, point_start)
 
     def draw_path(self, path: List[Sequence[float]]) -> None:
         if not DEBUG_PATH_GENERATION: return
@@ -118,8 +369,62 @@ class Job:
             pg.display.flip()
             pg.time.wait(1)
 
+    def get_working_path_request(self, paddock_destination: Destination, working_width: float, outside_laps: int = 2, skiprow: bool = False,
+                                 use_collsion_polygon: bool = False) -> Dict[str, any]:
+        """Returns the pure-data description of a working path, this is what gets sent to `run_path_request` and hashed by the `PathCache`"""
+
+        paddock = paddock_destination.destination
+
+        return {
+            "boundary": [tuple(point) for point in paddock.boundary],
+            "gate": tuple(paddock.gate),
+            "working_width": working_width,
+            "outside_laps": outside_laps,
+            "skiprow": skiprow,
+            "use_collision_polygon": use_collsion_polygon
+        }
+
     def generate_working_path(self, paddock_destination: Destination, working_width: float, outside_laps: int = 2, skiprow: bool = False,
                               use_collsion_polygon: bool = False) -> List[Sequence[float]]:
+        """Returns the working path for the paddock, using the `PathCache` if this paddock has been worked with the same settings before"""
+
+        paddock = paddock_destination.destination
+
+        if DEBUG_PATH_GENERATION:
+            # Always build it so it gets drawn
+            return self.build_working_path(paddock.boundary, paddock.gate, working_width, outside_laps, skiprow, use_collsion_polygon)
+
+        path_request, cache_key, cached_path = self.get_cached_working_path(paddock_destination, working_width, outside_laps, skiprow, use_collsion_polygon)
+
+        if cached_path is not None:
+            path, self.lap_1 = cached_path
+            return path
+
+        path, self.lap_1 = run_path_request(path_request)
+        PathCache().put(cache_key, path, self.lap_1)
+
+        return path
+
+    def get_cached_working_path(self, paddock_destination: Destination, working_width: float, outside_laps: int = 2, skiprow: bool = False,
+                                use_collsion_polygon: bool = False) -> Tuple[Dict[str, any], str, Tuple[List[Tuple], List[Tuple]] | None]:
+        """
+        Looks the working path up in the `PathCache`, `generate_working_path` and `plan_path` both go through here so they always agree
+
+        returns -> (path request, cache key, (path, lap_1) or None if it isn't cached)
+        """
+
+        path_request = self.get_working_path_request(paddock_destination, working_width, outside_laps, skiprow, use_collsion_polygon)
+
+        path_cache = PathCache()
+        cache_key = path_cache.make_key(**path_request)
+
+        cached_path = path_cache.get(cache_key)
+        if cached_path is not None: logging.debug(f"Using cached working path for paddock: {paddock_destination.destination.num}.")
+
+        return path_request, cache_key, cached_path
+
+    def build_working_path(self, boundary: List[Tuple], gate: Sequence[int], working_width: float, outside_laps: int = 2, skiprow: bool = False,
+                           use_collsion_polygon: bool = False) -> List[Sequence[float]]:
         """
         How does this work?
 
@@ -151,21 +456,11 @@ class Job:
         """
 
         # Outside laps
-        paddock = paddock_destination.destination
-        boundary = paddock.boundary
-
         lap_1 = utils.shrink_polygon(boundary, working_width / 2)
         self.lap_1 = lap_1
 
         # Find the closest point to the gate
-        closest_dist = float('inf')
-        closest_point_index = 0
-        for i, (px, py) in enumerate(lap_1):
-            dist = sqrt((paddock.gate[0] - px) ** 2 + (paddock.gate[1] - py) ** 2)
-
-            if dist < closest_dist:
-                closest_dist = dist
-                closest_point_index = i
+        closest_point_index = max(0, build_spatial_index(lap_1).nearest_index(gate))
 
         new_lap_1 = lap_1[closest_point_index:]
         new_lap_1.extend(lap_1[:closest_point_index])
@@ -180,17 +475,8 @@ class Job:
         for i in range(outside_laps - 1):
             new_lap = utils.shrink_polygon(boundary, working_width * (i + 1) + working_width / 2)
 
-            closest_dist = float('inf')
-            closest_point_index = new_lap[0]
-            last_lap_point = laps[-1][-1]
-
-            for i, (px, py) in enumerate(new_lap):
-                dist = sqrt((last_lap_point[0] - px) ** 2 + (last_lap_point[1] - py) ** 2)
+            closest_point_index = build_spatial_index(new_lap).nearest_index(laps[-1][-1])
 
-                if dist < closest_dist:
-                    closest_dist = dist
-                    closest_point_index = i 
-            
             finished_lap = new_lap[closest_point_index:]
             finished_lap.extend(new_lap[:closest_point_index])
 
@@ -209,21 +495,22 @@ class Job:
         # A/B Runlines
         collision_polygon_rect = utils.get_polygon_rect(collision_polygon) 
 
-        # TODO: Locallise the polygons position first so surface isnt big
-        collision_polygon_surf = pg.Surface((collision_polygon_rect.x + collision_polygon_rect.w, collision_polygon_rect.y + collision_polygon_rect.h), pg.SRCALPHA)
-        pg.draw.polygon(collision_polygon_surf, (255, 0, 0), collision_polygon)
+        # The surface and mask only cover the polygons bounding box, runline results are translated back by the offset
+        collision_polygon_offset = (collision_polygon_rect.x, collision_polygon_rect.y)
+        local_collision_polygon = [(px - collision_polygon_rect.x, py - collision_polygon_rect.y) for px, py in collision_polygon]
+
+        collision_polygon_surf = pg.Surface(collision_polygon_rect.size, pg.SRCALPHA)
+        pg.draw.polygon(collision_polygon_surf, (255, 0, 0), local_collision_polygon)
         collision_polygon_mask = pg.mask.from_surface(collision_polygon_surf)
 
         north = collision_polygon_rect.h > collision_polygon_rect.w
         ab_runlines = []
 
         if north:
-            for x in range(collision_polygon_rect.x + int(working_width / 2), collision_polygon_rect.x + collision_polygon_rect.w, working_width): # TODO: Locallise the polygons position first so surface isnt big
-                line_start = (x, collision_polygon_rect.y)
-                line_end = (x, collision_polygon_rect.y + collision_polygon_rect.h)
-
-                point_collisions_list = utils.line_collides_mask((line_start, line_end), collision_polygon_mask, collision_polygon_rect)
+            line_positions = range(int(working_width / 2), collision_polygon_rect.w, working_width)
+            runline_collisions = utils.runlines_collide_mask(collision_polygon_mask, line_positions, 0, collision_polygon_rect.h, north, collision_polygon_offset)
 
+            for point_collisions_list in runline_collisions:
                 point_collisions = []
                 for i, col_list in enumerate(point_collisions_list):
                     point_collisions.extend(col_list[::10]) # Every 10 px
@@ -240,14 +527,12 @@ class Job:
 
                 ab_runlines.append(point_collisions)
         else:
-            for y in range(collision_polygon_rect.y + int(working_width / 2), collision_polygon_rect.y + collision_polygon_rect.h, working_width): # TODO: Locallise the polygons position first so surface isnt big
-                line_start = (collision_polygon_rect.x, y)
-                line_end = (collision_polygon_rect.x + collision_polygon_rect.w, y)
-
-                point_collisions_list = utils.line_collides_mask((line_start, line_end), collision_polygon_mask, collision_polygon_rect)[::10]
+            line_positions = range(int(working_width / 2), collision_polygon_rect.h, working_width)
+            runline_collisions = utils.runlines_collide_mask(collision_polygon_mask, line_positions, 0, collision_polygon_rect.w, north, collision_polygon_offset)
 
+            for point_collisions_list in runline_collisions:
                 point_collisions = []
-                for col_list in point_collisions_list:
+                for i, col_list in enumerate(point_collisions_list):
                     point_collisions.extend(col_list[::10]) # Every 10 px
 
                     if i >= len(point_collisions_list) - 1: break
@@ -310,7 +595,7 @@ class Job:
                 path.extend(self.trace_collision_boundary(directed_runline[-1], directed_next_runline[0], lap_1))
 
         # Go from last runline to gate around boundary
-        path.extend(self.trace_collision_boundary(path[-1], paddock.gate, lap_1))
+        path.extend(self.trace_collision_boundary(path[-1], gate, lap_1))
 
         # Postprocessing: if there are any points too farm away, force them to trace collision boundary
         postprocessed_path = []
@@ -328,55 +613,73 @@ class Job:
 
             postprocessed_path.append(p2)
 
+        if PATH_SIMPLIFICATION:
+            simplified_path = utils.simplify_path(postprocessed_path, Tractor.PATH_POP_RADIUS * PATH_SIMPLIFICATION_TOLERANCE, Tractor.PATH_POP_RADIUS * PATH_SIMPLIFICATION_MAX_SEGMENT)
+            logging.debug(f"Simplified working path from {len(postprocessed_path)} to {len(simplified_path)} points.")
+
+            return simplified_path
+
         return postprocessed_path
 
-    def generate_transport_path(self, start_location_position: Sequence[float], end_location_position: Sequence[float], from_shed: bool) -> List[Sequence[float]]:
-        # CAUTION: Assumes if it is not coming from shed it is going to shed
+    def generate_transport_path(self, start_location_position: Sequence[float], end_location_position: Sequence[float]) -> List[Sequence[float]]:
+        """Routes along the roads from the start to the end location"""
 
-        sx, sy = start_location_position
-        tx, ty = end_location_position
+        if self.road_graph is None:
+            # Every job that goes on the roads shares the sheds graph (its junctions are found with the map scaled junction distance)
+            raise ValueError(f"Job {self.job_id} has no road graph to route a transport path with! Jobs on the roads must be given the sheds RoadGraph.")
 
-        path = []
+        path = self.road_graph.route(start_location_position, end_location_position)
+        path.append(tuple(end_location_position))
 
-        if from_shed:
-            closest_dist = float('inf')
-            closest_road = None
-            closest_point = None
-            
-            for road in self.roads:
-                for px, py in road:
-                    dist = sqrt((tx - px) ** 2 + (ty - py) ** 2)
+        return path
 
-                    if dist < closest_dist:
-                        closest_dist = dist
-                        closest_road = road
-                        closest_point = (px, py)
+    def get_working_width(self) -> float | None:
+        """Returns the working width if this job generates a working path, otherwise None"""
 
-            path = [point for point in closest_road[closest_road.index(closest_point):]]
+        if not (self.start_location.is_paddock and self.end_location.is_paddock): return None
 
-            if sqrt((sx - path[0][0]) ** 2 + (sy - path[0][1]) ** 2) > sqrt((tx - path[0][0]) ** 2 + (ty - path[0][1]) ** 2):
-                path = list(reversed(path))
+        if self.tool is None: return self.vehicle.working_width
+        if self.tool.tool_type == "Trailers": return None
 
-        else:
-            closest_dist = float('inf')
-            closest_road = None
-            closest_point = None
+        return self.tool.working_width
+
+    def plan_path(self) -> Future:
+        """
+        Returns a `Future` for this jobs path (use `collect_path` to get it).
+
+        Working paths which aren't cached are built by the `WorkerPool` so the frame doesn't hitch.
+        Everything else is cheap so it is generated straight away and the future is already done.
+        """
+
+        self.path_cache_key = None
+        working_width = self.get_working_width()
 
-            for road in self.roads:
-                for px, py in road:
-                    dist = sqrt((sx - px) ** 2  + (sy - py) ** 2)
+        if working_width is None or DEBUG_PATH_GENERATION:
+            return WorkerPool.completed((self.generate_path(), self.lap_1))
 
-                    if dist < closest_dist:
-                        closest_dist = dist
-                        closest_road = road
-                        closest_point = (px, py)
+        path_request, cache_key, cached_path = self.get_cached_working_path(self.end_location, working_width, WORKING_PATH_OUTSIDE_LAPS, WORKING_PATH_SKIPROW)
+        if cached_path is not None: return WorkerPool.completed(cached_path)
 
-            path = [point for point in closest_road[closest_road.index(closest_point):]]
+        logging.info(f"Planning working path for job: {self.job_id}...")
 
-            if sqrt((sx - path[0][0]) ** 2 + (sy - path[0][1]) ** 2) > sqrt((tx - path[0][0]) ** 2 + (ty - path[0][1]) ** 2):
-                path = list(reversed(path))
+        self.path_cache_key = cache_key
+        return WorkerPool().submit(run_path_request, path_request)
+
+    def collect_path(self, path_future: Future) -> List[Tuple[float, float]]:
+        """Returns the path from a finished `plan_path` future (blocks if it isn't finished)"""
+
+        try:
+            path, self.lap_1 = path_future.result()
+        except Exception as e:
+            logging.error(f"Planning path for job: {self.job_id} failed in the worker pool! Generating it inline instead. Error: {e}")
+
+            self.path_cache_key = None
+            return self.generate_path()
+
+        if self.path_cache_key is not None:
+            PathCache().put(self.path_cache_key, path, self.lap_1)
+            self.path_cache_key = None
 
-        path.append((tx, ty))
         return path
 
     def generate_path(self) -> List[Tuple[float, float]]:
@@ -385,54 +688,73 @@ class Job:
             if self.start_location.is_paddock:
                 if self.end_location.is_paddock:
                     # Generate working
-                    return self.generate_working_path(self.end_location, self.vehicle.working_width, outside_laps=2, skiprow=True)
+                    return self.generate_working_path(self.end_location, self.get_working_width(), WORKING_PATH_OUTSIDE_LAPS, WORKING_PATH_SKIPROW)
                 else:
                     # Go home
-                    return self.generate_transport_path(self.start_location.destination.gate, self.end_location.get_pos(), from_shed=False)
+                    return self.generate_transport_path(self.start_location.destination.gate, self.end_location.get_pos())
             else:
                 if self.end_location.is_paddock:
                     # Go to paddock
-                    return self.generate_transport_path((0, 0), self.end_location.destination.gate, from_shed=True)
+                    return self.generate_transport_path(self.shed_position, self.end_location.destination.gate)
 
         elif self.tool.tool_type == "Trailers":
             if self.end_location.is_paddock:
                 # Unloading header
                 # WARNING: Assumes you are at the shed
-                return self.generate_transport_path((0, 0), self.end_location.destination.gate, from_shed=True)
+                return self.generate_transport_path(self.shed_position, self.end_location.destination.gate)
             elif self.end_location.is_sellpoint:
                 # Assumes you are at the shed (may work if you aren't, I'm not sure)
-                return self.generate_transport_path(tuple(self.vehicle.position), self.end_location.destination.pos, from_shed=True)
+                return self.generate_transport_path(tuple(self.vehicle.position), self.end_location.destination.pos)
 
             if self.start_location.is_paddock:
                 # At gate (full) -> silo
                 # WARNING: THIS ASSUMES THE SILO IS RIGHT NEXT TO THE SHED AND CAN BE ACCESSED FROM THE SHED WITHOUT ANY ROADS!!!!!
                 # WILL ONLY WORK ON BASE MAP (GREEN SPRINGS)
-                return self.generate_transport_path(self.start_location.destination.gate, self.end_location.destination.pos, from_shed=False)
+                return self.generate_transport_path(self.start_location.destination.gate, self.end_location.destination.pos)
             elif self.end_location.is_shed:
                 # Go to shed
-                return self.generate_transport_path(self.start_location.destination.pos, self.end_location.get_pos(), from_shed=False)
+                return self.generate_transport_path(self.start_location.destination.pos, self.end_location.get_pos())
             else:
                 # Assumes you are at the shed
-                return self.generate_transport_path((0, 0), self.end_location.destination.pos, from_shed=True)
+                return self.generate_transport_path(self.shed_position, self.end_location.destination.pos)
 
         else:
             if self.start_location.is_paddock:
                 if self.end_location.is_paddock:
                     # Generate working
-                    return self.generate_working_path(self.end_location, self.tool.working_width, outside_laps=2, skiprow=True)
+                    return self.generate_working_path(self.end_location, self.get_working_width(), WORKING_PATH_OUTSIDE_LAPS, WORKING_PATH_SKIPROW)
                 else:
                     # Go home
-                    return self.generate_transport_path(self.start_location.destination.gate, self.shed_position, from_shed=False)
+                    return self.generate_transport_path(self.start_location.destination.gate, self.shed_position)
             else:
                 if self.end_location.is_paddock:
                     # Go to paddock
-                    return self.generate_transport_path((0, 0), self.end_location.destination.gate, from_shed=True)
+                    return self.generate_transport_path(self.shed_position, self.end_location.destination.gate)
+
+def run_path_request(path_request: Dict[str, any]) -> Tuple[List[Tuple], List[Tuple]]:
+    """
+    Builds a working path from a `Job.get_working_path_request` dict.
+
+    Runs inside the `WorkerPool` processes, so it only takes and returns pure data.
+
+    returns -> (path, lap_1)
+    """
+
+    job = Job(None, None, [], None, None, (0, 0), -1)
+    path = job.build_working_path(path_request["boundary"], path_request["gate"], path_request["working_width"], path_request["outside_laps"],
+                                  path_request["skiprow"], path_request["use_collision_polygon"])
+
+    return path, job.lap_1
 
 class TaskManager:
-    def __init__(self, vehicles: List, tools: List, roads: List, shed_position: Sequence[int], fully_load_destination: object) -> None:
+    def __init__(self, vehicles: List, tools: List, roads: List, shed_position: Sequence[int], fully_load_destination: object, road_graph: RoadGraph) -> None:
         self.vehicles = vehicles
         self.tools = tools
         self.roads = roads
+
+        # Every job it creates can go on the roads, so fail here rather than when one first plans a transport path
+        if road_graph is None: raise ValueError("TaskManager needs the sheds RoadGraph to route its jobs on the roads!")
+        self.road_graph = road_graph
         self.shed_position = shed_position
         self.fully_load_destination = fully_load_destination
 
@@ -444,9 +766,11 @@ class TaskManager:
         else:
             job_id = forced_job_id
 
-        job = Job(start_location, end_location, self.roads, vehicle, tool, self.shed_position, job_id)
+        job = Job(start_location, end_location, self.roads, vehicle, tool, self.shed_position, job_id, self.road_graph)
         self.jobs.append(job)
 
+        FlightRecorder().record_event("job created", f"job {job_id}")
+
         return job
 
     def load_job_from_dict(self, job_dict: Dict[str, any]) -> Job:
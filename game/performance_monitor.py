@@ -1,13 +1,138 @@
 import pygame as pg
+import os
+import csv
+import json
+import logging
 
-from typing import Sequence, List
+from path_cache import PathCache
+from save_manager import SaveManager
+from data import *
+
+from time import perf_counter, strftime
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, List, Sequence
 
 pg.init()
 
+class FrameProfiler:
+    """
+    Scoped timers for the stages of a frame.
+
+    `stage` times a block, stages inside other stages are named "parent/child". `end_frame` pushes the frames
+    totals into a ring buffer of the last `history` frames for every stage (0 if a stage didn't run), which
+    `get_stats` takes percentiles from. When profiling is disabled `stage` does nothing.
+    """
+
+    PERCENTILES: Sequence[int] = (50, 95, 99)
+
+    def __new__(cls) -> None:
+        if not hasattr(cls, 'instance'):
+            cls.instance = super(FrameProfiler, cls).__new__(cls)
+            cls.instance.init()
+
+        return cls.instance
+
+    def init(self, history: int = PROFILER_HISTORY, enabled: bool = PROFILE_FRAMES) -> None:
+        self.history = history
+        self.enabled = enabled
+
+        self.frames: Dict[str, deque] = {} # stage: frame times (ms)
+        self.frame_count = 0
+
+        self.current_frame: Dict[str, float] = {}
+        self.last_frame: Dict[str, float] = {}
+        self.stage_stack: List[str] = []
+
+    @contextmanager
+    def _timed_stage(self, name: str) -> Iterator[None]:
+        if len(self.stage_stack) > 0: name = f"{self.stage_stack[-1]}/{name}"
+
+        self.stage_stack.append(name)
+        start = perf_counter()
+
+        try:
+            yield
+        finally:
+            self.current_frame[name] = self.current_frame.get(name, 0.0) + (perf_counter() - start) * 1000
+            self.stage_stack.pop()
+
+    def stage(self, name: str) -> contextmanager:
+        if not self.enabled: return nullcontext()
+        return self._timed_stage(name)
+
+    def end_frame(self) -> None:
+        if not self.enabled: return
+
+        for name in self.current_frame:
+            if name not in self.frames:
+                # Stages that show up later didn't take any time in the frames before them
+                self.frames[name] = deque([0.0] * min(self.frame_count, self.history), maxlen=self.history)
+
+        for name, frame_times in self.frames.items():
+            frame_times.append(self.current_frame.get(name, 0.0))
+
+        self.last_frame = self.current_frame
+        self.current_frame = {}
+        self.frame_count += 1
+
+    @property
+    def export_path(self) -> str:
+        """Next to wherever the savegame is now (it can be moved after this is imported, like headless runs do)"""
+
+        return os.path.join(os.path.dirname(SaveManager.SAVE_PATH), "profiles")
+
+    @property
+    def top_level_stages(self) -> List[str]:
+        return [name for name in self.frames if "/" not in name]
+
+    def get_stats(self, name: str) -> Dict[str, float]:
+        """p50, p95, p99 and max of the stages frame times (ms)"""
+
+        frame_times = sorted(self.frames.get(name, ()))
+        if len(frame_times) == 0: return {f"p{percentile}": 0.0 for percentile in self.PERCENTILES} | {"max": 0.0}
+
+        stats = {f"p{percentile}": frame_times[min(len(frame_times) - 1, round(percentile / 100 * (len(frame_times) - 1)))] for percentile in self.PERCENTILES}
+        stats["max"] = frame_times[-1]
+
+        return stats
+
+    def export(self, file_path: str) -> None:
+        """Writes the frame times of every stage, as JSON (with stats) if `file_path` ends with .json, otherwise CSV"""
+
+        logging.info(f"Exporting frame profile to: \"{file_path}\"...")
+
+        try:
+            with open(file_path, "w", newline="") as f:
+                if file_path.endswith(".json"):
+                    json.dump({name: {"stats": self.get_stats(name), "frames": list(frame_times)} for name, frame_times in self.frames.items()}, f)
+                else:
+                    writer = csv.writer(f)
+                    writer.writerow(["frame"] + list(self.frames))
+                    writer.writerows([i] + [round(self.frames[name][i], 4) for name in self.frames] for i in range(len(next(iter(self.frames.values()), ()))))
+
+        except OSError as e:
+            logging.error(f"Could not export frame profile to: \"{file_path}\"! Error: {e}")
+
+    def export_all(self) -> None:
+        try:
+            os.makedirs(self.export_path, exist_ok=True)
+        except OSError as e:
+            logging.error(f"Could not create frame profile directory: \"{self.export_path}\"! Error: {e}")
+            return
+
+        file_name = os.path.join(self.export_path, f"frame_profile_{strftime('%Y%m%d_%H%M%S')}")
+
+        self.export(f"{file_name}.csv")
+        self.export(f"{file_name}.json")
+
 class PerformanceMonitor:
     TARGET_FPS: float = 60.0
     TARGET_FRAME_TIME: float = 1000.0 / TARGET_FPS
 
+    STAGE_COLORS: Sequence[Sequence[int]] = ((230, 25, 75), (60, 180, 75), (255, 225, 25), (0, 130, 200), (245, 130, 48), (145, 30, 180), (70, 240, 240), (240, 50, 230))
+    STATS_INTERVAL: int = 30 # Frames between rebuilding the stats text
+
     def __init__(self, parent_surface: pg.Surface, pos: Sequence[int]) -> None:
         self.parent_surface = parent_surface
         self.pos = pos
@@ -15,8 +140,14 @@ class PerformanceMonitor:
         self.rendered_surface = pg.Surface((120, 100), pg.SRCALPHA)
         self.rendered_surface.set_alpha(128)
 
+        self.stages_surface = pg.Surface((FrameProfiler().history, 100), pg.SRCALPHA)
+        self.stages_surface.set_alpha(160)
+
         self.last_120_frames: List[float] = []
 
+        self.stats_font = pg.font.SysFont(None, 24)
+        self.stats_surfaces: List[pg.Surface] = []
+
     def get_frame_color(self, frame_percent: float) -> pg.Color:
         r = max(0, min(255, int(255 * (1 - (frame_percent / self.TARGET_FPS)))))
         g = max(0, min(255, int(255 * (frame_percent / self.TARGET_FPS))))
@@ -24,6 +155,41 @@ class PerformanceMonitor:
 
         return pg.Color(r, g, b)
 
+    def draw_stages(self, y: int) -> None:
+        """Stacked bar of the top level stages every frame (the full height is `TARGET_FRAME_TIME`) and their stats"""
+
+        profiler = FrameProfiler()
+        stages = profiler.top_level_stages
+
+        self.stages_surface.fill((50, 50, 200))
+        height = self.stages_surface.get_height()
+
+        frame_count = len(profiler.frames[stages[0]]) if len(stages) > 0 else 0
+
+        for x in range(frame_count):
+            bottom = height
+
+            for i, name in enumerate(stages):
+                bar_height = profiler.frames[name][x] / self.TARGET_FRAME_TIME * height
+                if bar_height <= 0: continue
+
+                pg.draw.line(self.stages_surface, self.STAGE_COLORS[i % len(self.STAGE_COLORS)], (x, bottom), (x, bottom - bar_height))
+                bottom -= bar_height
+
+        self.parent_surface.blit(self.stages_surface, (self.pos[0], y))
+        y += height
+
+        if profiler.frame_count % self.STATS_INTERVAL == 0 or len(self.stats_surfaces) != len(stages):
+            self.stats_surfaces = []
+
+            for i, name in enumerate(stages):
+                stats = "  ".join(f"{stat} {value:.1f}" for stat, value in profiler.get_stats(name).items())
+                self.stats_surfaces.append(self.stats_font.render(f"{name}: {stats} ms", True, self.STAGE_COLORS[i % len(self.STAGE_COLORS)], (50, 50, 200)))
+
+        for stats_surface in self.stats_surfaces:
+            self.parent_surface.blit(stats_surface, (self.pos[0], y))
+            y += stats_surface.get_height()
+
     def draw(self) -> None:
         self.rendered_surface.fill((50, 50, 200))
 
@@ -33,7 +199,13 @@ class PerformanceMonitor:
 
         self.parent_surface.blit(self.rendered_surface, self.pos)
 
+        path_cache_text = self.stats_font.render(PathCache().get_stats_text(), True, (255, 255, 255), (50, 50, 200))
+        self.parent_surface.blit(path_cache_text, (self.pos[0], self.pos[1] + self.rendered_surface.get_height()))
+
+        if FrameProfiler().enabled:
+            self.draw_stages(self.pos[1] + self.rendered_surface.get_height() + path_cache_text.get_height())
+
     def update(self, delta_time: float) -> None:
         if len(self.last_120_frames) == 120: self.last_120_frames.pop(0)
 
-        self.last_120_frames.append(round(1.0 / (delta_time / 1000.0 + 0.00000001), 2)) # gets current FPS
\ No newline at end of file
+        self.last_120_frames.append(round(1.0 / (delta_time / 1000.0 + 0.00000001), 2)) # gets current FPS
@@ -5,6 +5,7 @@ from resource_manager import ResourceManager
 
 from paddock import Paddock
 from machinary import Tractor, Header, Tool
+from flight_recorder import FlightRecorder
 from data import *
 
 if BUILD and TARGETING_ANDROID:
@@ -17,6 +18,7 @@ from typing import Dict, List, Sequence
 
 class SaveManager:
     SAVE_PATH: str = os.path.join(app_storage_path(), "farmceo_savegame.json")
+    PAINT_SAVE_PATH: str = os.path.join(app_storage_path(), "farmceo_paint.json")
 
     def __new__(cls) -> None:
         if not hasattr(cls, 'instance'):
@@ -87,6 +89,8 @@ class SaveManager:
             }
         }
 
+        self.new_savefile = False
+
         self.load_game()
         if self.save == {}: self.init_savefile()
 
@@ -140,6 +144,7 @@ class SaveManager:
 
     def save_game(self, update_equipment_dicts: bool = True, update_paddocks: bool = True) -> None:
         logging.info("Saving game...")
+        FlightRecorder().record_event("save")
 
         if update_equipment_dicts:
             self.get_vehicles_dict()
@@ -156,6 +161,7 @@ class SaveManager:
 
         if update_paddocks:
             self.update_paddocks()
+            self.save_paint()
 
         logging.debug(f"Writing savegame file: \"{self.SAVE_PATH}\"...")
         ResourceManager.write_json(self.save, self.SAVE_PATH, explicit_path=True)
@@ -252,6 +258,34 @@ class SaveManager:
 
         self.set_attr("paddocks", paddocks_dict)
 
+    def save_paint(self) -> None:
+        """All the paddocks paint in one file (kept out of the savegame so it stays readable)"""
+
+        paint = {"version": PAINT_SAVE_VERSION, "paddocks": {}}
+
+        for paddock in self.paddocks:
+            paint_dict = paddock.paint_to_dict()
+            if paint_dict is not None: paint["paddocks"][paddock.num] = paint_dict
+
+        logging.debug(f"Writing paint file: \"{self.PAINT_SAVE_PATH}\"...")
+        ResourceManager.write_json(paint, self.PAINT_SAVE_PATH, explicit_path=True)
+
+    def load_paint(self) -> None:
+        """Needs the paddocks to be patched in first"""
+
+        if self.new_savefile or not os.path.exists(self.PAINT_SAVE_PATH): return
+
+        logging.debug(f"Loading paint file: \"{self.PAINT_SAVE_PATH}\"...")
+        paint = ResourceManager.load_json(self.PAINT_SAVE_PATH, explicit_path=True)
+
+        if paint.get("version") != PAINT_SAVE_VERSION:
+            logging.warning(f"Paint file: \"{self.PAINT_SAVE_PATH}\" is from a different version! Ignoring it...")
+            return
+
+        for paddock in self.paddocks:
+            paint_dict = paint["paddocks"].get(str(paddock.num))
+            if paint_dict is not None: paddock.load_paint_dict(paint_dict)
+
     def load_equipment_from_dicts(self) -> None:
         # Cannot reassign these lists because they are references to the shed lists
         for existing_vehicle in self.vehicles: self.vehicles.remove(existing_vehicle)
@@ -267,6 +301,10 @@ class SaveManager:
         self.vehicles_dict = {}
 
         for vehicle in self.vehicles:
+            if vehicle.planning:
+                # The planned path needs to be saved with the vehicle
+                vehicle.finish_planning()
+
             self.vehicles_dict[vehicle.vehicle_id] = {
                 "header": isinstance(vehicle, Header),
                 "brand": vehicle.brand,
@@ -285,7 +323,7 @@ class SaveManager:
                 "stringTask": vehicle.string_task,
                 "active": vehicle.active,
                 "destination": vehicle.destination.to_dict(),
-                "path": vehicle.path,
+                "path": vehicle.path.to_dict(),
             }
 
             if vehicle.job is not None:
@@ -0,0 +1,256 @@
+try:
+    import numpy as np
+    NUMPY_AVAILABLE: bool = True
+except ImportError:
+    NUMPY_AVAILABLE: bool = False
+
+from data import *
+
+from math import sqrt
+from typing import List, Tuple, Sequence, Dict
+
+class PointGrid:
+    """
+    Uniform grid of points for nearest point and radius lookups.
+
+    Points are bucketed into square cells and only the rings of cells around the query are searched.
+    Ties are broken by the lowest index so it gives the same result as a linear scan using `<`.
+    """
+
+    CELL_SIZE: int = 16
+
+    def __init__(self, points: Sequence[Sequence[float]], cell_size: int = CELL_SIZE) -> None:
+        self.points = points
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+
+        for i, (px, py) in enumerate(points):
+            self.cells.setdefault((int(px // cell_size), int(py // cell_size)), []).append(i)
+
+        cell_xs = [cell[0] for cell in self.cells]
+        cell_ys = [cell[1] for cell in self.cells]
+
+        self.min_cell_x, self.max_cell_x = min(cell_xs, default=0), max(cell_xs, default=0)
+        self.min_cell_y, self.max_cell_y = min(cell_ys, default=0), max(cell_ys, default=0)
+
+    def get_ring_cells(self, cx: int, cy: int, ring: int) -> List[Tuple[int, int]]:
+        if ring == 0: return [(cx, cy)]
+
+        min_x, max_x = max(cx - ring, self.min_cell_x), min(cx + ring, self.max_cell_x)
+        min_y, max_y = max(cy - ring, self.min_cell_y), min(cy + ring, self.max_cell_y)
+
+        ring_cells = []
+
+        for x in range(min_x, max_x + 1):
+            if cy - ring >= self.min_cell_y: ring_cells.append((x, cy - ring))
+            if cy + ring <= self.max_cell_y: ring_cells.append((x, cy + ring))
+
+        for y in range(max(min_y, cy - ring + 1), min(max_y, cy + ring - 1) + 1):
+            if cx - ring >= self.min_cell_x: ring_cells.append((cx - ring, y))
+            if cx + ring <= self.max_cell_x: ring_cells.append((cx + ring, y))
+
+        return ring_cells
+
+    def nearest_index(self, point: Sequence[float]) -> int:
+        """Returns the index of the closest point (-1 if there are no points)"""
+
+        x, y = point
+        cx, cy = int(x // self.cell_size), int(y // self.cell_size)
+
+        closest_dist = float('inf')
+        closest_index = -1
+
+        max_ring = max(abs(cx - self.min_cell_x), abs(cx - self.max_cell_x), abs(cy - self.min_cell_y), abs(cy - self.max_cell_y))
+
+        for ring in range(max_ring + 1):
+            # Anything in this ring is at least (ring - 1) cells away
+            if closest_dist < (ring - 1) * self.cell_size: break
+
+            for cell in self.get_ring_cells(cx, cy, ring):
+                for i in self.cells.get(cell, ()):
+                    px, py = self.points[i]
+                    dist = sqrt((x - px) ** 2 + (y - py) ** 2)
+
+                    if dist < closest_dist or (dist == closest_dist and i < closest_index):
+                        closest_dist = dist
+                        closest_index = i
+
+        return closest_index
+
+    def indexes_within(self, point: Sequence[float], radius: float) -> List[int]:
+        """Returns the indexes of every point within `radius` of the point (inclusive), lowest first"""
+
+        x, y = point
+        indexes = []
+
+        min_cx, max_cx = max(int((x - radius) // self.cell_size), self.min_cell_x), min(int((x + radius) // self.cell_size), self.max_cell_x)
+        min_cy, max_cy = max(int((y - radius) // self.cell_size), self.min_cell_y), min(int((y + radius) // self.cell_size), self.max_cell_y)
+
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                for i in self.cells.get((cx, cy), ()):
+                    px, py = self.points[i]
+
+                    if sqrt((x - px) ** 2 + (y - py) ** 2) <= radius:
+                        indexes.append(i)
+
+        return sorted(indexes)
+
+class KDTree:
+    """
+    2D KD-tree for nearest point and radius lookups, built with NumPy.
+
+    Nodes are stored flat in lists: inner nodes split on the axis with the widest spread and leaves hold up to
+    `LEAF_SIZE` point indexes. Every node keeps its bounding box so whole nodes can be skipped once the closest
+    point found so far is nearer than the box. Like `PointGrid`, ties are broken by the lowest index.
+    """
+
+    LEAF_SIZE: int = 8
+
+    def __init__(self, points: Sequence[Sequence[float]]) -> None:
+        self.points = points
+
+        # Inner node: (left node, right node, None), leaf: (-1, -1, indexes)
+        self.nodes: List[Tuple[int, int, List[int] | None]] = []
+        self.boxes: List[Tuple[float, float, float, float]] = []
+
+        if len(points) == 0:
+            self.root = -1
+            return
+
+        coords = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.root = self.build(coords, np.arange(len(points)))
+
+    def build(self, coords: "np.ndarray", indexes: "np.ndarray") -> int:
+        node = len(self.nodes)
+
+        node_coords = coords[indexes]
+        min_x, min_y = node_coords.min(axis=0).tolist()
+        max_x, max_y = node_coords.max(axis=0).tolist()
+
+        self.boxes.append((min_x, min_y, max_x, max_y))
+
+        if len(indexes) <= self.LEAF_SIZE:
+            self.nodes.append((-1, -1, sorted(indexes.tolist())))
+            return node
+
+        axis = 0 if max_x - min_x >= max_y - min_y else 1
+
+        order = indexes[np.argsort(node_coords[:, axis], kind="stable")]
+        middle = len(order) // 2
+
+        self.nodes.append(None)
+        left = self.build(coords, order[:middle])
+        right = self.build(coords, order[middle:])
+        self.nodes[node] = (left, right, None)
+
+        return node
+
+    def get_box_dist(self, x: float, y: float, node: int) -> float:
+        min_x, min_y, max_x, max_y = self.boxes[node]
+
+        dx = min_x - x if x < min_x else (x - max_x if x > max_x else 0)
+        dy = min_y - y if y < min_y else (y - max_y if y > max_y else 0)
+
+        return sqrt(dx * dx + dy * dy)
+
+    def nearest_index(self, point: Sequence[float]) -> int:
+        """Returns the index of the closest point (-1 if there are no points)"""
+
+        if self.root == -1: return -1
+
+        x, y = point
+
+        closest_dist = float('inf')
+        closest_index = -1
+
+        # (node, distance to the nodes box)
+        stack = [(self.root, 0.0)]
+
+        while len(stack) > 0:
+            node, box_dist = stack.pop()
+            if box_dist > closest_dist: continue
+
+            left, right, leaf_indexes = self.nodes[node]
+
+            if leaf_indexes is not None:
+                for i in leaf_indexes:
+                    px, py = self.points[i]
+                    dist = sqrt((x - px) ** 2 + (y - py) ** 2)
+
+                    if dist < closest_dist or (dist == closest_dist and i < closest_index):
+                        closest_dist = dist
+                        closest_index = i
+
+                continue
+
+            left_dist = self.get_box_dist(x, y, left)
+            right_dist = self.get_box_dist(x, y, right)
+
+            # Push the further child first so the closer one gets searched first
+            if left_dist <= right_dist:
+                stack.append((right, right_dist))
+                stack.append((left, left_dist))
+            else:
+                stack.append((left, left_dist))
+                stack.append((right, right_dist))
+
+        return closest_index
+
+    def indexes_within(self, point: Sequence[float], radius: float) -> List[int]:
+        """Returns the indexes of every point within `radius` of the point (inclusive), lowest first"""
+
+        if self.root == -1: return []
+
+        x, y = point
+        indexes = []
+        stack = [self.root]
+
+        while len(stack) > 0:
+            node = stack.pop()
+            if self.get_box_dist(x, y, node) > radius: continue
+
+            left, right, leaf_indexes = self.nodes[node]
+
+            if leaf_indexes is None:
+                stack.append(left)
+                stack.append(right)
+                continue
+
+            for i in leaf_indexes:
+                px, py = self.points[i]
+
+                if sqrt((x - px) ** 2 + (y - py) ** 2) <= radius:
+                    indexes.append(i)
+
+        return sorted(indexes)
+
+def build_spatial_index(points: Sequence[Sequence[float]], cell_size: int = PointGrid.CELL_SIZE) -> PointGrid | KDTree:
+    """
+    Returns a nearest point index for the points.
+
+    Big point sets use the `KDTree` when NumPy is available (it doesn't care how spread out the points are),
+    everything else uses the `PointGrid`.
+    """
+
+    if NUMPY_AVAILABLE and len(points) >= SPATIAL_INDEX_KDTREE_MIN_POINTS:
+        return KDTree(points)
+
+    return PointGrid(points, cell_size)
+
+def linear_nearest_index(points: Sequence[Sequence[float]], point: Sequence[float]) -> int:
+    """The plain scan the indexes replace, kept for testing and benchmarking them"""
+
+    x, y = point
+
+    closest_dist = float('inf')
+    closest_index = -1
+
+    for i, (px, py) in enumerate(points):
+        dist = sqrt((x - px) ** 2 + (y - py) ** 2)
+
+        if dist < closest_dist:
+            closest_dist = dist
+            closest_index = i
+
+    return closest_index
@@ -0,0 +1,83 @@
+import pygame as pg
+
+from data import *
+
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+class StrokeMaskCache:
+    """
+    Rotated masks of a sprite for painting paddocks.
+
+    Angles are rounded to `angle_step` degrees and each mask is built the first time its angle is painted,
+    so painting doesn't rotate the sprite and build a new mask every stroke.
+    The masks are thrown away when a different sprite is painted (or `clear` is called).
+    """
+
+    def __init__(self, angle_step: float = PAINT_MASK_ANGLE_STEP) -> None:
+        self.angle_step = angle_step
+        self.image: pg.Surface | None = None
+        self.masks: Dict[int, pg.Mask] = {}
+
+    def clear(self) -> None:
+        self.image = None
+        self.masks.clear()
+
+    def get(self, image: pg.Surface, angle: float) -> pg.Mask:
+        if self.angle_step <= 0:
+            return pg.mask.from_surface(pg.transform.rotate(image, angle))
+
+        if image is not self.image:
+            self.clear()
+            self.image = image
+
+        bucket = round(angle / self.angle_step) % round(360 / self.angle_step)
+        mask = self.masks.get(bucket)
+
+        if mask is None:
+            mask = pg.mask.from_surface(pg.transform.rotate(image, bucket * self.angle_step))
+            self.masks[bucket] = mask
+
+        return mask
+
+class SpriteCache:
+    """
+    Rotated sprites shared by every machine, so drawing doesn't rotate the sprite every frame.
+
+    Sprites are keyed by the image itself (its identity, not its pixels) and the angle rounded to `angle_step` degrees.
+    The least recently drawn are thrown away once there are more than `max_entries`.
+    """
+
+    def __new__(cls) -> None:
+        if not hasattr(cls, 'instance'):
+            cls.instance = super(SpriteCache, cls).__new__(cls)
+            cls.instance.init()
+
+        return cls.instance
+
+    def init(self, angle_step: float = SPRITE_ANGLE_STEP, max_entries: int = SPRITE_CACHE_MAX_ENTRIES) -> None:
+        self.angle_step = angle_step
+        self.max_entries = max_entries
+        self.sprites: OrderedDict[Tuple[pg.Surface, int], pg.Surface] = OrderedDict()
+
+    def clear(self) -> None:
+        self.sprites.clear()
+
+    def get(self, image: pg.Surface, angle: float) -> pg.Surface:
+        if self.angle_step <= 0:
+            return pg.transform.rotate(image, angle)
+
+        bucket = round(angle / self.angle_step) % round(360 / self.angle_step)
+        sprite = self.sprites.get((image, bucket))
+
+        if sprite is not None:
+            self.sprites.move_to_end((image, bucket))
+            return sprite
+
+        sprite = pg.transform.rotate(image, bucket * self.angle_step)
+        self.sprites[(image, bucket)] = sprite
+
+        if len(self.sprites) > self.max_entries:
+            self.sprites.popitem(last=False)
+
+        return sprite
@@ -1,10 +1,45 @@
+import data
+
+# The web build reads pre-shrunk boundaries from a file, the tests need them worked out
+data.IS_WEB_BUILD = False
+
 from utils import utils
 import pygame as pg
 
+import os
+import json
+import tempfile
+
+from math import sqrt
+from random import Random
+from typing import List, Tuple
+
 pg.init()
 
 screen = pg.display.set_mode((800, 600))
 
+from save_manager import SaveManager
+
+# The caches are written next to the save, so the tests keep them (and any save) out of the source tree
+TEST_SAVE_DIR = tempfile.mkdtemp()
+SaveManager.SAVE_PATH = os.path.join(TEST_SAVE_DIR, "farmceo_savegame.json")
+SaveManager.PAINT_SAVE_PATH = os.path.join(TEST_SAVE_DIR, "farmceo_paint.json")
+
+from resource_manager import ResourceManager
+from paddock_manager import PaddockManager
+from paddock import Paddock
+from pathfinding import Job, RoadGraph
+from spatial_index import PointGrid, KDTree, NUMPY_AVAILABLE, linear_nearest_index
+from destination import Destination
+from machinary import Tractor, Header
+from vehicle_path import Path
+from events import Events
+from farm_ceo import FarmCEO, Map
+from map_cache import MapCache
+from path_cache import PathCache
+from fleet_state import get_rotated_sizes
+from data import *
+
 def test_line_collides_mask() -> None:
     line = [(120, 50), (120, 400)]
     multiplyer = 10
@@ -28,6 +63,38 @@ def test_line_collides_mask() -> None:
     print(f"Line collides mask: {collide_points}")
     print(utils.lines_form_points(collide_points))
 
+def test_runlines_collide_mask() -> None:
+    rand = Random(0)
+
+    for _ in range(20):
+        size = (rand.randint(20, 200), rand.randint(20, 200))
+        surf = pg.Surface(size, pg.SRCALPHA)
+
+        for _ in range(rand.randint(0, 8)):
+            pg.draw.circle(surf, (255, 0, 0), (rand.randint(0, size[0]), rand.randint(0, size[1])), rand.randint(1, 40))
+
+        # A few single pixels for the shortest runs
+        for _ in range(10):
+            surf.set_at((rand.randrange(size[0]), rand.randrange(size[1])), (255, 0, 0))
+
+        mask = pg.mask.from_surface(surf)
+        offset = (rand.randint(-50, 50), rand.randint(-50, 50))
+
+        for north in (True, False):
+            line_length = size[1] if north else size[0]
+            line_positions = range(rand.randint(0, 5), size[0] if north else size[1], rand.randint(1, 15))
+            line_start = rand.randint(0, line_length // 2)
+
+            runline_collisions = utils.runlines_collide_mask(mask, line_positions, line_start, line_length, north, offset)
+
+            for position, collisions in zip(line_positions, runline_collisions):
+                line = ((position, line_start), (position, line_length)) if north else ((line_start, position), (line_length, position))
+                expected = [[(x + offset[0], y + offset[1]) for x, y in run] for run in utils.line_collides_mask(line, mask, None)]
+
+                assert collisions == expected, f"Runline at {position} differs ({'north' if north else 'east'}, mask size: {size})"
+
+    print("Batched runlines match line_collides_mask")
+
 def test_shrink_polygon() -> None:
     multiplyer = 10
     poly = [(2.58*multiplyer, 14.29*multiplyer), (14.39*multiplyer, 14.74*multiplyer), (24.56*multiplyer, 5.94*multiplyer), (14.85*multiplyer, 6.7*multiplyer), (9.63*multiplyer, 12.27*multiplyer), (1.17*multiplyer, 9.01*multiplyer)]
@@ -38,9 +105,605 @@ def test_shrink_polygon() -> None:
 
     print(poly[0], new_poly[0])
 
+def load_green_spring_paddocks() -> List[Paddock]:
+    map_image, map_cfg = ResourceManager.load_map("Green_Spring_cfg.json")
+    game_map = Map(pg.Surface((1920, 1080)), (map_image, map_cfg))
+
+    paddocks = {int(num) + 1: dict(attrs, owned_by="npc") for num, attrs in map_cfg["paddocks"].items()}
+
+    paddock_manager = PaddockManager()
+    paddock_manager.init(pg.Surface((1920, 1080)), game_map.surface, game_map.paddocks_surface, paddocks, game_map.scale)
+
+    return paddock_manager.paddocks
+
+def legacy_trace_collision_boundary(point_end: Tuple, point_start: Tuple, boundary: List[Tuple]) -> List[Tuple]:
+    """The original list scanning tracer (before `BoundaryRing`), kept to check the traced paths have not changed"""
+
+    def get_closest_point_on_boundary(point: Tuple) -> Tuple:
+        closest_dist = float('inf')
+        closest_point = None
+
+        for px, py in boundary:
+            dist = sqrt((point[0] - px) ** 2 + (point[1] - py) ** 2)
+
+            if dist < closest_dist:
+                closest_dist = dist
+                closest_point = (px, py)
+
+        return closest_point
+
+    point_1_index = boundary.index(get_closest_point_on_boundary(point_end))
+    point_2_index = boundary.index(get_closest_point_on_boundary(point_start))
+
+    p1_index, p2_index = min(point_1_index, point_2_index), max(point_1_index, point_2_index)
+
+    dist_1 = 0
+    for px, py in boundary[p1_index:p2_index]:
+        nx, ny = boundary[boundary.index((px, py)) + 1]
+        dist_1 += sqrt((nx - px) ** 2 + (ny - py) ** 2)
+
+    dist_2 = 0
+    for px, py in boundary[p1_index::-1]:
+        nx, ny = boundary[boundary.index((px, py)) + 1]
+        dist_2 += sqrt((nx - px) ** 2 + (ny - py) ** 2)
+
+    for px, py in boundary[-1:p2_index:-1]:
+        nx, ny = boundary[boundary.index((px, py)) - 1]
+        dist_2 += sqrt((nx - px) ** 2 + (ny - py) ** 2)
+
+    if dist_1 < dist_2:
+        path = boundary[p1_index:p2_index]
+    else:
+        path = boundary[p1_index::-1]
+        path.extend(boundary[-1:p2_index-1:-1])
+
+    if point_1_index > point_2_index:
+        return list(reversed(path))
+
+    return path
+
+def test_trace_collision_boundary() -> None:
+    rand = Random(0)
+
+    for paddock in load_green_spring_paddocks():
+        job = Job(None, None, [], None, None, (0, 0), 0)
+
+        for working_width in (12, 17, 30):
+            lap = utils.shrink_polygon(paddock.boundary, working_width / 2)
+
+            for i in range(10):
+                point_end = (rand.uniform(paddock.rect.left, paddock.rect.right), rand.uniform(paddock.rect.top, paddock.rect.bottom))
+                point_start = rand.choice(lap)
+
+                assert job.trace_collision_boundary(point_end, point_start, lap) == legacy_trace_collision_boundary(point_end, point_start, lap), \
+                    f"Traced path differs on paddock {paddock.num} (width: {working_width}, points: {point_end} -> {point_start})"
+
+        print(f"Paddock {paddock.num}: traced paths match")
+
+    # A lap that shrunk away has nothing to trace around
+    assert Job(None, None, [], None, None, (0, 0), 0).trace_collision_boundary((10, 10), (20, 20), []) == []
+
+def test_working_path_runlines() -> None:
+    # A wide paddock with a notch cut out of the top, the runlines above the notch bottom are split in two by it
+    boundary = [(0, 0), (250, 0), (250, 200), (350, 200), (350, 0), (600, 0), (600, 300), (0, 300)]
+    working_width = 15
+
+    for north in (False, True):
+        # Flipped on its side it is worked with north-south runlines instead
+        paddock_boundary = [(y, x) for x, y in boundary] if north else boundary
+
+        job = Job(None, None, [], None, None, (0, 0), 0)
+        path = job.build_working_path(paddock_boundary, paddock_boundary[-1], working_width, outside_laps=2, skiprow=True)
+        if north: path = [(y, x) for x, y in path]
+
+        # Only the runlines get past the outside laps into the arm on the far side of the notch
+        far_arm = [point for point in path if 350 + working_width * 3 < point[0] < 600 - working_width * 3 and working_width * 3 < point[1] < 200 - working_width]
+        assert len(far_arm) > 0, f"The {'north-south' if north else 'east-west'} runlines stop at the notch"
+
+        print(f"{'North-south' if north else 'East-west'} runlines: {len(far_arm)} points past the notch")
+
+def test_extract_paddock_boundary() -> None:
+    paddock_manager = PaddockManager()
+
+    for paddock in load_green_spring_paddocks():
+        boundary = list(paddock.boundary)
+        paddock_manager.trace_paddock_boundary(paddock)
+
+        assert boundary == list(paddock.boundary), f"Paddock {paddock.num} extracted boundary differs from the tracer"
+
+        print(f"Paddock {paddock.num}: extracted boundary matches the tracer ({len(boundary)} points)")
+
+def legacy_paint(paddock: Paddock, surface: pg.Surface, pos: Tuple[int, int], color: pg.Color) -> int:
+    """The original whole paddock `Paddock.paint`, kept to check the incremental one paints and counts the same"""
+
+    local_pos = (pos[0] - paddock.rect.x, pos[1] - paddock.rect.y)
+    surface_mask = pg.mask.from_surface(surface)
+
+    collision_mask = paddock.mask.overlap_mask(surface_mask, local_pos)
+    paddock.paint_surface.blit(collision_mask.to_surface(setcolor=color, unsetcolor=(0, 0, 0, 0)), (0, 0))
+
+    old_count = paddock.paint_mask.count()
+    paddock.paint_mask = pg.mask.from_surface(paddock.paint_surface)
+
+    return (paddock.paint_mask.count() - old_count) * paddock.scale
+
+def test_paint() -> None:
+    rand = Random(0)
+    paddock = load_green_spring_paddocks()[0]
+
+    paddock.reset_paint()
+    legacy_paint_surface = paddock.paint_surface.copy()
+    legacy_paint_mask = paddock.paint_mask.copy()
+
+    map_surface = paddock.map_paddocks_surf.copy()
+
+    for i in range(300):
+        stroke = pg.Surface((rand.randint(5, 40), rand.randint(3, 12)), pg.SRCALPHA)
+        stroke.fill((255, 255, 255))
+        stroke = pg.transform.rotate(stroke, rand.uniform(0, 360))
+
+        # Some strokes hang off the edge of the paddock (and its rect)
+        pos = (rand.randint(paddock.rect.left - 30, paddock.rect.right), rand.randint(paddock.rect.top - 30, paddock.rect.bottom))
+        color = STATE_COLORS[rand.randint(0, 6)]
+
+        new_count = paddock.paint(stroke, pos, color)
+        paint_surface, paint_mask = paddock.paint_surface, paddock.paint_mask
+
+        paddock.paint_surface, paddock.paint_mask = legacy_paint_surface, legacy_paint_mask
+        legacy_count = legacy_paint(paddock, stroke, pos, color)
+        legacy_paint_surface, legacy_paint_mask = paddock.paint_surface, paddock.paint_mask
+
+        paddock.paint_surface, paddock.paint_mask = paint_surface, paint_mask
+
+        assert new_count == legacy_count, f"Stroke {i} painted {new_count} instead of {legacy_count}"
+
+        # Flushed every few strokes like it would be every frame
+        if i % 5 == 0: paddock.flush_paint()
+
+    assert pg.image.tobytes(paddock.paint_surface, "RGBA") == pg.image.tobytes(legacy_paint_surface, "RGBA")
+    assert paddock.paint_mask.count() == legacy_paint_mask.count() == pg.mask.from_surface(paddock.paint_surface).count()
+
+    # The dirty rects should have put all of the paint on the map, same as blitting the whole paint surface
+    paddock.flush_paint()
+    map_surface.blit(paddock.paint_surface, paddock.rect)
+
+    assert pg.image.tobytes(paddock.map_paddocks_surf, "RGBA") == pg.image.tobytes(map_surface, "RGBA")
+
+    print(f"Paint matches the whole paddock paint ({paddock.paint_mask.count()} pixels painted)")
+
+def test_paint_dict() -> None:
+    rand = Random(0)
+    paddock, other_paddock = load_green_spring_paddocks()[:2]
+
+    paddock.reset_paint()
+    assert paddock.paint_to_dict() is None
+
+    for _ in range(50):
+        stroke = pg.Surface((rand.randint(5, 40), rand.randint(3, 12)), pg.SRCALPHA)
+        stroke.fill((255, 255, 255))
+
+        paddock.paint(pg.transform.rotate(stroke, rand.uniform(0, 360)), (rand.randint(paddock.rect.left, paddock.rect.right), rand.randint(paddock.rect.top, paddock.rect.bottom)), STATE_COLORS[2])
+
+    # Through JSON like the paint save
+    paint_dict = json.loads(json.dumps(paddock.paint_to_dict()))
+    paint_mask = paddock.paint_mask.copy()
+
+    paddock.reset_paint()
+    paddock.load_paint_dict(paint_dict)
+
+    assert paddock.is_painting and tuple(paddock.paint_color) == tuple(STATE_COLORS[2])
+    assert paddock.paint_mask.count() == paddock.paint_mask.overlap_area(paint_mask, (0, 0)) == paint_mask.count()
+    assert pg.mask.from_surface(paddock.paint_surface).count() == paint_mask.count()
+
+    # Paint saved for a paddock of a different size (the map changed) is ignored
+    assert other_paddock.paint_mask.get_size() != paddock.paint_mask.get_size()
+
+    other_paddock.reset_paint()
+    other_paddock.load_paint_dict(paint_dict)
+    assert not other_paddock.is_painting and other_paddock.paint_mask.count() == 0
+
+    print(f"Paint save round trip ({paint_mask.count()} pixels painted)")
+
+def test_spatial_index() -> None:
+    rand = Random(0)
+
+    # Rounded points so there are plenty of duplicates and equal distances to break ties on
+    points = [(round(rand.uniform(0, 500)), round(rand.uniform(0, 500))) for _ in range(2000)]
+    queries = [(rand.uniform(-100, 600), rand.uniform(-100, 600)) for _ in range(500)]
+
+    indexes = [PointGrid(points), PointGrid(points, 64)]
+    if NUMPY_AVAILABLE: indexes.append(KDTree(points))
+
+    for index in indexes:
+        for query in queries:
+            assert index.nearest_index(query) == linear_nearest_index(points, query), f"{type(index).__name__} differs from the linear scan at {query}"
+
+        for query in queries[:50]:
+            within = [i for i, (px, py) in enumerate(points) if sqrt((query[0] - px) ** 2 + (query[1] - py) ** 2) <= 40]
+            assert index.indexes_within(query, 40) == within, f"{type(index).__name__} radius lookup differs from the linear scan at {query}"
+
+        assert type(index)([]).nearest_index((0, 0)) == -1
+        assert type(index)([]).indexes_within((0, 0), 10) == []
+
+    print(f"Spatial indexes match the linear scan ({len(indexes)} indexes)")
+
+def legacy_road_edges(roads: List[List[Tuple]], junction_distance: float) -> List[dict]:
+    """The road graph edges the way they used to be found, checking every point against every point on the later roads"""
+
+    nodes = [tuple(point) for road in roads for point in road]
+    edges = [{} for _ in nodes]
+
+    def add_edge(node_a: int, node_b: int) -> None:
+        if node_a == node_b: return
+
+        dist = sqrt((nodes[node_a][0] - nodes[node_b][0]) ** 2 + (nodes[node_a][1] - nodes[node_b][1]) ** 2)
+        edges[node_a][node_b] = edges[node_b][node_a] = dist
+
+    road_nodes = []
+    for road in roads:
+        first_node = sum(len(nodes) for nodes in road_nodes)
+        road_nodes.append(list(range(first_node, first_node + len(road))))
+
+        for node_a, node_b in zip(road_nodes[-1], road_nodes[-1][1:]):
+            add_edge(node_a, node_b)
+
+    for i, road_a in enumerate(road_nodes):
+        for road_b in road_nodes[i + 1:]:
+            for node_a in road_a:
+                for node_b in road_b:
+                    if sqrt((nodes[node_a][0] - nodes[node_b][0]) ** 2 + (nodes[node_a][1] - nodes[node_b][1]) ** 2) <= junction_distance:
+                        add_edge(node_a, node_b)
+
+    return edges
+
+def legacy_route_length(edges: List[dict], start_node: int, end_node: int) -> float:
+    """Shortest distance between two nodes, picking the closest unvisited node out of all of them every step"""
+
+    dists = [float('inf')] * len(edges)
+    dists[start_node] = 0.0
+    visited = [False] * len(edges)
+
+    for _ in range(len(edges)):
+        node = min((i for i in range(len(edges)) if not visited[i]), key=lambda i: dists[i])
+        if node == end_node or dists[node] == float('inf'): break
+
+        visited[node] = True
+
+        for neighbour, dist in edges[node].items():
+            dists[neighbour] = min(dists[neighbour], dists[node] + dist)
+
+    return dists[end_node]
+
+def test_road_graph() -> None:
+    # A road along the top and one running down from it, its first point is just off the top road so they only meet at a junction
+    roads = [[(x, 0) for x in range(0, 401, 20)], [(203, y) for y in range(6, 307, 20)]]
+
+    road_graph = RoadGraph(roads, 10)
+    assert road_graph.edges == legacy_road_edges(roads, 10)
+    assert len(road_graph.component_nodes) == 1
+
+    route = road_graph.route((-10, 5), (210, 300))
+    assert route[0] == (0, 0) and route[-1] == (203, 306) and ((200, 0), (203, 6)) in zip(route, route[1:]), route
+
+    rand = Random(0)
+
+    for _ in range(3):
+        roads = []
+        for _ in range(8):
+            x, y = rand.uniform(0, 500), rand.uniform(0, 500)
+            roads.append([])
+
+            for _ in range(rand.randint(5, 30)):
+                roads[-1].append((round(x), round(y)))
+                x, y = x + rand.uniform(-30, 30), y + rand.uniform(-30, 30)
+
+        road_graph = RoadGraph(roads, 25)
+        legacy_edges = legacy_road_edges(roads, 25)
+        assert road_graph.edges == legacy_edges
+
+        for _ in range(10):
+            start_node, end_node = road_graph.snap_pair((rand.uniform(0, 500), rand.uniform(0, 500)), (rand.uniform(0, 500), rand.uniform(0, 500)))
+            route = road_graph.find_route(start_node, end_node)
+
+            assert route[0] == start_node and route[-1] == end_node
+            route_length = sum(legacy_edges[node_a][node_b] for node_a, node_b in zip(route, route[1:]))
+            assert abs(route_length - legacy_route_length(legacy_edges, start_node, end_node)) < 1e-6, f"Route {start_node} -> {end_node} isn't the shortest"
+
+    print("Road graph junctions and routes match the brute force ones")
+
+def test_map_cache() -> None:
+    paddocks = load_green_spring_paddocks()
+    map_name, map_cfg = FarmCEO.MAP_NAME, ResourceManager.load_map(FarmCEO.MAP_NAME)[1]
+
+    # Copies of the map files so one can be changed, and a save (with the cache next to it) of its own
+    maps_path, save_path = ResourceManager.MAPS_PATH, SaveManager.SAVE_PATH
+    save_dir = tempfile.mkdtemp()
+
+    try:
+        for file_name in (map_name, map_cfg["filename"]):
+            os.makedirs(os.path.dirname(os.path.join(save_dir, "maps", file_name)), exist_ok=True)
+
+            with open(os.path.join(maps_path, file_name), "rb") as src, open(os.path.join(save_dir, "maps", file_name), "wb") as dst:
+                dst.write(src.read())
+
+        ResourceManager.MAPS_PATH = os.path.join(save_dir, "maps")
+        SaveManager.SAVE_PATH = os.path.join(save_dir, "farmceo_savegame.json")
+
+        map_cache = MapCache(map_name, map_cfg, paddocks[0].scale)
+        assert map_cache.load() == {}
+
+        map_cache.save(paddocks)
+        assert os.path.dirname(map_cache.file_path) == os.path.join(save_dir, "map_cache")
+
+        cached_paddocks = MapCache(map_name, map_cfg, paddocks[0].scale).load()
+        assert len(cached_paddocks) == len(paddocks)
+
+        for paddock in paddocks:
+            cached_paddock = cached_paddocks[str(paddock.num)]
+
+            assert cached_paddock["boundary"] == [tuple(point) for point in paddock.boundary], f"Paddock {paddock.num} boundary differs"
+            assert (cached_paddock["rect"], cached_paddock["center"], cached_paddock["gate"]) == (paddock.rect, tuple(paddock.center), tuple(paddock.gate))
+            assert cached_paddock["mask"].get_size() == paddock.mask.get_size()
+            assert cached_paddock["mask"].count() == cached_paddock["mask"].overlap_area(paddock.mask, (0, 0)) == paddock.mask.count(), f"Paddock {paddock.num} mask differs"
+
+        # A different display scale or a changed map file rebuilds it
+        assert MapCache(map_name, map_cfg, paddocks[0].scale * 2).load() == {}
+
+        with open(os.path.join(save_dir, "maps", map_name), "ab") as f:
+            f.write(b" ")
+
+        assert MapCache(map_name, map_cfg, paddocks[0].scale).load() == {}
+    finally:
+        ResourceManager.MAPS_PATH, SaveManager.SAVE_PATH = maps_path, save_path
+
+    print(f"Map cache round trip ({len(paddocks)} paddocks)")
+
+def test_simplify_path() -> None:
+    # Up a runline, a headland turn then back down the next one
+    path = [(100, y) for y in range(400, 99, -1)]
+    path.extend([(x, 100) for x in range(101, 118)])
+    path.extend([(117, y) for y in range(101, 401)])
+
+    simplified_path = utils.simplify_path(path, 1.5)
+    assert simplified_path == [(100, 400), (100, 100), (117, 100), (117, 400)], simplified_path
+
+    simplified_path = utils.simplify_path(path, 1.5, 100)
+    assert simplified_path == [(100, 400), (100, 300), (100, 200), (100, 100), (117, 100), (117, 200), (117, 300), (117, 400)], simplified_path
+
+    print(f"Simplified path: {len(path)} -> {len(simplified_path)} points")
+
+def test_walk_path() -> None:
+    path = [(0, 0), (100, 0), (100, 50)]
+
+    assert utils.walk_path(path, 40) == ([(0, 0), (40.0, 0.0)], 0, 40)
+    assert utils.walk_path(path, 120) == ([(0, 0), (100, 0), (100.0, 20.0)], 1, 120)
+    assert utils.walk_path(path, 1000) == ([(0, 0), (100, 0), (100, 50)], 2, 150)
+
+    # Stamping a 20x20 square every 2 pixels along a straight line covers the lines length (and a square) by 20
+    square = pg.Mask((20, 20), fill=True)
+    swath_mask, swath_pos = utils.get_stamped_mask([(square, (x, 10)) for x in range(10, 111, 2)])
+    assert swath_mask.count() == 120 * 20, swath_mask.count()
+    assert swath_pos == (0, 0), swath_pos
+
+    print(f"Walked path and swath ({swath_mask.count()} pixels)")
+
+def test_vehicle_path() -> None:
+    points = [(x, x / 2) for x in range(10)]
+
+    path = Path(points)
+    view = path.view()
+
+    # Views share the buffer but have their own cursor
+    assert path.pop_front() == (0, 0) and path.skip_reached(1, 0.5, 1) == 1
+    assert path.to_list() == points[2:] and path[-1] == points[-1]
+    assert view.to_list() == points and view.buffer is path.buffer
+
+    try:
+        path[len(path)]
+        assert False, "Indexing past the end didn't raise"
+    except IndexError:
+        pass
+
+    # The view that ends at the end of the buffer adds to it in place, the other one copies it first
+    path.append((10, 5))
+    assert path.buffer is view.buffer and view.to_list() == points
+
+    view.extend([(-1, -1), (-2, -2)])
+    assert view.buffer is not path.buffer
+    assert view.to_list() == points + [(-1, -1), (-2, -2)]
+    assert path.to_list() == points[2:] + [(10, 5)]
+
+    # Only the remaining points are saved
+    assert Path.from_dict(path.to_dict()).to_list() == path.to_list()
+    assert Path.from_dict(Path().to_dict()).to_list() == []
+
+    # Older saves have a list of points (or nothing)
+    assert Path.from_dict([[1, 2], [3.5, 4]]).to_list() == [(1, 2), (3.5, 4)]
+    assert len(Path.from_dict(None)) == 0
+
+    print("Path views, copy on write and saving work")
+
+def run_tractor_job(farm_ceo: FarmCEO, paddock: Paddock, dt: float, time_warp: bool) -> Tuple[int, Tuple[int, int]]:
+    """Works `paddock` with the first tractor and tool, returns the paint and where the tractor was when it finished"""
+
+    shed = farm_ceo.shed
+    tractor = next(vehicle for vehicle in shed.vehicles if isinstance(vehicle, Tractor))
+    tool = next(tool for tool in shed.tools if tool.tool_type in PAINT_TOOLS)
+
+    # Never runs out part way through
+    tool.fill = tool.storage = 1e9
+
+    # The paint is reset as soon as the paddock is finished, so it's kept for comparing (with where the tractor finished)
+    finished = []
+    paddock.reset_paint = lambda: finished.append((paddock.paint_mask.count(), tractor.rect.center))
+
+    shed.task_tractor(tractor, tool, Destination(paddock))
+
+    # Back to the shed isn't compared
+    while len(finished) == 0:
+        shed.simulate(dt, time_warp)
+
+    del paddock.reset_paint
+    paddock.reset_paint()
+
+    return finished[-1]
+
+def test_time_warp() -> None:
+    # A new save of its own, the save paths are put back for the tests after it
+    save_path, paint_save_path = SaveManager.SAVE_PATH, SaveManager.PAINT_SAVE_PATH
+    save_dir = tempfile.mkdtemp()
+
+    try:
+        SaveManager.SAVE_PATH = os.path.join(save_dir, "farmceo_savegame.json")
+        SaveManager.PAINT_SAVE_PATH = os.path.join(save_dir, "farmceo_paint.json")
+
+        farm_ceo = FarmCEO(pg.Surface((1920, 1080)), pg.time.Clock(), Events())
+        paddock = farm_ceo.paddock_manager.paddocks[1]
+
+        warp_paint, warp_end = run_tractor_job(farm_ceo, paddock, TIME_WARP_STEP, True)
+        frames_paint, frames_end = run_tractor_job(farm_ceo, paddock, 1 / 60, False)
+    finally:
+        SaveManager.SAVE_PATH, SaveManager.PAINT_SAVE_PATH = save_path, paint_save_path
+
+    area = paddock.mask.count()
+
+    # The time warp paints the same strokes along the same turns, only the rounding of the simulated machines is missing
+    assert abs(warp_paint - frames_paint) <= area * 0.01, (warp_paint, frames_paint, area)
+    assert sqrt((warp_end[0] - frames_end[0]) ** 2 + (warp_end[1] - frames_end[1]) ** 2) <= 3, (warp_end, frames_end)
+
+    print(f"Time warped paint: {warp_paint / area:.2%} (ended at {warp_end}), driven: {frames_paint / area:.2%} (ended at {frames_end})")
+
+def test_follow_path_reached_waypoints() -> None:
+    save_path, paint_save_path = SaveManager.SAVE_PATH, SaveManager.PAINT_SAVE_PATH
+    save_dir = tempfile.mkdtemp()
+
+    try:
+        SaveManager.SAVE_PATH = os.path.join(save_dir, "farmceo_savegame.json")
+        SaveManager.PAINT_SAVE_PATH = os.path.join(save_dir, "farmceo_paint.json")
+
+        farm_ceo = FarmCEO(pg.Surface((1920, 1080)), pg.time.Clock(), Events())
+    finally:
+        SaveManager.SAVE_PATH, SaveManager.PAINT_SAVE_PATH = save_path, paint_save_path
+
+    tractor = next(vehicle for vehicle in farm_ceo.shed.vehicles if isinstance(vehicle, Tractor))
+    header = next(vehicle for vehicle in farm_ceo.shed.vehicles if isinstance(vehicle, Header))
+
+    for vehicle in (tractor, header):
+        # Thousands of waypoints it is already on (this used to recurse once per waypoint) then one to the east
+        next_waypoint = (vehicle.rect.centerx + 100, vehicle.rect.centery)
+        vehicle.path = Path([vehicle.rect.center] * 5000 + [next_waypoint])
+
+        vehicle.follow_path()
+
+        assert vehicle.path.to_list() == [next_waypoint], f"{type(vehicle).__name__} didn't skip the reached waypoints"
+        assert vehicle.desired_rotation == -90
+
+    assert len(header.completed_path) >= 5000
+
+    print("Followed paths past 5000 reached waypoints")
+
+def run_fleet(frames: int, dt: float, batched: bool) -> List[List[Tuple[float, ...]]]:
+    """Drives a tractor (with its tool) and a header to work paddocks, returns every machines pose (and its tools) after each frame"""
+
+    save_path, paint_save_path = SaveManager.SAVE_PATH, SaveManager.PAINT_SAVE_PATH
+    save_dir = tempfile.mkdtemp()
+
+    # Every run plans its paths from scratch (a cached one is ready a frame sooner)
+    PathCache().init()
+
+    try:
+        SaveManager.SAVE_PATH = os.path.join(save_dir, "farmceo_savegame.json")
+        SaveManager.PAINT_SAVE_PATH = os.path.join(save_dir, "farmceo_paint.json")
+
+        farm_ceo = FarmCEO(pg.Surface((1920, 1080)), pg.time.Clock(), Events())
+
+        shed = farm_ceo.shed
+        paddocks = farm_ceo.paddock_manager.paddocks
+
+        tractor = next(vehicle for vehicle in shed.vehicles if isinstance(vehicle, Tractor))
+        tool = next(tool for tool in shed.tools if tool.tool_type in PAINT_TOOLS)
+        tool.fill = tool.storage = 1e9
+        shed.task_tractor(tractor, tool, Destination(paddocks[1]))
+
+        header = next(vehicle for vehicle in shed.vehicles if isinstance(vehicle, Header))
+        header.storage = 1e12
+        paddocks[2].set_state(6)
+        paddocks[2].contract_requirements = {}
+        shed.task_header(header, Destination(paddocks[2]))
+
+        poses = []
+
+        for _ in range(frames):
+            # Paths are picked up the frame after they are asked for, however long the worker pool takes
+            for machine in (tractor, header):
+                if machine.planning: machine.path_future.result()
+
+            if batched:
+                shed.simulate_fleet([vehicle for vehicle in shed.vehicles if vehicle.active], dt)
+            else:
+                for vehicle in shed.vehicles:
+                    if vehicle.active: vehicle.update(dt)
+
+            poses.append([(tractor.x, tractor.y, tractor.rotation, tool.x, tool.y, tool.rotation), (header.x, header.y, header.rotation)])
+    finally:
+        SaveManager.SAVE_PATH, SaveManager.PAINT_SAVE_PATH = save_path, paint_save_path
+
+    return poses
+
+def test_fleet_state() -> None:
+    if not NUMPY_AVAILABLE:
+        print("NumPy isn't available, skipping the batched fleet")
+        return
+
+    # The shed only batches big fleets, so this batches a small one itself (through the `FleetState` it keeps between frames)
+    scalar_poses = run_fleet(900, 1 / 60, False)
+    batched_poses = run_fleet(900, 1 / 60, True)
+
+    for frame, (scalar_machines, batched_machines) in enumerate(zip(scalar_poses, batched_poses)):
+        for scalar_pose, batched_pose in zip(scalar_machines, batched_machines):
+            assert all(abs(a - b) <= 1e-6 for a, b in zip(scalar_pose, batched_pose)), f"Frame {frame}: batched pose {batched_pose} differs from {scalar_pose}"
+
+    moved = sqrt((scalar_poses[-1][0][0] - scalar_poses[0][0][0]) ** 2 + (scalar_poses[-1][0][1] - scalar_poses[0][0][1]) ** 2)
+    print(f"Batched fleet matches the scalar updates ({len(scalar_poses)} frames, the tractor moved {moved:.0f} px)")
+
+def test_rotated_sizes() -> None:
+    if not NUMPY_AVAILABLE:
+        print("NumPy isn't available, skipping the batched rotated sizes")
+        return
+
+    import numpy as np
+
+    rand = Random(0)
+
+    sizes = [(rand.randint(1, 80), rand.randint(1, 80)) for _ in range(2000)]
+    angles = [rand.choice((rand.uniform(-720, 720), rand.randint(-8, 8) * 45)) for _ in sizes]
+
+    widths, heights = get_rotated_sizes(np.array([size[0] for size in sizes], dtype=float), np.array([size[1] for size in sizes], dtype=float), np.array(angles))
+
+    for size, angle, width, height in zip(sizes, angles, widths, heights):
+        assert (width, height) == pg.transform.rotate(pg.Surface(size), angle).get_size(), f"{size} rotated by {angle}"
+
+    print(f"Batched rotated sizes match pygame ({len(sizes)} sizes)")
+
 if __name__ == "__main__":
     test_line_collides_mask()
+    test_runlines_collide_mask()
     test_shrink_polygon()
+    test_trace_collision_boundary()
+    test_working_path_runlines()
+    test_extract_paddock_boundary()
+    test_paint()
+    test_paint_dict()
+    test_spatial_index()
+    test_road_graph()
+    test_map_cache()
+    test_simplify_path()
+    test_walk_path()
+    test_vehicle_path()
+    test_time_warp()
+    test_follow_path_reached_waypoints()
+    test_fleet_state()
+    test_rotated_sizes()
 
     while 1:
         for event in pg.event.get():
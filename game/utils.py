@@ -8,8 +8,17 @@ if not IS_WEB_BUILD:
 else:
     WEB_BOUNDARIES = ResourceManager.load_json("web_boundaries.json")
 
-from math import atan2, degrees, cos, sin
-from typing import Tuple
+try:
+    import numpy as np
+    NUMPY_AVAILABLE: bool = True
+except ImportError:
+    NUMPY_AVAILABLE: bool = False
+
+import zlib
+
+from itertools import repeat
+from math import atan2, degrees, cos, sin, sqrt
+from typing import Tuple, List, Sequence
 
 class utils:
     # https://stackoverflow.com/questions/4183208/how-do-i-rotate-an-image-around-its-center-using-pygame
@@ -167,6 +176,204 @@ class utils:
 
         return collisions
 
+    @staticmethod
+    def mask_to_array(mask: pg.Mask) -> "np.ndarray":
+        """Returns the mask as a NumPy bool array indexed [x, y]"""
+        # Unset pixels are fully transparent black so any non zero pixel is set (pixels2d is a view, so no copy is made)
+        mask_surface = mask.to_surface(setcolor=(255, 255, 255, 255), unsetcolor=(0, 0, 0, 0))
+        return pg.surfarray.pixels2d(mask_surface) != 0
+
+    @staticmethod
+    def mask_to_bytes(mask: pg.Mask) -> bytes:
+        """Compressed mask bits (one byte per pixel before compression, 0 is unset), load with `mask_from_bytes`"""
+
+        mask_surface = pg.Surface(mask.get_size(), depth=8)
+        mask_surface.set_palette([(0, 0, 0)] + [(255, 255, 255)] * 255)
+
+        mask.to_surface(mask_surface, setcolor=(255, 255, 255), unsetcolor=(0, 0, 0))
+        # Fastest level, masks are mostly long runs so it barely changes the size
+        return zlib.compress(pg.image.tobytes(mask_surface, "P"), 1)
+
+    @staticmethod
+    def mask_from_bytes(mask_bytes: bytes, size: Tuple[int, int]) -> pg.Mask:
+        mask_surface = pg.image.frombytes(zlib.decompress(mask_bytes), size, "P")
+        mask_surface.set_colorkey(0)
+
+        return pg.mask.from_surface(mask_surface)
+
+    @staticmethod
+    def runlines_collide_mask(mask: pg.Mask, line_positions: Sequence[int], line_start: int, line_end: int, north: bool, offset: Tuple[int, int] = (0, 0)) -> List[List[List[Tuple[int, int]]]]:
+        """
+        Runs `line_collides_mask` for a batch of axis aligned runlines.
+
+        north: The runlines go from (x, line_start) to (x, line_end) for every x in line_positions, otherwise from (line_start, y) to (line_end, y).
+        offset: Added to every returned point, used when the mask is local to a bounding box.
+
+        returns -> The collisions of each runline in the same format as `line_collides_mask`
+        """
+
+        offset_x, offset_y = offset
+
+        if not NUMPY_AVAILABLE or DEBUG_PATH_MASK_COLLISION:
+            if north:
+                collisions = [utils.line_collides_mask(((x, line_start), (x, line_end)), mask, None) for x in line_positions]
+            else:
+                collisions = [utils.line_collides_mask(((line_start, y), (line_end, y)), mask, None) for y in line_positions]
+
+            if offset_x == 0 and offset_y == 0: return collisions
+
+            return [[[(x + offset_x, y + offset_y) for x, y in run] for run in line] for line in collisions]
+
+        line_positions = list(line_positions)
+        if len(line_positions) == 0: return []
+
+        mask_array = utils.mask_to_array(mask)
+
+        # One row per runline, padded with empty pixels either side so every run has a start and end edge
+        if north:
+            scanlines = mask_array[line_positions, line_start:line_end]
+        else:
+            scanlines = mask_array[line_start:line_end, line_positions].T
+
+        padded = np.zeros((scanlines.shape[0], scanlines.shape[1] + 2), dtype=np.int8)
+        padded[:, 1:-1] = scanlines
+
+        edges = np.diff(padded, axis=1)
+        run_lines, run_starts = np.nonzero(edges == 1)
+        _, run_ends = np.nonzero(edges == -1)
+
+        collisions = [[] for _ in line_positions]
+
+        for line_index, run_start, run_end in zip(run_lines.tolist(), run_starts.tolist(), run_ends.tolist()):
+            if north:
+                position = line_positions[line_index] + offset_x
+                run = range(line_start + run_start + offset_y, line_start + run_end + offset_y)
+
+                collisions[line_index].append(list(zip(repeat(position, len(run)), run)))
+            else:
+                position = line_positions[line_index] + offset_y
+                run = range(line_start + run_start + offset_x, line_start + run_end + offset_x)
+
+                collisions[line_index].append(list(zip(run, repeat(position, len(run)))))
+
+        return collisions
+
+    @staticmethod
+    def simplify_path(path: List[Sequence[float]], tolerance: float, max_segment_length: float = float('inf')) -> List[Sequence[float]]:
+        """
+        Douglas-Peucker simplification of a path.
+
+        Points within `tolerance` of the line between the points kept either side of them are removed, so straight runs
+        (and pixel stair steps) collapse while corners stay. The path is also split at every point where it doubles back
+        on itself (turns more than 90 degrees) so headland turns always keep their turning points.
+
+        max_segment_length: Original points are kept so no two kept points are further apart than this (along the path).
+        """
+
+        # Repeated points have no direction
+        points = [point for i, point in enumerate(path) if i == 0 or point != path[i-1]]
+        if len(points) < 3: return points
+
+        # Turning points always stay
+        split_indexes = [0]
+        for i in range(1, len(points) - 1):
+            (x0, y0), (x1, y1), (x2, y2) = points[i-1], points[i], points[i+1]
+
+            if (x1 - x0) * (x2 - x1) + (y1 - y0) * (y2 - y1) < 0:
+                split_indexes.append(i)
+
+        split_indexes.append(len(points) - 1)
+
+        keep = [False] * len(points)
+        for i in split_indexes: keep[i] = True
+
+        stack = list(zip(split_indexes, split_indexes[1:]))
+        while len(stack) > 0:
+            start, end = stack.pop()
+            if end - start < 2: continue
+
+            sx, sy = points[start]
+            ex, ey = points[end]
+            dx, dy = ex - sx, ey - sy
+            length = sqrt(dx ** 2 + dy ** 2)
+
+            furthest_dist = -1
+            furthest_index = start
+
+            for i in range(start + 1, end):
+                px, py = points[i]
+
+                if length == 0:
+                    # Loop back to the same point, use the distance to it instead
+                    dist = sqrt((px - sx) ** 2 + (py - sy) ** 2)
+                else:
+                    dist = abs(dy * (px - sx) - dx * (py - sy)) / length
+
+                if dist > furthest_dist:
+                    furthest_dist = dist
+                    furthest_index = i
+
+            if furthest_dist > tolerance:
+                keep[furthest_index] = True
+                stack.append((start, furthest_index))
+                stack.append((furthest_index, end))
+
+        simplified_path = [points[0]]
+        segment_length = 0
+
+        for i in range(1, len(points)):
+            segment_length += sqrt((points[i][0] - points[i-1][0]) ** 2 + (points[i][1] - points[i-1][1]) ** 2)
+
+            if keep[i] or segment_length >= max_segment_length:
+                simplified_path.append(points[i])
+                segment_length = 0
+
+        return simplified_path
+
+    @staticmethod
+    def walk_path(points: Sequence[Sequence[float]], distance: float) -> Tuple[List[Tuple[float, float]], int, float]:
+        """
+        Follows `points` from the first one for `distance` (in straight lines between them).
+        returns -> the points walked through (ending where it stopped), how many points after the first were reached and the distance walked
+        """
+
+        route = [tuple(points[0])]
+        walked = 0.0
+
+        for i in range(1, len(points)):
+            (ax, ay), (bx, by) = route[-1], points[i]
+            length = sqrt((bx - ax) ** 2 + (by - ay) ** 2)
+
+            if walked + length >= distance:
+                t = (distance - walked) / length if length > 0 else 0
+                route.append((ax + (bx - ax) * t, ay + (by - ay) * t))
+
+                return route, i - 1, distance
+
+            walked += length
+            route.append((bx, by))
+
+        return route, len(points) - 1, walked
+
+    @staticmethod
+    def get_stamped_mask(stamps: Sequence[Tuple[pg.Mask, Sequence[float]]]) -> Tuple[pg.Mask, Tuple[int, int]]:
+        """
+        Everything covered by the masks, each drawn centred on its point (what painting them one stroke at a time covers).
+        returns -> the mask and its top left position
+        """
+
+        rects = [pg.Rect((0, 0), mask.get_size()) for mask, _ in stamps]
+        for rect, (_, (x, y)) in zip(rects, stamps):
+            rect.center = (round(x), round(y))
+
+        bounds = rects[0].unionall(rects[1:])
+        stamped_mask = pg.Mask(bounds.size)
+
+        for rect, (mask, _) in zip(rects, stamps):
+            stamped_mask.draw(mask, (rect.x - bounds.x, rect.y - bounds.y))
+
+        return stamped_mask, bounds.topleft
+
     @staticmethod
     def lines_form_points(points: list[tuple], tolerance: int = 1) -> list[tuple, tuple]:
         lines = []
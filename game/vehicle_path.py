@@ -0,0 +1,129 @@
+import sys
+
+from array import array
+from base64 import b64encode, b64decode
+from itertools import chain
+from math import sqrt
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+from typing_extensions import Self
+
+class Path:
+    """
+    Waypoints for a machine to follow.
+
+    Points are packed into a flat float32 `array` (x0, y0, x1, y1, ...) with a read cursor, so reaching a waypoint
+    just moves the cursor instead of `list.pop(0)` shifting every point after it.
+
+    `view` returns another `Path` over the same buffer with its own cursor (a tractor and its tool share one buffer).
+    Points are never changed once added, so a shared buffer is only copied when a view that isn't at the end of it gets extended.
+    """
+
+    def __init__(self, points: Iterable[Sequence[float]] = ()) -> None:
+        self.buffer = array('f', chain.from_iterable(points))
+        self.start = 0
+        self.end = len(self.buffer) // 2
+
+    @classmethod
+    def from_buffer(cls, buffer: array, start: int, end: int) -> Self:
+        path = cls.__new__(cls)
+        path.buffer = buffer
+        path.start = start
+        path.end = end
+
+        return path
+
+    def view(self) -> Self:
+        return Path.from_buffer(self.buffer, self.start, self.end)
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __getitem__(self, index: int) -> Tuple[float, float]:
+        if index < 0: index += len(self)
+        if index < 0 or index >= len(self): raise IndexError("Path index out of range")
+
+        i = (self.start + index) * 2
+        return (self.buffer[i], self.buffer[i + 1])
+
+    def __iter__(self) -> Iterator[Tuple[float, float]]:
+        buffer = self.buffer
+
+        for i in range(self.start * 2, self.end * 2, 2):
+            yield (buffer[i], buffer[i + 1])
+
+    def __repr__(self) -> str:
+        return f"Path({len(self)} points)"
+
+    def pop_front(self) -> Tuple[float, float]:
+        """Returns the current waypoint and moves on to the next one"""
+
+        point = self[0]
+        self.start += 1
+
+        return point
+
+    def skip_reached(self, x: float, y: float, radius: float, reached: List[Tuple[float, float]] | None = None) -> int:
+        """
+        Moves past every waypoint in a row that is within `radius` of (x, y) and returns how many there were.
+        The points moved past are added to `reached` if it's given.
+        """
+
+        buffer = self.buffer
+        i = self.start
+
+        while i < self.end:
+            px, py = buffer[i * 2], buffer[i * 2 + 1]
+            if sqrt((px - x) ** 2 + (py - y) ** 2) >= radius: break
+
+            if reached is not None: reached.append((px, py))
+            i += 1
+
+        skipped = i - self.start
+        self.start = i
+
+        return skipped
+
+    def make_appendable(self) -> None:
+        if self.end * 2 == len(self.buffer): return
+
+        # Another view has added to (or still uses) the end of the buffer, so this one gets its own copy
+        self.buffer = self.buffer[self.start * 2:self.end * 2]
+        self.end -= self.start
+        self.start = 0
+
+    def append(self, point: Sequence[float]) -> None:
+        self.make_appendable()
+
+        self.buffer.append(point[0])
+        self.buffer.append(point[1])
+        self.end += 1
+
+    def extend(self, points: Iterable[Sequence[float]]) -> None:
+        self.make_appendable()
+
+        self.buffer.extend(chain.from_iterable(points))
+        self.end = len(self.buffer) // 2
+
+    def to_list(self) -> List[Tuple[float, float]]:
+        return list(self)
+
+    def to_dict(self) -> Dict[str, any]:
+        """The remaining points as base64 little-endian float32 pairs"""
+
+        remaining = self.buffer[self.start * 2:self.end * 2]
+        if sys.byteorder == "big": remaining.byteswap()
+
+        return {"points": b64encode(remaining.tobytes()).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, path_dict: Dict[str, any] | List[Sequence[float]] | None) -> Self:
+        """Loads a `to_dict` path, or a list of points from older saves"""
+
+        if path_dict is None: return cls()
+        if isinstance(path_dict, list): return cls(path_dict)
+
+        buffer = array('f')
+        buffer.frombytes(b64decode(path_dict["points"]))
+        if sys.byteorder == "big": buffer.byteswap()
+
+        return cls.from_buffer(buffer, 0, len(buffer) // 2)
@@ -1,7 +1,9 @@
 import pygame as pg
 import math
+import struct
 import os
 
+from sprite_cache import SpriteCache
 from typing import List, Tuple
 
 pg.init()
@@ -24,6 +26,41 @@ def rotate_point_centered(origin: Tuple[float, float], point: Tuple[float, float
 
     return qx, qy
 
+def get_rotated_size(size: Tuple[int, int], angle: float) -> Tuple[int, int]:
+    """
+    Size of `pg.transform.rotate(surface, angle)` for a surface of `size`, without rotating anything.
+    Worked out the same way pygame does (the angle is a C float) so it matches exactly.
+    """
+
+    w, h = size
+    angle = struct.unpack("f", struct.pack("f", angle))[0]
+
+    if math.fmod(angle, 90) == 0:
+        return (w, h) if math.fmod(angle, 180) == 0 else (h, w)
+
+    radangle = angle * .01745329251994329
+    sangle, cangle = math.sin(radangle), math.cos(radangle)
+
+    cx, cy = cangle * w, cangle * h
+    sx, sy = sangle * w, sangle * h
+
+    return int(max(abs(cx + sy), abs(cx - sy), abs(-cx + sy), abs(-cx - sy))), int(max(abs(sx + cy), abs(sx - cy), abs(-sx + cy), abs(-sx - cy)))
+
+def get_hitch_error(rotation: float, hitch: Tuple[float, float], vehicle_hitch: Tuple[float, float]) -> float:
+    """
+    Degrees between a trailer facing `rotation` and the direction from its hitch to the vehicles hitch (+-1000 when jackknifed)
+    """
+
+    direction = math.degrees(math.atan2(vehicle_hitch[1]-hitch[1], vehicle_hitch[0]-hitch[0])) + 90
+
+    change = direction + rotation
+    if change > 270: change -= 360
+
+    if change < -90: change = 1000
+    elif change > 90: change = -1000
+
+    return change
+
 def rotate_image_centered(image: pg.Surface, angle: float, x: float, y: float) -> Tuple[pg.Surface, pg.Rect]:
     rotated_image = pg.transform.rotate(image, angle)
     new_rect = rotated_image.get_rect(center=(x, y))
@@ -68,12 +105,11 @@ class Vehicle:
         self.screen: pg.Surface = screen
         
         self.original_image: pg.Surface = image
-        self.image: pg.Surface = self.original_image
 
         self.width: int = self.original_image.get_width()
         self.height: int = self.original_image.get_height()
 
-        self.rect: pg.Rect = self.image.get_rect()
+        self.rect: pg.Rect = self.original_image.get_rect()
         self.x: float = pos[0]
         self.y: float = pos[1]
         self.update_rect()
@@ -90,9 +126,16 @@ class Vehicle:
     def speed(self) -> float:
         return math.sqrt(self.velocity[0]**2 + self.velocity[1]**2)
 
+    @property
+    def image(self) -> pg.Surface:
+        """The sprite at the current rotation, only rotated when it's drawn (from the shared `SpriteCache`)"""
+
+        return SpriteCache().get(self.original_image, self.rotation)
+
     def rotate_image_centered(self, angle: float):
-        self.image = pg.transform.rotate(self.original_image, angle)
-        self.rect = self.image.get_rect(center=self.original_image.get_rect(topleft=(self.x, self.y)).center)
+        # The physics only needs the rotated rect, the rotated image is left until it's drawn
+        self.rect = pg.Rect((0, 0), get_rotated_size(self.original_image.get_size(), angle))
+        self.rect.center = self.original_image.get_rect(topleft=(self.x, self.y)).center
 
     def update_rect(self) -> None:
         self.rect.x = self.x
@@ -115,8 +158,20 @@ class Vehicle:
         rotated_hitch = rotate_point_centered(self.rect.center, self.rect.center + self.hitch.vector, math.radians(-self.rotation))
         self.hitch.update_position(rotated_hitch[0], rotated_hitch[1])
 
+    def place(self, center: Tuple[float, float], rotation: float) -> None:
+        """Stops the vehicle with its center at `center`, facing `rotation`"""
+
+        self.x = center[0] - self.original_image.get_width() // 2
+        self.y = center[1] - self.original_image.get_height() // 2
+        self.rotation = rotation
+
+        self.velocity = [0, 0]
+        self.simulate(1)
+
     def draw(self) -> None:
-        self.screen.blit(self.image, self.rect.topleft)
+        # The cached sprite is rotated to the nearest `SPRITE_ANGLE_STEP` so it can be a pixel off the rects size
+        image = self.image
+        self.screen.blit(image, image.get_rect(center=self.rect.center))
 
         rotated_hitch = rotate_point_centered(self.rect.center, self.rect.center + self.hitch.vector, math.radians(-self.rotation))
 
@@ -130,9 +185,8 @@ class Trailer:
         self.vehicle: Vehicle = vehicle
 
         self.original_image: pg.Surface = image
-        self.image: pg.Surface = self.original_image
 
-        self.rect: pg.Rect = self.image.get_rect()
+        self.rect: pg.Rect = self.original_image.get_rect()
         self.x: float = pos[0]
         self.y: float = pos[1]
         self.update_rect()
@@ -143,23 +197,31 @@ class Trailer:
     @property
     def position(self) -> pg.math.Vector2: return pg.math.Vector2((self.x, self.y))
 
+    @property
+    def image(self) -> pg.Surface:
+        """The sprite at the current rotation, only rotated when it's drawn (from the shared `SpriteCache`)"""
+
+        return SpriteCache().get(self.original_image, self.rotation)
+
     def rotate_image_centered(self, angle) -> None:
-        self.image = pg.transform.rotate(self.original_image, angle)
-        self.rect = self.image.get_rect(center=self.rect.center)
+        # The physics only needs the rotated rect, the rotated image is left until it's drawn
+        center = self.rect.center
+        self.rect = pg.Rect((0, 0), get_rotated_size(self.original_image.get_size(), angle))
+        self.rect.center = center
 
-    def direction_to_vehicle(self, delta_time: float) -> float:
+    def get_hitch_error(self) -> float:
         """
-        Degrees
+        Degrees between the trailer and the direction to the vehicles hitch (+-1000 when jackknifed)
         """
 
-        direction = math.degrees(math.atan2(self.vehicle.hitch.y-self.hitch.y, self.vehicle.hitch.x-self.hitch.x)) + 90
+        return get_hitch_error(self.rotation, self.hitch.position, self.vehicle.hitch.position)
 
-        change = direction + self.rotation
-        if change > 270: change -= 360
-
-        if change < -90: change = 1000
-        elif change > 90: change = -1000
+    def direction_to_vehicle(self, delta_time: float) -> float:
+        """
+        Degrees
+        """
 
+        change = self.get_hitch_error()
         change /= 30 / delta_time ** 2
 
         rotation = self.rotation - change * self.vehicle.speed
@@ -190,6 +252,15 @@ class Trailer:
         self.rotate_image_centered(self.rotation)
         self.hitch.update_parent_center(self.rect.center)
 
+    def place_behind_vehicle(self) -> None:
+        """Lines the trailer up straight behind its (stopped) vehicle"""
+
+        self.rotation = self.vehicle.rotation
+
+        # The second time the hitch is worked out from the rect at the new position
+        for _ in range(2):
+            self.simulate(1)
+
     def draw(self) -> None:
         rotated_hitch = rotate_point_centered(self.rect.center, self.rect.center+self.hitch.vector, -math.radians(self.rotation))
 
@@ -0,0 +1,90 @@
+import os
+import logging
+
+from data import *
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable
+
+class WorkerPool:
+    """
+    Runs heavy, pure-data work (like working path generation) in background processes.
+
+    Functions submitted to the pool must be module level and only take / return picklable data.
+    When there is no pool available (web / android builds or the platform can't create one) the
+    work is run inline and an already completed `Future` is returned, so callers never need to care.
+    """
+
+    def __new__(cls) -> None:
+        if not hasattr(cls, 'instance'):
+            cls.instance = super(WorkerPool, cls).__new__(cls)
+            cls.instance.init()
+
+        return cls.instance
+
+    def init(self, max_workers: int | None = WORKER_POOL_MAX_WORKERS) -> None:
+        """max_workers: None for a worker per core, 0 to run everything inline"""
+
+        self.executor: ProcessPoolExecutor | None = None
+
+        if max_workers is None: max_workers = os.cpu_count() or 1
+        self.max_workers = max_workers
+
+        if IS_WEB_BUILD or TARGETING_ANDROID or max_workers <= 0:
+            logging.info("Worker pool is not supported on this platform. Work will be run inline.")
+            return
+
+        try:
+            self.executor = ProcessPoolExecutor(max_workers=max_workers)
+        except (OSError, ImportError, NotImplementedError) as e:
+            logging.warning(f"Could not create worker pool! Work will be run inline. Error: {e}")
+            return
+
+        logging.info(f"Worker pool created with {max_workers} workers.")
+
+    @property
+    def available(self) -> bool: return self.executor is not None
+
+    @property
+    def parallel_workers(self) -> int:
+        """How many workers can actually run at once (0 when work is run inline)"""
+
+        if self.executor is None: return 0
+        return min(self.max_workers, os.cpu_count() or 1)
+
+    @staticmethod
+    def completed(result: any) -> Future:
+        """Returns a `Future` that is already done with `result`"""
+
+        future = Future()
+        future.set_result(result)
+
+        return future
+
+    def submit(self, func: Callable, *args: any) -> Future:
+        if self.executor is None:
+            return self.completed(func(*args))
+
+        try:
+            return self.executor.submit(func, *args)
+        except RuntimeError as e:
+            # Pool was shut down or broke, stop using it
+            logging.error(f"Worker pool failed to submit work! Running it inline from now on. Error: {e}")
+            self.executor = None
+
+            return self.completed(func(*args))
+
+    def shutdown(self) -> None:
+        """Cancels queued work and waits for the workers to exit, so they aren't left to interpreter teardown (which can hang on spawn platforms)"""
+
+        if self.executor is None: return
+
+        logging.info("Shutting down worker pool...")
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.executor = None
+
+    @classmethod
+    def shutdown_if_started(cls) -> None:
+        """Shuts the pool down only if something created it (calling `WorkerPool()` here would spin a pool up just to close it)"""
+
+        if hasattr(cls, 'instance'): cls.instance.shutdown()